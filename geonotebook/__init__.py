@@ -1,8 +1,6 @@
-from jinja2 import ChoiceLoader, PackageLoader, PrefixLoader
-from notebook.utils import url_path_join
-
-import pkg_resources
-
+# NB: Every kernel imports this package,  imports only needed by the
+# notebook server extension are made inside the functions below.
+from . import entry_points
 from .config import Config
 
 
@@ -49,6 +47,8 @@ def get_notebook_jinja2_loader(nbapp):
     :returns: A jinja2 loader designed to work with our notebook templates
     :rtype: jinja2.ChoiceLoader
     """
+    from jinja2 import ChoiceLoader, PackageLoader, PrefixLoader
+
     return ChoiceLoader([
         PrefixLoader(
             {'core': nbapp.web_app.settings['jinja2_env'].loader},
@@ -59,6 +59,8 @@ def get_notebook_jinja2_loader(nbapp):
 
 
 def load_jupyter_server_extension(nbapp):
+    from notebook.utils import url_path_join
+
     nbapp.log.info("geonotebook module enabled!")
     nbapp.web_app.settings['jinja2_env'].loader = \
         get_notebook_jinja2_loader(nbapp)
@@ -70,7 +72,7 @@ def load_jupyter_server_extension(nbapp):
 
     base_url = webapp.settings['base_url']
 
-    for ep in pkg_resources.iter_entry_points(
-            group='geonotebook.handlers.default'):
-        webapp.add_handlers('.*$', [(url_path_join(base_url, ep.name),
-                                     ep.load())])
+    for name, handler in entry_points.load_all(
+            entry_points.DEFAULT_HANDLERS):
+        webapp.add_handlers('.*$', [(url_path_join(base_url, name),
+                                     handler)])
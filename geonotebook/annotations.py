@@ -1,11 +1,8 @@
 import numpy as np
-from rasterio.crs import CRS
 from rasterio.features import rasterize
 from shapely.geometry import Point as sPoint
 from shapely.geometry import Polygon as sPolygon
 
-from geonotebook.utils import transform_coordinates
-
 
 class Annotation(object):
     def __init__(self, *args, **kwargs):
@@ -97,13 +94,8 @@ class Polygon(Annotation, sPolygon):
         # shape to make sure we don't try to select/mask data that is
         # outside the bounds of our dataset.
 
-        # Convert the image corner coordinates to WGS84
-        trgt_srs = CRS.from_string("EPSG:4326")
-        src_srs = raster_data.crs
-        transformed = [transform_coordinates(src_srs, trgt_srs, [i[0]], [i[1]])
-                       for i in raster_data.shape.exterior.coords]
-        reprojected_data_extent = sPolygon(transformed)
-        clipped = self.intersection(reprojected_data_extent)
+        # The image footprint in WGS84 (computed once per raster_data)
+        clipped = self.intersection(raster_data.wgs84_shape)
 
         # Polygon is completely outside the dataset, return whatever
         # would have been returned by get_data()
@@ -133,10 +125,11 @@ class Polygon(Annotation, sPolygon):
         else:
             out_shape = data.shape[-2], data.shape[-1]
 
-        coordinates = []
-        for lat, lon in clipped.exterior.coords:
-            x, y = raster_data.index(lat, lon)
-            coordinates.append((y - window[0][1], x - window[0][0]))
+        # Index all vertices with a single reprojection
+        coordinates = [
+            (y - window[0][1], x - window[0][0])
+            for x, y in raster_data.index_many(*zip(*clipped.exterior.coords))
+        ]
 
         # Mask the final polygon
         mask = rasterize(
@@ -1,15 +1,20 @@
 import logging
 import os
 import sys
-
-import pkg_resources
+import threading
+import time
 
 from six.moves import configparser
 
+from . import entry_points
 
-def get_config(path=None):
-    conf = configparser.ConfigParser()
-    paths = [
+
+# Seconds between checks for changes to the configuration files
+CHECK_INTERVAL = 1.0
+
+
+def _config_paths():
+    return [
         "/etc/geonotebook.ini",
         "/usr/etc/geonotebook.ini",
         "/usr/local/etc/geonotebook.ini",
@@ -18,6 +23,26 @@ def get_config(path=None):
         os.path.join(os.getcwd(), ".geonotebook.ini"),
         "${GEONOTEBOOK_INI}"]
 
+
+def _config_stamp(path=None):
+    """The configuration files and their modification times."""
+    paths = [path] if path is not None else [
+        os.path.expanduser(os.path.expandvars(p)) for p in _config_paths()]
+
+    stamp = []
+    for p in paths:
+        try:
+            stamp.append((p, os.path.getmtime(p)))
+        except OSError:
+            stamp.append((p, None))
+
+    return tuple(stamp)
+
+
+def get_config(path=None):
+    conf = configparser.ConfigParser()
+    paths = _config_paths()
+
     found = False
 
     if path is not None:
@@ -38,15 +63,92 @@ def get_config(path=None):
     return conf
 
 
+class _CachedConfig(object):
+    """A parsed configuration,  reloaded when its files change."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._config = None
+        self._stamp = None
+        self._checked = None
+        self._vis_servers = {}
+
+    def get(self):
+        with self._lock:
+            now = time.time()
+            if self._config is not None and \
+               now - self._checked < CHECK_INTERVAL:
+                return self._config
+
+            # Stamp before parsing so changes made while parsing are
+            # picked up by the next check.
+            stamp = _config_stamp(self.path)
+            if self._config is None or stamp != self._stamp:
+                self._config = get_config(self.path)
+                self._stamp = stamp
+                self._vis_servers = {}
+
+            self._checked = now
+            return self._config
+
+    def vis_server(self, section, cls):
+        with self._lock:
+            config = self.get()
+            try:
+                return self._vis_servers[(section, cls)]
+            except KeyError:
+                server = cls(config, **dict(config.items(section)))
+                self._vis_servers[(section, cls)] = server
+                return server
+
+
 class Config(object):
+    """The geonotebook configuration.
+
+    Parsed configurations are shared by all Config objects in the process
+    and are only re-read when one of the configuration files changes.
+    """
+
     _valid_vis_hash = {}
 
+    _cache = {}
+    _cache_lock = threading.Lock()
+
     @classmethod
     def register_vis_server(cls, name, server):
         cls._valid_vis_hash[name] = server
 
+    @classmethod
+    def vis_server_class(cls, name):
+        """The vis_server class registered under name.
+
+        Classes registered through the 'geonotebook.vis.server' entry
+        point are only imported once they are used.
+        """
+        try:
+            return cls._valid_vis_hash[name]
+        except KeyError:
+            return entry_points.load(entry_points.VIS_SERVER, name)
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._cache_lock:
+            cls._cache.clear()
+
     def __init__(self, path=None):
-        self.config = get_config(path)
+        with Config._cache_lock:
+            try:
+                self._cached = Config._cache[path]
+            except KeyError:
+                self._cached = Config._cache[path] = _CachedConfig(path)
+
+        # Fail early if there is no configuration
+        self.config
+
+    @property
+    def config(self):
+        return self._cached.get()
 
     @property
     def log_level(self):
@@ -55,16 +157,27 @@ class Config(object):
         except (AttributeError, configparser.NoOptionError):
             return logging.WARNING
 
+    @property
+    def remote_timeout(self):
+        """Seconds to wait for the client to reply to a remote call."""
+        try:
+            return self.config.getfloat("default", "remote_timeout")
+        except (configparser.NoOptionError, ValueError):
+            # Use Remote.default_timeout
+            return None
+
     @property
     def vis_server(self):
         vis_server_section = self.config.get("default", "vis_server")
         try:
-            cls = self._valid_vis_hash[vis_server_section]
+            cls = self.vis_server_class(vis_server_section)
         except KeyError:
             raise NotImplementedError("{} is not a valid vis_server".format(
                 vis_server_section))
 
-        return cls(self.config, **dict(self.config.items(vis_server_section)))
+        # Clients are shared so their connection pools and caches
+        # survive across calls.
+        return self._cached.vis_server(vis_server_section, cls)
 
     @property
     def basemap(self):
@@ -72,8 +185,3 @@ class Config(object):
             "url": self.config.get("basemap", "url"),
             "attribution": self.config.get("basemap", "attribution")
         }
-
-
-for ep in pkg_resources.iter_entry_points(
-        group='geonotebook.vis.server'):
-    Config.register_vis_server(ep.name, ep.load())
@@ -0,0 +1,114 @@
+"""A cached registry of geonotebook's entry points.
+
+Each entry point group is scanned once,  the first time it is used,
+with importlib.metadata when it is available and pkg_resources (which is
+much slower to import) otherwise. Entry points are only loaded (imported)
+when they are first used,  and then cached.  Call refresh() after
+installing or removing packages that provide entry points.
+"""
+from collections import OrderedDict
+import threading
+
+RASTER_SCHEMA = 'geonotebook.wrappers.raster_schema'
+RASTER_FILE = 'geonotebook.wrappers.raster.file'
+VIS_SERVER = 'geonotebook.vis.server'
+DEFAULT_HANDLERS = 'geonotebook.handlers.default'
+
+_lock = threading.RLock()
+_groups = {}
+_loaded = {}
+
+
+def _scan(group):
+    """Yield the entry points of group from the installed distributions."""
+    try:
+        from importlib import metadata
+    except ImportError:
+        try:
+            import importlib_metadata as metadata
+        except ImportError:
+            metadata = None
+
+    if metadata is None:
+        import pkg_resources
+
+        for ep in pkg_resources.iter_entry_points(group=group):
+            yield ep
+        return
+
+    eps = metadata.entry_points()
+    if hasattr(eps, 'select'):
+        eps = eps.select(group=group)
+    else:
+        eps = eps.get(group, [])
+
+    for ep in eps:
+        yield ep
+
+
+def get(group):
+    """The entry points of a group.
+
+    :param group: The entry point group,  e.g. entry_points.RASTER_FILE
+    :returns: Entry points by name
+    :rtype: collections.OrderedDict
+    """
+    try:
+        return _groups[group]
+    except KeyError:
+        pass
+
+    with _lock:
+        if group not in _groups:
+            eps = OrderedDict()
+            for ep in _scan(group):
+                # The first distribution on the path wins,  as with imports
+                eps.setdefault(ep.name, ep)
+
+            _groups[group] = eps
+
+        return _groups[group]
+
+
+def load(group, name):
+    """Load an entry point.
+
+    :raises KeyError: If there is no entry point called name in group
+    :returns: The object the entry point refers to
+    """
+    try:
+        return _loaded[(group, name)]
+    except KeyError:
+        pass
+
+    ep = get(group)[name]
+
+    with _lock:
+        if (group, name) not in _loaded:
+            _loaded[(group, name)] = ep.load()
+
+        return _loaded[(group, name)]
+
+
+def load_all(group):
+    """Load every entry point of a group.
+
+    :returns: (name, object) pairs
+    :rtype: list
+    """
+    return [(name, load(group, name)) for name in get(group)]
+
+
+def refresh(group=None):
+    """Forget the entry points of a group,  or of all groups.
+
+    They are re-read from the installed distributions on next use.
+    """
+    with _lock:
+        for key in list(_groups):
+            if group is None or key == group:
+                del _groups[key]
+
+        for key in list(_loaded):
+            if group is None or key[0] == group:
+                del _loaded[key]
@@ -1,5 +1,9 @@
+import json
+import sys
 import uuid
 
+import six
+
 
 class JSONRPCError(Exception):
     code = 0
@@ -50,6 +54,16 @@ class ServerError(JSONRPCError):
     message = "Server Error."
 
 
+class RequestTimeout(JSONRPCError):
+    code = -32001
+    message = "Request timed out."
+
+
+class TooManyRequests(JSONRPCError):
+    code = -32002
+    message = "Too many requests waiting to be sent."
+
+
 def is_response(msg):
     return 'result' in msg and 'error' in msg and 'id' in msg
 
@@ -79,3 +93,207 @@ def json_rpc_notify(method, params=None, jsonrpc="2.0"):
         "method": method,
         "params": params,
         "jsonrpc": jsonrpc}
+
+
+# Binary buffers
+#
+# Large payloads are sent out-of-band as Jupyter comm message buffers
+# rather than being JSON encoded. In the JSON-RPC message they are
+# replaced by a reference of the form:
+#
+#    {"$buffer": <index into the message buffers>,
+#     "encoding": "ndarray" | "json" | "raw",
+#     # For "ndarray" only
+#     "dtype": <e.g. "float64">, "shape": [...]}
+#
+# Only the params and result of a message are looked at,  and only values
+# that are themselves payloads (NumPy arrays,  bytes or a JSONBuffer) are
+# moved. Other values,  e.g. large GeoJSON structures,  are left for the
+# JSON encoder and never walked. Wrap a value in Buffers to have payloads
+# nested anywhere inside it moved as well.
+
+# NumPy arrays smaller than this are sent as (JSON) lists
+BUFFER_THRESHOLD = 1024
+
+# dtypes with a javascript TypedArray counterpart
+BUFFER_DTYPES = ('int8', 'uint8', 'int16', 'uint16', 'int32', 'uint32',
+                 'float32', 'float64')
+
+
+class JSONBuffer(object):
+    """Wrap a JSON serializable object to send it as a binary buffer.
+
+    The object is encoded once as compact UTF-8 JSON and skipped when
+    walking the message for other buffers. This is intended for large,
+    deeply nested payloads such as GeoJSON feature collections.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def encode(self):
+        return json.dumps(self.obj, separators=(',', ':')).encode('utf-8')
+
+
+class Buffers(object):
+    """Mark a JSON-RPC value as containing nested binary payloads.
+
+    The value is walked for NumPy arrays,  bytes and JSONBuffer objects
+    and each of them is moved to a binary buffer.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+
+
+def _is_ndarray(obj):
+    # Avoid importing numpy,  if it hasn't been imported nothing is an array
+    np = sys.modules.get('numpy')
+    return np is not None and isinstance(obj, np.ndarray)
+
+
+def _encode_ndarray(arr, buffers):
+    import numpy as np
+
+    if arr.dtype == np.bool_:
+        arr = arr.astype(np.uint8)
+    elif arr.dtype.kind in 'iu' and arr.dtype.name not in BUFFER_DTYPES:
+        # javascript has no 64 bit integer arrays
+        arr = arr.astype(np.float64)
+
+    if arr.nbytes < BUFFER_THRESHOLD or arr.dtype.name not in BUFFER_DTYPES:
+        return arr.tolist()
+
+    # Buffers are always C contiguous and little endian
+    arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+    buffers.append(arr.data)
+
+    return {'$buffer': len(buffers) - 1, 'encoding': 'ndarray',
+            'dtype': arr.dtype.name, 'shape': list(arr.shape)}
+
+
+def _encode(obj, buffers):
+    if isinstance(obj, dict):
+        return {k: _encode(v, buffers) for k, v in six.iteritems(obj)}
+    elif isinstance(obj, (list, tuple)):
+        return [_encode(v, buffers) for v in obj]
+    elif _is_ndarray(obj):
+        return _encode_ndarray(obj, buffers)
+    elif isinstance(obj, JSONBuffer):
+        buffers.append(obj.encode())
+        return {'$buffer': len(buffers) - 1, 'encoding': 'json'}
+    elif isinstance(obj, (bytearray, memoryview)) or \
+            (six.PY3 and isinstance(obj, bytes)):
+        buffers.append(obj)
+        return {'$buffer': len(buffers) - 1, 'encoding': 'raw'}
+
+    return obj
+
+
+def _is_payload(obj):
+    return isinstance(obj, (JSONBuffer, bytearray, memoryview)) or \
+        (six.PY3 and isinstance(obj, bytes)) or _is_ndarray(obj)
+
+
+def _encode_value(value, buffers):
+    """Encode a single param or result value,  see Buffers."""
+    if isinstance(value, Buffers):
+        return _encode(value.obj, buffers)
+    elif _is_payload(value):
+        return _encode(value, buffers)
+
+    return value
+
+
+def _encode_params(params, buffers):
+    if isinstance(params, dict):
+        return {k: _encode_value(v, buffers)
+                for k, v in six.iteritems(params)}
+    elif not isinstance(params, (list, tuple)):
+        return params
+
+    encoded = []
+    for param in params:
+        # Remote calls send params as {'key': ..., 'value': ...}
+        if isinstance(param, dict) and 'value' in param:
+            value = _encode_value(param['value'], buffers)
+            if value is not param['value']:
+                param = dict(param, value=value)
+        else:
+            param = _encode_value(param, buffers)
+
+        encoded.append(param)
+
+    return encoded
+
+
+def encode_buffers(msg):
+    """Move large payloads in a message into binary buffers.
+
+    Only the message's params and result are looked at,  without walking
+    into values that aren't wrapped in Buffers.
+
+    :param msg: A JSON-RPC message,  or a list of messages
+    :returns: The message with references to the buffers,  and the buffers
+    :rtype: tuple
+    """
+    buffers = []
+
+    def _encode_msg(m):
+        if not isinstance(m, dict):
+            return m
+
+        m = dict(m)
+        if 'params' in m:
+            m['params'] = _encode_params(m['params'], buffers)
+        if 'result' in m:
+            m['result'] = _encode_value(m['result'], buffers)
+
+        return m
+
+    if isinstance(msg, list):
+        msg = [_encode_msg(m) for m in msg]
+    else:
+        msg = _encode_msg(msg)
+
+    return msg, buffers
+
+
+def _is_buffer_ref(obj):
+    return isinstance(obj, dict) and '$buffer' in obj
+
+
+def _decode(obj, buffers):
+    if _is_buffer_ref(obj):
+        buf = buffers[obj['$buffer']]
+        encoding = obj.get('encoding', 'raw')
+
+        if encoding == 'ndarray':
+            import numpy as np
+
+            dtype = np.dtype(obj['dtype']).newbyteorder('<')
+            return np.frombuffer(buf, dtype=dtype).reshape(obj['shape'])
+        elif encoding == 'json':
+            return json.loads(bytes(buf).decode('utf-8'))
+
+        return bytes(buf)
+
+    elif isinstance(obj, dict):
+        return {k: _decode(v, buffers) for k, v in six.iteritems(obj)}
+    elif isinstance(obj, list):
+        return [_decode(v, buffers) for v in obj]
+
+    return obj
+
+
+def decode_buffers(msg, buffers):
+    """Replace buffer references in a message with their payloads.
+
+    :param msg: A JSON-RPC message,  or a list of messages
+    :param buffers: The buffers of the comm message
+    :returns: The decoded message
+    """
+    if not buffers:
+        return msg
+
+    return _decode(msg, buffers)
@@ -1,15 +1,25 @@
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from inspect import getargspec, getmembers, isfunction, ismethod
+import logging
+import time
 from types import MethodType
 
 from ipykernel.ipkernel import IPythonKernel
 from promise import Promise
+import six
+from tornado.ioloop import PeriodicCallback
 
 from . import jsonrpc
 from .config import Config
-from .jsonrpc import (is_request,
+from .jsonrpc import (decode_buffers,
+                      encode_buffers,
+                      is_request,
                       is_response,
                       json_rpc_request,
-                      json_rpc_result)
+                      json_rpc_result,
+                      JSONBuffer)
 
 from .layers import (AnnotationLayer,
                      GeonotebookLayerCollection,
@@ -19,7 +29,27 @@ from .layers import (AnnotationLayer,
                      VectorLayer)
 
 from .utils import get_kernel_id
-from .wrappers import RasterData, RasterDataCollection, VectorData
+
+
+class _PendingCall(object):
+    __slots__ = ('procedure', 'msg', 'deadline', 'sent')
+
+    def __init__(self, procedure, msg, deadline):
+        self.procedure = procedure
+        self.msg = msg
+        self.deadline = deadline
+        # Time the message was sent,  None while the call is queued
+        self.sent = None
+
+
+def _percentiles(samples, percentiles=(50, 90, 99)):
+    """Nearest rank percentiles of a sequence of samples."""
+    samples = sorted(samples)
+    return {
+        'p{}'.format(p): samples[max(0, -(-p * len(samples) // 100) - 1)]
+        if samples else None
+        for p in percentiles
+    }
 
 
 class Remote(object):
@@ -30,8 +60,34 @@ class Remote(object):
     which manage the reply and error callbacks of a remote proceedure call.
     Remote defines a '_promises' variable which is a dict of message id's to
     Promises.
+
+    Calls made inside a 'batch' context are queued and sent together as a
+    single JSON-RPC batch request once the context exits.
+
+    Promises are removed once they are resolved. Calls that receive no
+    reply within their timeout are rejected with a RequestTimeout error
+    (see 'expire').  At most 'max_pending' calls are awaiting a reply at
+    any time,  further calls are queued and sent as replies come in. Once
+    'max_queued' calls are queued new calls are rejected straight away
+    with a TooManyRequests error.
     """
 
+    log = logging.getLogger(__name__)
+
+    # Seconds to wait for a reply (see 'remote_timeout' in geonotebook.ini).
+    # Individual calls can override this with a '_timeout' keyword
+    # argument,  None waits forever.
+    default_timeout = 60
+
+    # Maximum number of calls awaiting a reply from the remote
+    max_pending = 256
+
+    # Maximum number of calls waiting for a reply to make room for them
+    max_queued = 1024
+
+    # Number of round trip times kept per procedure for stats()
+    latency_samples = 1000
+
     def validate(self, protocol, *args, **kwargs):
         """Validate a protocol definition.
 
@@ -102,6 +158,8 @@ class Remote(object):
                     protocol['procedure'], arg)
 
         def _protocol_closure(self, *args, **kwargs):
+            timeout = kwargs.pop('_timeout', self.default_timeout)
+
             try:
                 self.validate(protocol, *args, **kwargs)
             except Exception as e:
@@ -124,15 +182,145 @@ class Remote(object):
             # Create the message
             msg = json_rpc_request(protocol['procedure'], params)
 
+            # Reject calls that outlived their timeout first
+            self.expire()
+
+            if len(self._in_flight) >= self.max_pending and \
+               len(self._queued) >= self.max_queued:
+                self._counts[protocol['procedure']]['rejected'] += 1
+                promise = Promise()
+                promise.reject(jsonrpc.TooManyRequests(
+                    "{} calls are already waiting to be sent".format(
+                        len(self._queued))))
+                return promise
+
             # Set up the callback
-            self._promises[msg['id']] = Promise()
-            self._send_msg(msg)
+            promise = self._promises[msg['id']] = Promise()
+            self._calls[msg['id']] = _PendingCall(
+                protocol['procedure'], msg,
+                None if timeout is None else time.time() + timeout)
+            self._counts[protocol['procedure']]['calls'] += 1
+
+            self._dispatch(msg['id'])
 
             # return the callback
-            return self._promises[msg['id']]
+            return promise
 
         return MethodType(_protocol_closure, self)
 
+    def _dispatch(self, msg_id):
+        """Send a call,  or queue it if too many calls are pending."""
+        call = self._calls[msg_id]
+
+        if len(self._in_flight) >= self.max_pending:
+            self._queued[msg_id] = call
+            return
+
+        self._in_flight.add(msg_id)
+
+        if self._batch is not None:
+            # Sent when the batch is flushed
+            self._batch.append(msg_id)
+        else:
+            call.sent = time.time()
+            self._send_msg(call.msg)
+
+    def _drain(self):
+        """Send queued calls while there is room for them."""
+        while self._queued and len(self._in_flight) < self.max_pending:
+            msg_id, _ = self._queued.popitem(last=False)
+            self._dispatch(msg_id)
+
+    def _finish(self, msg_id):
+        """Remove a call from the promise table."""
+        self._in_flight.discard(msg_id)
+        self._queued.pop(msg_id, None)
+
+        return self._promises.pop(msg_id), self._calls.pop(msg_id)
+
+    def expire(self, now=None):
+        """Reject all calls whose timeout has passed.
+
+        This is called before every new call,  the kernel also calls it
+        periodically so that calls time out even if nothing else happens.
+
+        :returns: The number of calls that timed out
+        :rtype: int
+        """
+        now = time.time() if now is None else now
+
+        expired = [msg_id for msg_id, call in self._calls.items()
+                   if call.deadline is not None and call.deadline <= now]
+
+        for msg_id in expired:
+            promise, call = self._finish(msg_id)
+            self._counts[call.procedure]['timeouts'] += 1
+            promise.reject(jsonrpc.RequestTimeout(
+                "{} did not reply in time".format(call.procedure)))
+
+        if expired:
+            self._drain()
+
+        return len(expired)
+
+    def stats(self):
+        """Report pending calls and round trip latencies per procedure.
+
+        Latency percentiles are in seconds and are computed over the
+        most recent replies of each procedure.
+
+        :returns: JSON serializable dictionary
+        :rtype: dict
+        """
+        pending = defaultdict(int)
+        for call in self._calls.values():
+            pending[call.procedure] += 1
+
+        procedures = {}
+        for procedure, counts in self._counts.items():
+            procedures[procedure] = dict(counts, pending=pending[procedure])
+            procedures[procedure].update(
+                _percentiles(self._latencies[procedure]))
+
+        return {
+            'pending': len(self._in_flight),
+            'queued': len(self._queued),
+            'procedures': procedures
+        }
+
+    @contextmanager
+    def batch(self):
+        """Queue calls and send them as a single JSON-RPC batch.
+
+        Each queued call still returns its own Promise which is resolved
+        with its own result once the batched response arrives. e.g:
+
+        with Geonotebook._remote.batch():
+            Geonotebook._remote.remove_layer('foo').then(handle_reply)
+            Geonotebook._remote.remove_layer('bar').then(handle_reply)
+
+        Nested batch contexts are merged into the outermost batch.
+        """
+        if self._batch is not None:
+            yield self
+            return
+
+        self._batch = []
+        try:
+            yield self
+        finally:
+            # Always flush,  otherwise the queued Promises never resolve
+            batch, self._batch = self._batch, None
+
+            # Leave out calls that timed out while the batch was open
+            calls = [self._calls[msg_id] for msg_id in batch
+                     if msg_id in self._calls]
+            if calls:
+                now = time.time()
+                for call in calls:
+                    call.sent = now
+                self._send_msg([call.msg for call in calls])
+
     def resolve(self, msg):
         """Resolve an open JSONRPC request.
 
@@ -145,27 +333,52 @@ class Remote(object):
 
         """
         if msg['id'] in self._promises:
+            promise, call = self._finish(msg['id'])
+
+            if call.sent is not None:
+                self._latencies[call.procedure].append(
+                    time.time() - call.sent)
+
             try:
                 if msg['error'] is not None:
-                    self._promises[msg['id']].reject(Exception(msg['error']))
+                    self._counts[call.procedure]['errors'] += 1
+                    promise.reject(Exception(msg['error']))
                 else:
-                    self._promises[msg['id']].fulfill(msg['result'])
+                    promise.fulfill(msg['result'])
 
-            except Exception as e:
-                raise e
+            finally:
+                self._drain()
         else:
+            # e.g. a late reply to a call that has timed out
             self.log.warn("Could not find promise with id %s" % msg['id'])
 
-    def __init__(self, transport, protocol):
+    def __init__(self, transport, protocol, default_timeout=None,
+                 max_pending=None):
         """Initialize the Remote object.
 
         :param transport: function that takes a JSONRPC request message
         :param protocol: A list of protocol definitions for remote functions
+        :param default_timeout: Overrides Remote.default_timeout
+        :param max_pending: Overrides Remote.max_pending
         :returns: Nothing
         :rtype: None
 
         """
+        if default_timeout is not None:
+            self.default_timeout = default_timeout
+        if max_pending is not None:
+            self.max_pending = max_pending
+
         self._promises = {}
+        self._calls = {}
+        self._in_flight = set()
+        self._queued = OrderedDict()
+        self._counts = defaultdict(
+            lambda: {'calls': 0, 'errors': 0, 'timeouts': 0, 'rejected': 0})
+        self._latencies = defaultdict(
+            lambda: deque(maxlen=self.latency_samples))
+
+        self._batch = None
         self._send_msg = transport
         self.protocol = protocol
 
@@ -178,11 +391,16 @@ class Remote(object):
 
 class Geonotebook(object):
     msg_types = ['get_protocol', 'set_center', 'add_annotation_from_client',
-                 'get_map_state']
+                 'get_map_state', 'get_vector_data']
 
     _protocol = None
     _remote = None
 
+    # Background executor shared by all notebooks for ingesting the
+    # layers passed to add_layers in parallel.
+    _ingest_executor = None
+    ingest_workers = 4
+
     @classmethod
     def class_protocol(cls):
         """Initialize the RPC protocol description.
@@ -235,14 +453,18 @@ class Geonotebook(object):
     def _send_msg(self, msg):
         """Send a message to the client.
 
-        'msg' should be a well formed RPC message.
+        'msg' should be a well formed RPC message.  Large payloads
+        (NumPy arrays,  bytes and JSONBuffer objects passed as params or
+        results) are sent as binary comm buffers,  see
+        jsonrpc.encode_buffers.
 
         :param msg: The RPC message
         :returns: Nothing
         :rtype: None
 
         """
-        self._kernel.comm.send(msg)
+        msg, buffers = encode_buffers(msg)
+        self._kernel.comm.send(msg, buffers=buffers or None)
 
     def _reconcile_parameters(self, method, params):
         param_hash = {p['key']: p for p in params}
@@ -265,38 +487,102 @@ class Geonotebook(object):
 
         return args, kwargs
 
+    def _handle_request(self, msg):
+        """Call the method requested by an RPC request message.
+
+        :param msg: An RPC request message
+        :returns: The RPC result message
+        :rtype: dict
+
+        """
+        method, params = msg['method'], msg['params']
+        if method in self._protocol.keys():
+            try:
+                args, kwargs = self._reconcile_parameters(method, params)
+
+                result = getattr(self, method)(*args, **kwargs)
+                return json_rpc_result(result, None, msg['id'])
+            except Exception as e:
+                if isinstance(e, jsonrpc.JSONRPCError):
+                    raise e
+                else:
+                    raise jsonrpc.ServerError(str(e))
+        else:
+            raise jsonrpc.MethodNotFound("Method not allowed")
+
+    def _recv_batch(self, batch):
+        """Recieve a JSON-RPC batch of messages from the client.
+
+        Responses in the batch are resolved,  requests are processed and
+        replied to with a single batch of results.
+
+        :param batch: A list of RPC messages
+        :returns: Nothing
+        :rtype: None
+
+        """
+        if not batch:
+            raise jsonrpc.InvalidRequest("Empty batch")
+
+        results = []
+        for msg in batch:
+            if not isinstance(msg, dict):
+                results.append(json_rpc_result(None, jsonrpc.InvalidRequest(
+                    "Invalid batch item: %s" % msg).tojson(), None))
+
+            elif is_response(msg):
+                self._remote.resolve(msg)
+
+            else:
+                try:
+                    if not is_request(msg):
+                        raise jsonrpc.ParseError(
+                            "Could not parse msg: %s" % msg)
+
+                    results.append(self._handle_request(msg))
+
+                except jsonrpc.JSONRPCError as e:
+                    results.append(json_rpc_result(
+                        None, e.tojson(), msg.get('id')))
+
+        if results:
+            self._send_msg(results)
+
     def _recv_msg(self, msg):
         """Recieve an RPC message from the client.
 
-        :param msg: An RPC message
+        :param msg: An RPC message,  or a list of messages for a batch
         :returns: Nothing
         :rtype: None
 
         """
+        if isinstance(msg, list):
+            self._recv_batch(msg)
+
         # If this is a response,  pass it along to the Remote object to be
         # processesd by the correct reply/error handler
-        if is_response(msg):
+        elif is_response(msg):
             self._remote.resolve(msg)
 
         # Otherwise process the request from the remote RPC client.
         elif is_request(msg):
-            method, params = msg['method'], msg['params']
-            if method in self._protocol.keys():
-                try:
-                    args, kwargs = self._reconcile_parameters(method, params)
-
-                    result = getattr(self, method)(*args, **kwargs)
-                    self._send_msg(json_rpc_result(result, None, msg['id']))
-                except Exception as e:
-                    if isinstance(e, jsonrpc.JSONRPCError):
-                        raise e
-                    else:
-                        raise jsonrpc.ServerError(str(e))
-            else:
-                raise jsonrpc.MethodNotFound("Method not allowed")
+            self._send_msg(self._handle_request(msg))
         else:
             raise jsonrpc.ParseError("Could not parse msg: %s" % msg)
 
+    def batch(self):
+        """Send the map operations made inside the context as one batch.
+
+        e.g:
+
+        with M.batch():
+            for path in paths:
+                M.add_layer(RasterData(path))
+
+        :returns: A context manager
+        """
+        return self._remote.batch()
+
     @property
     def log(self):
         return self._kernel.log
@@ -378,9 +664,50 @@ class Geonotebook(object):
         :param data:
         :param name:
         :param vis_url:
-        :returns:
-        :rtype:
+        :returns: A promise,  resolved with the added layer
+        :rtype: Promise
         """
+        return self._send_layer(
+            self._create_layer(data, name=name, vis_url=vis_url, **kwargs))
+
+    def add_layers(self, layers, **kwargs):
+        """Add several layers,  ingesting their data in parallel.
+
+        The vis_server ingests the layers on background threads,  once
+        they are all ingested they are added to the map with a single batch
+        of remote calls. e.g:
+
+        M.add_layers([RasterData(path) for path in paths])
+
+        :param layers: Data objects,  or dictionaries of add_layer arguments
+        :param kwargs: Arguments passed to add_layer for every layer
+        :returns: A promise per layer,  resolved with the added layer
+        :rtype: list
+        """
+        if Geonotebook._ingest_executor is None:
+            Geonotebook._ingest_executor = ThreadPoolExecutor(
+                max_workers=self.ingest_workers)
+
+        # Reserve z-indexes up front,  layers may finish in any order
+        z_index = len(self.layers)
+
+        futures = []
+        for i, layer in enumerate(layers):
+            args = dict(kwargs, zIndex=z_index + i)
+            args.update(layer if isinstance(layer, dict) else {'data': layer})
+
+            futures.append(Geonotebook._ingest_executor.submit(
+                self._create_layer, **args))
+
+        # Ingest errors are raised here,  as they are from add_layer
+        created = [future.result() for future in futures]
+
+        # Remote calls are only ever made from the calling (shell) thread
+        with self._remote.batch():
+            return [self._send_layer(layer) for layer in created]
+
+    def _create_layer(self, data, name=None, vis_url=None, **kwargs):
+        """Create a layer,  ingesting its data in the vis_server."""
         # Make sure we pass in kernel_id to the layer,  then to the vis_server
         # Otherwise we cant generate the coorect vis_url.
 
@@ -389,7 +716,14 @@ class Geonotebook(object):
         kwargs['kernel_id'] = self.kernel_id
 
         if layer_type != 'annotation':
-            kwargs['zIndex'] = len(self.layers)
+            kwargs.setdefault('zIndex', len(self.layers))
+
+        # The wrappers import rasterio,  fiona and shapely,  layers without
+        # data (e.g. the base map) shouldn't have to.
+        if data is not None:
+            from .wrappers import RasterData, RasterDataCollection, VectorData
+        else:
+            RasterData = RasterDataCollection = VectorData = ()
 
         # HACK:  figure out a way to do this without so many conditionals
         if isinstance(data, RasterData):
@@ -408,7 +742,8 @@ class Geonotebook(object):
             )
         elif isinstance(data, VectorData):
             layer = VectorLayer(
-                name, self._remote, self.layers, data=data, **kwargs
+                name, self._remote, self.layers, data=data, vis_url=vis_url,
+                **kwargs
             )
         else:
             assert name is not None, \
@@ -422,10 +757,20 @@ class Geonotebook(object):
                     name, self._remote, vis_url=vis_url, **kwargs
                 )
 
+        return layer
+
+    def _send_layer(self, layer):
+        """Add a created layer to the map."""
         def _add_layer(layer_name):
             self.layers.append(layer)
+            return layer
 
-        return self._remote.add_layer(layer.name, layer.vis_url,
+        vis_url = layer.vis_url
+        # Inlined vector data is sent as a binary buffer
+        if not isinstance(vis_url, six.string_types) and vis_url is not None:
+            vis_url = JSONBuffer(vis_url)
+
+        return self._remote.add_layer(layer.name, vis_url,
                                       layer.vis_options.serialize(),
                                       layer.query_params) \
                            .then(_add_layer, self.rpc_error) \
@@ -470,6 +815,18 @@ class Geonotebook(object):
             self.rpc_error
         ).catch(self.callback_error)
 
+    def get_vector_data(self, layer_name, zoom=None):
+        """Get a vector layer's features simplified for a zoom level.
+
+        This method is not intended to be called by the user.  It is
+        called by the client when the map zoom changes to fetch features
+        at the resolution it needs.
+        """
+        layer = self.layers[layer_name]
+        layer.zoom = zoom
+
+        return JSONBuffer(layer.payload(zoom))
+
     def add_annotation_from_client(self, ann_type, coords, meta):
         """Add an existing annotation to the map state.
 
@@ -482,6 +839,9 @@ class Geonotebook(object):
 
 
 class GeonotebookKernel(IPythonKernel):
+    # Milliseconds between checks for timed out remote calls
+    EXPIRE_INTERVAL = 1000
+
     def _unwrap(self, msg):
         """Unwrap a Comm message.
 
@@ -503,12 +863,15 @@ class GeonotebookKernel(IPythonKernel):
         msg = self._unwrap(message)
 
         try:
+            # Replace references to binary buffers with their payloads
+            msg = decode_buffers(msg, message.get('buffers'))
+
             self.geonotebook._recv_msg(msg)
 
         except jsonrpc.JSONRPCError as e:
-            self.geonotebook._send_msg(
-                json_rpc_result(None, e.tojson(), msg['id'])
-            )
+            self.geonotebook._send_msg(json_rpc_result(
+                None, e.tojson(),
+                msg.get('id') if isinstance(msg, dict) else None))
             self.log.error(u"JSONRPCError (%s): %s" % (e.code, e.message))
 
         except Exception as e:
@@ -526,7 +889,15 @@ class GeonotebookKernel(IPythonKernel):
         self.comm.on_msg(self.handle_comm_msg)
 
         # TODO: Check if the msg is empty - no protocol - die
-        self.geonotebook._remote = Remote(self.comm.send, self._unwrap(msg))
+        self.geonotebook._remote = Remote(
+            self.geonotebook._send_msg, self._unwrap(msg),
+            default_timeout=Config().remote_timeout)
+
+        # Periodically reject calls the client never replied to
+        self._stop_expire_callback()
+        self._expire_callback = PeriodicCallback(
+            self.geonotebook._remote.expire, self.EXPIRE_INTERVAL)
+        self._expire_callback.start()
         # Reply to the open comm,  this should probably be set up on
         # self.geonotebook._remote as an actual proceedure call
 
@@ -552,7 +923,13 @@ class GeonotebookKernel(IPythonKernel):
 
             self.initializing = False
 
+    def _stop_expire_callback(self):
+        if self._expire_callback is not None:
+            self._expire_callback.stop()
+            self._expire_callback = None
+
     def do_shutdown(self, restart):
+        self._stop_expire_callback()
         self.geonotebook = None
 
         super(GeonotebookKernel, self).do_shutdown(restart)
@@ -577,6 +954,7 @@ class GeonotebookKernel(IPythonKernel):
     def __init__(self, **kwargs):
         self.log = kwargs['log']
         self.initializing = True
+        self._expire_callback = None
 
         super(GeonotebookKernel, self).__init__(**kwargs)
 
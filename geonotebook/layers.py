@@ -1,11 +1,11 @@
 from collections import namedtuple
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import sys
 
 import six
 
-from . import annotations
 from .config import Config
 
 from .vis.utils import discrete_colors, RasterStyleOptions, \
@@ -66,10 +66,12 @@ class GeonotebookLayer(object):
 
 
 class AnnotationLayer(GeonotebookLayer):
+    # Names of the annotation classes,  the annotations module (and with it
+    # shapely and rasterio) is only imported once an annotation is added.
     _annotation_types = {
-        "point": annotations.Point,
-        "rectangle": annotations.Rectangle,
-        "polygon": annotations.Polygon
+        "point": "Point",
+        "rectangle": "Rectangle",
+        "polygon": "Polygon"
     }
 
     def serialize(self):
@@ -89,31 +91,61 @@ class AnnotationLayer(GeonotebookLayer):
         self.layer_collection = layer_collection
         self._remote = remote
         self.vis_url = None
+        self._reset_annotations()
+
+    def _reset_annotations(self):
         self._annotations = []
+        # Annotations by type,  and a spatial index over all of them
+        self._typed_annotations = {t: [] for t in self._annotation_types}
+        # Created with the first annotation
+        self._spatial_index = None
+
+    def _annotation_class(self, ann_type):
+        from . import annotations
+        return getattr(annotations, self._annotation_types[ann_type])
 
     def add_annotation(self, ann_type, coords, meta):
         if ann_type == 'point':
             meta['layer'] = self
 
-            self._annotations.append(
-                self._annotation_types[ann_type](coords, **meta))
+            annotation = self._annotation_class(ann_type)(coords, **meta)
         elif ann_type in self._annotation_types.keys():
             meta['layer'] = self
 
             holes = meta.pop('holes', None)
 
-            self._annotations.append(
-                self._annotation_types[ann_type](coords, holes, **meta))
+            annotation = self._annotation_class(ann_type)(
+                coords, holes, **meta)
         else:
             raise RuntimeError("Cannot add annotation of type %s" % ann_type)
 
+        if self._spatial_index is None:
+            from .spatial import SpatialIndex
+            self._spatial_index = SpatialIndex()
+
+        self._annotations.append(annotation)
+        self._typed_annotations[ann_type].append(annotation)
+        self._spatial_index.add(annotation)
+
+    def intersecting(self, geometry):
+        """Annotations intersecting a geometry, bbox or (x, y) point."""
+        if self._spatial_index is None:
+            return []
+        return self._spatial_index.intersects(geometry)
+
+    def containing(self, geometry):
+        """Annotations containing a geometry or (x, y) point."""
+        if self._spatial_index is None:
+            return []
+        return self._spatial_index.contains(geometry)
+
     def clear_annotations(self):
         # clear_annotations on _remote returns the
         # number of annotations that were cleared.
         # this isn't currently used inside the callback
         # but that is the signature of the function.
         def _clear_annotations(num):
-            self._annotations = []
+            self._reset_annotations()
             return True
 
         def rpc_error(error):
@@ -128,20 +160,18 @@ class AnnotationLayer(GeonotebookLayer):
             _clear_annotations, rpc_error
         ).catch(callback_error)
 
+    # NB: These return the layer's own lists,  they should not be modified
     @property
     def points(self):
-        return [a for a in self._annotations
-                if type(a) == self._annotation_types['point']]
+        return self._typed_annotations['point']
 
     @property
     def rectangles(self):
-        return [a for a in self._annotations
-                if type(a) == self._annotation_types['rectangle']]
+        return self._typed_annotations['rectangle']
 
     @property
     def polygons(self):
-        return [a for a in self._annotations
-                if type(a) == self._annotation_types['polygon']]
+        return self._typed_annotations['polygon']
 
 
 class NoDataLayer(GeonotebookLayer):
@@ -183,7 +213,8 @@ class VectorLayer(GeonotebookLayer):
 
     StyleOptions = VectorStyleOptions
 
-    def __init__(self, name, remote, layer_collection, data, **kwargs):
+    def __init__(self, name, remote, layer_collection, data, vis_url=None,
+                 tiled=False, zoom=None, quantization=None, **kwargs):
         # Here we are storing a reference to the layer collection itself.
         # This is done to maintain API compatibility between annotation objects
         # and vector data objects.  For example, to subset all layers from a
@@ -209,19 +240,46 @@ class VectorLayer(GeonotebookLayer):
         elif 'colormap' in kwargs:  # a matplotlib colormap
             kwargs['colors'] = discrete_colors(kwargs['colormap'], len(data))
 
+        # Tiled layers are served as Mapbox Vector Tiles by the vis_server
+        # rather than sending the whole feature collection to the client.
+        if tiled:
+            kwargs['layer_type'] = 'vector_tile'
+
         name = name or data.reader.name
         data.layer = self
         super(VectorLayer, self).__init__(name, remote, data, **kwargs)
         self.data = data
 
-    # In the future, we want to serve this data as vector tiles rather
-    # than dumping the data directly to the client.  This will match
-    # the existing interface for Raster datasets.  Until we can transition
-    # fully to tiled vector features, we are abusing the interface by
-    # passing the actual data in place of the visualization url.
+        if tiled and vis_url is None:
+            vis_url = self.config.vis_server.ingest(
+                self.data, name=self.name, kernel_id=kwargs.get('kernel_id'))
+
+        self._vis_url = vis_url
+
+        # Zoom level and grid size used for 'topojson' encoded layers,
+        # the client updates the zoom through get_vector_data.
+        self.zoom = zoom
+        self.quantization = quantization
+
+    def payload(self, zoom=None):
+        """The layer's features in the encoding given by its vis_options.
+
+        :param zoom: The map zoom level the features are simplified for
+        """
+        if self.vis_options.encoding == 'topojson':
+            return self.data.topojson(zoom=zoom,
+                                      quantization=self.quantization)
+
+        return self.data.geojson
+
+    # Untiled layers abuse the interface by passing the actual data in
+    # place of the visualization url.
     @property
     def vis_url(self):
-        return self.data.geojson
+        if self._vis_url is not None:
+            return self._vis_url
+
+        return self.payload(self.zoom)
 
 
 class SimpleLayer(DataLayer):
@@ -252,18 +310,31 @@ class SimpleLayer(DataLayer):
 
 
 class TimeSeriesLayer(DataLayer):
-    def __init__(self, name, remote, data, vis_url=None, **kwargs):
+    # Background executor shared by all time series layers for
+    # ingesting slices ahead of the cursor.
+    _prefetch_executor = None
+
+    def __init__(self, name, remote, data, vis_url=None, prefetch=0,
+                 **kwargs):
         super(TimeSeriesLayer, self).__init__(
             name, remote, data=data, vis_url=None, **kwargs
         )
         self.__cur = 0
         self._vis_urls = [None] * len(data)
 
+        # Number of slices on either side of the cursor to ingest
+        # in the background.
+        self.prefetch = prefetch
+        self._pending = {}
+
+        # The remote call made by the last forward/backward/idx
+        self.replacing = None
+
         self._remote = remote
 
         if vis_url is None:
-            self._vis_urls[0] = self.config.vis_server.ingest(
-                self.current, name=self.name, **self.vis_options.serialize())
+            self._vis_urls[0] = self._ingest(0)
+            self._prefetch(0)
 
     def __repr__(self):
         return "<{}('{}')>".format(
@@ -273,12 +344,15 @@ class TimeSeriesLayer(DataLayer):
     def vis_url(self):
         return self._vis_urls[self._cur]
 
-    @property
-    def name(self):
+    def _slice_name(self, idx):
         return "{}_{}_{}".format(
-            self._name, self.current.name,
+            self._name, self.data[idx].name,
             hash(self.vis_options) + sys.maxsize + 1)
 
+    @property
+    def name(self):
+        return self._slice_name(self._cur)
+
     @property
     def query_params(self):
         return self.config.vis_server.get_params(
@@ -303,17 +377,86 @@ class TimeSeriesLayer(DataLayer):
         self.__cur = value
 
         if self._vis_urls[value] is None:
-            self._vis_urls[value] = self.config.vis_server.ingest(
-                self.current, name=self.name, **self.vis_options.serialize())
+            future = self._pending.get(value)
+            if future is not None:
+                # Being prefetched,  wait for it rather than ingest twice.
+                # If the prefetch failed fall through and try again here.
+                try:
+                    future.result()
+                except Exception:
+                    pass
+
+        if self._vis_urls[value] is None:
+            self._vis_urls[value] = self._ingest(value)
+
+        self._prefetch(value)
+
+    def _ingest(self, idx):
+        return self.config.vis_server.ingest(
+            self.data[idx], name=self._slice_name(idx),
+            **self.vis_options.serialize())
+
+    def _ingest_slices(self, idxs):
+        vis_server = self.config.vis_server
+
+        try:
+            ingest_many = vis_server.ingest_many
+        except AttributeError:
+            for idx in idxs:
+                self._vis_urls[idx] = self._ingest(idx)
+        else:
+            urls = ingest_many(
+                [(self.data[idx], self._slice_name(idx)) for idx in idxs],
+                **self.vis_options.serialize())
+
+            for idx, url in zip(idxs, urls):
+                self._vis_urls[idx] = url
+
+    def _prefetch(self, idx):
+        """Ingest slices within self.prefetch of idx in the background."""
+        if not self.prefetch:
+            return
+
+        idxs = []
+        for i in range(max(idx - self.prefetch, 0),
+                       min(idx + self.prefetch + 1, len(self.data))):
+            # Finished prefetches are released from a worker thread
+            pending = self._pending.get(i)
+            if self._vis_urls[i] is None and \
+                    (pending is None or pending.done()):
+                idxs.append(i)
+
+        if not idxs:
+            return
+
+        if TimeSeriesLayer._prefetch_executor is None:
+            TimeSeriesLayer._prefetch_executor = ThreadPoolExecutor(
+                max_workers=2)
+
+        future = TimeSeriesLayer._prefetch_executor.submit(
+            self._ingest_slices, idxs)
+
+        for i in idxs:
+            self._pending[i] = future
+
+        future.add_done_callback(lambda f: self._release(idxs, f))
+
+    def _release(self, idxs, future):
+        """Forget a finished prefetch,  unless it was since superseded."""
+        for i in idxs:
+            if self._pending.get(i) is future:
+                self._pending.pop(i, None)
 
     def _replace_layer(self, idx):
         prev_name = self.name
 
         self._cur = idx
-        self._remote.replace_layer(prev_name, self.name, self.vis_url,
-                                   self.vis_options.serialize(),
-                                   self.query_params)\
-            .then(lambda: True, lambda: True)
+        # Kept so callers can chain on the replacement,  e.g:
+        # layer.forward(); layer.replacing.then(on_replaced)
+        self.replacing = self._remote.replace_layer(
+            prev_name, self.name, self.vis_url,
+            self.vis_options.serialize(), self.query_params)
+        self.replacing.then(lambda _: True, lambda _: True)
 
         return self.current
 
@@ -0,0 +1,126 @@
+import numpy as np
+from shapely.geometry import box
+from shapely.geometry import Point
+from shapely.prepared import prep
+
+try:
+    from shapely.strtree import STRtree
+except ImportError:
+    # STRtree is only available from shapely 1.6,  fall back to
+    # filtering bounding boxes with numpy.
+    STRtree = None
+
+
+def as_geometry(value):
+    """Convert a bbox (minx, miny, maxx, maxy) or (x, y) to a geometry."""
+    if hasattr(value, 'geom_type'):
+        return value
+
+    if len(value) == 4:
+        return box(*value)
+    elif len(value) == 2:
+        return Point(*value)
+
+    raise ValueError("Expected a geometry, a bounding box or a point")
+
+
+class SpatialIndex(object):
+    """A spatial index over shapely geometries.
+
+    Geometries can be added incrementally. The STRtree is immutable,  so
+    geometries added since it was built are kept in a pending tail that
+    queries filter by bounding box with numpy. The tree is only rebuilt
+    once the tail outgrows a quarter of the tree (and at least
+    rebuild_threshold geometries),  so adding n geometries one query at a
+    time costs O(n log n) overall rather than a rebuild per query. Without
+    STRtree (shapely < 1.6) every query filters all bounding boxes. Each
+    geometry can carry an arbitrary item (e.g. a feature) that is returned
+    from queries in its place.
+    """
+    rebuild_threshold = 64
+
+    def __init__(self, geometries=None, items=None):
+        self.clear()
+
+        if geometries is not None:
+            items = geometries if items is None else items
+            for geometry, item in zip(geometries, items):
+                self.add(geometry, item)
+
+    def __len__(self):
+        return len(self._geometries)
+
+    def add(self, geometry, item=None):
+        n = len(self._geometries)
+        if n == len(self._bounds):
+            # Grow the bounds array geometrically,  as a list would
+            bounds = np.empty((max(2 * n, 16), 4))
+            bounds[:n] = self._bounds
+            self._bounds = bounds
+
+        # Empty geometries have no bounds and never match a query
+        self._bounds[n] = geometry.bounds or (np.nan,) * 4
+        self._geometries.append(geometry)
+        self._items.append(geometry if item is None else item)
+
+    def clear(self):
+        self._geometries = []
+        self._items = []
+        self._prepared = {}
+        self._bounds = np.empty((0, 4))
+        # The tree indexes the first _indexed geometries
+        self._tree = None
+        self._ids = {}
+        self._indexed = 0
+
+    def _filter_bounds(self, geometry, start, stop):
+        """Indexes in [start, stop) whose bounding box intersects geometry."""
+        minx, miny, maxx, maxy = geometry.bounds
+        bounds = self._bounds[start:stop]
+
+        return (np.nonzero((bounds[:, 0] <= maxx) &
+                           (bounds[:, 2] >= minx) &
+                           (bounds[:, 1] <= maxy) &
+                           (bounds[:, 3] >= miny))[0] + start).tolist()
+
+    def _candidates(self, geometry):
+        """Indexes of geometries whose bounding box intersects geometry."""
+        n = len(self._geometries)
+
+        if STRtree is None:
+            return self._filter_bounds(geometry, 0, n)
+
+        if n - self._indexed > max(self.rebuild_threshold,
+                                   self._indexed // 4):
+            self._tree = STRtree(self._geometries)
+            self._ids = {id(g): i for i, g in enumerate(self._geometries)}
+            self._indexed = n
+
+        hits = []
+        if self._tree is not None:
+            # Shapely < 2 returns the geometries themselves
+            hits = [self._ids[id(h)] if hasattr(h, 'geom_type') else int(h)
+                    for h in self._tree.query(geometry)]
+
+        return hits + self._filter_bounds(geometry, self._indexed, n)
+
+    def _prepare(self, i):
+        try:
+            return self._prepared[i]
+        except KeyError:
+            return self._prepared.setdefault(i, prep(self._geometries[i]))
+
+    def intersects(self, value):
+        """Return the items intersecting a geometry,  bbox or point."""
+        geometry = as_geometry(value)
+        prepared = prep(geometry)
+
+        return [self._items[i] for i in sorted(self._candidates(geometry))
+                if prepared.intersects(self._geometries[i])]
+
+    def contains(self, value):
+        """Return the items that contain a geometry or point."""
+        geometry = as_geometry(value)
+
+        return [self._items[i] for i in sorted(self._candidates(geometry))
+                if self._prepare(i).contains(geometry)]
@@ -0,0 +1,378 @@
+"""Compact TopoJSON encoding of vector features.
+
+Coordinates are quantized onto an integer grid,  line and polygon
+boundaries are split into arcs that are shared between neighbouring
+features,  arcs are simplified (once,  so shared borders stay shared) to
+a tolerance usually derived from the map zoom level and finally delta
+encoded.
+
+See: https://github.com/topojson/topojson-specification
+"""
+import math
+
+# Size in pixels of a map tile,  used to derive the resolution of a zoom level
+TILE_SIZE = 256
+
+DEFAULT_QUANTIZATION = 10 ** 5
+
+# Name of the single GeometryCollection object in generated topologies
+OBJECT_NAME = 'features'
+
+
+def zoom_resolution(zoom, tile_size=TILE_SIZE):
+    """Size of a pixel at a web map zoom level in degrees of longitude."""
+    return 360.0 / (tile_size * 2 ** zoom)
+
+
+def _segment_distance(p, a, b):
+    """Squared distance from point p to the segment a-b."""
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    if dx == 0 and dy == 0:
+        return (p[0] - a[0]) ** 2 + (p[1] - a[1]) ** 2
+
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / float(dx * dx + dy * dy)
+    t = min(1.0, max(0.0, t))
+
+    return (p[0] - a[0] - t * dx) ** 2 + (p[1] - a[1] - t * dy) ** 2
+
+
+def simplify(points, tolerance):
+    """Douglas-Peucker simplification that always keeps the end points."""
+    if tolerance <= 0 or len(points) < 3:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    tolerance = tolerance * tolerance
+
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+
+        index, distance = None, tolerance
+        for i in range(first + 1, last):
+            d = _segment_distance(points[i], points[first], points[last])
+            if d > distance:
+                index, distance = i, d
+
+        if index is not None:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [p for p, k in zip(points, keep) if k]
+
+
+def _positions(geometry):
+    """Yield every position of a GeoJSON geometry."""
+    geom_type, coords = geometry['type'], geometry.get('coordinates')
+
+    if geom_type == 'Point':
+        yield coords
+    elif geom_type in ('MultiPoint', 'LineString'):
+        for c in coords:
+            yield c
+    elif geom_type in ('MultiLineString', 'Polygon'):
+        for part in coords:
+            for c in part:
+                yield c
+    elif geom_type == 'MultiPolygon':
+        for polygon in coords:
+            for ring in polygon:
+                for c in ring:
+                    yield c
+    elif geom_type == 'GeometryCollection':
+        for g in geometry['geometries']:
+            for c in _positions(g):
+                yield c
+
+
+def bounding_box(geometries):
+    xs, ys = [], []
+    for geometry in geometries:
+        if geometry is None:
+            continue
+        for c in _positions(geometry):
+            xs.append(c[0])
+            ys.append(c[1])
+
+    if not xs:
+        return (0.0, 0.0, 0.0, 0.0)
+
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+class Quantizer(object):
+    """Map coordinates onto a quantization x quantization integer grid."""
+
+    def __init__(self, bbox, quantization=DEFAULT_QUANTIZATION):
+        x0, y0, x1, y1 = bbox
+        self.quantization = int(quantization)
+        self.kx = float(x1 - x0) / (self.quantization - 1) or 1.0
+        self.ky = float(y1 - y0) / (self.quantization - 1) or 1.0
+        self.x0, self.y0 = x0, y0
+
+    @property
+    def transform(self):
+        return {'scale': [self.kx, self.ky],
+                'translate': [self.x0, self.y0]}
+
+    def point(self, coord):
+        return (int(round((coord[0] - self.x0) / self.kx)),
+                int(round((coord[1] - self.y0) / self.ky)))
+
+    def __call__(self, coords):
+        """Quantize a sequence of positions dropping repeated positions."""
+        out = []
+        for coord in coords:
+            point = self.point(coord)
+            if not out or out[-1] != point:
+                out.append(point)
+        return out
+
+
+class Topology(object):
+    """Build a TopoJSON topology from GeoJSON like features.
+
+    :param features: GeoJSON like features (mappings with a 'geometry'
+        and 'properties' and optionally an 'id')
+    :param quantization: Number of grid positions along each axis
+    :param tolerance: Simplification tolerance in coordinate units,
+        (e.g. degrees) zero or None disables simplification
+    """
+
+    def __init__(self, features, quantization=DEFAULT_QUANTIZATION,
+                 tolerance=None):
+        self.features = list(features)
+        self.bbox = bounding_box(f.get('geometry') for f in self.features)
+        self.quantizer = Quantizer(self.bbox, quantization)
+
+        self.tolerance = tolerance or 0
+
+        self._arcs = []
+        self._arc_index = {}
+
+    def _lines_and_rings(self, geometry):
+        geom_type, coords = geometry['type'], geometry.get('coordinates')
+
+        if geom_type == 'LineString':
+            return [coords], []
+        elif geom_type == 'MultiLineString':
+            return coords, []
+        elif geom_type == 'Polygon':
+            return [], coords
+        elif geom_type == 'MultiPolygon':
+            return [], [ring for polygon in coords for ring in polygon]
+        elif geom_type == 'GeometryCollection':
+            lines, rings = [], []
+            for g in geometry['geometries']:
+                l, r = self._lines_and_rings(g)
+                lines.extend(l)
+                rings.extend(r)
+            return lines, rings
+
+        return [], []
+
+    def _find_junctions(self):
+        """Positions where lines or rings meet, split or end."""
+        junctions = set()
+        neighbours = {}
+
+        def visit(point, previous, following):
+            pair = (min(previous, following), max(previous, following))
+            if neighbours.setdefault(point, pair) != pair:
+                junctions.add(point)
+
+        for feature in self.features:
+            geometry = feature.get('geometry')
+            if geometry is None:
+                continue
+
+            lines, rings = self._lines_and_rings(geometry)
+
+            for line in lines:
+                line = self.quantizer(line)
+                junctions.add(line[0])
+                junctions.add(line[-1])
+                for i in range(1, len(line) - 1):
+                    visit(line[i], line[i - 1], line[i + 1])
+
+            for ring in rings:
+                ring = self._ring(ring)
+                for i in range(len(ring)):
+                    visit(ring[i], ring[i - 1], ring[(i + 1) % len(ring)])
+
+        return junctions
+
+    def _ring(self, coords):
+        """Quantize a ring dropping its closing position."""
+        ring = self.quantizer(coords)
+        if len(ring) > 1 and ring[0] == ring[-1]:
+            ring.pop()
+        return ring
+
+    def _arc(self, points):
+        """Index of the (possibly reversed) arc through points."""
+        key = tuple(points)
+        try:
+            return self._arc_index[key]
+        except KeyError:
+            pass
+
+        try:
+            return ~self._arc_index[key[::-1]]
+        except KeyError:
+            self._arc_index[key] = len(self._arcs)
+            self._arcs.append(points)
+            return self._arc_index[key]
+
+    def _cut(self, points, junctions):
+        arcs, start = [], 0
+        for i in range(1, len(points)):
+            if points[i] in junctions or i == len(points) - 1:
+                arcs.append(self._arc(points[start:i + 1]))
+                start = i
+        return arcs
+
+    def _encode_line(self, coords, junctions):
+        line = self.quantizer(coords)
+        if len(line) < 2:
+            return None
+        return self._cut(line, junctions)
+
+    def _encode_ring(self, coords, junctions):
+        ring = self._ring(coords)
+        if len(ring) < 3:
+            return None
+
+        # Start the ring at a junction,  or at its smallest position if
+        # it doesn't touch anything so that identical rings share an arc.
+        starts = [i for i, p in enumerate(ring) if p in junctions]
+        start = starts[0] if starts else ring.index(min(ring))
+        ring = ring[start:] + ring[:start]
+
+        return self._cut(ring + ring[:1], junctions)
+
+    def _encode_geometry(self, geometry, junctions):
+        if geometry is None:
+            return {'type': None}
+
+        geom_type, coords = geometry['type'], geometry.get('coordinates')
+
+        if geom_type == 'Point':
+            return {'type': 'Point',
+                    'coordinates': list(self.quantizer.point(coords))}
+        elif geom_type == 'MultiPoint':
+            return {'type': 'MultiPoint',
+                    'coordinates': [list(self.quantizer.point(c))
+                                    for c in coords]}
+        elif geom_type == 'LineString':
+            arcs = self._encode_line(coords, junctions)
+            return {'type': 'LineString', 'arcs': arcs} \
+                if arcs else {'type': None}
+        elif geom_type == 'MultiLineString':
+            arcs = [a for a in (self._encode_line(c, junctions)
+                                for c in coords) if a]
+            return {'type': 'MultiLineString', 'arcs': arcs} \
+                if arcs else {'type': None}
+        elif geom_type == 'Polygon':
+            arcs = self._encode_polygon(coords, junctions)
+            return {'type': 'Polygon', 'arcs': arcs} \
+                if arcs else {'type': None}
+        elif geom_type == 'MultiPolygon':
+            arcs = [a for a in (self._encode_polygon(p, junctions)
+                                for p in coords) if a]
+            return {'type': 'MultiPolygon', 'arcs': arcs} \
+                if arcs else {'type': None}
+        elif geom_type == 'GeometryCollection':
+            return {'type': 'GeometryCollection',
+                    'geometries': [self._encode_geometry(g, junctions)
+                                   for g in geometry['geometries']]}
+
+        raise ValueError("Unknown geometry type {}".format(geom_type))
+
+    def _encode_polygon(self, rings, junctions):
+        exterior = self._encode_ring(rings[0], junctions) if rings else None
+        if exterior is None:
+            return None
+
+        return [exterior] + [a for a in (self._encode_ring(r, junctions)
+                                         for r in rings[1:]) if a]
+
+    def _simplify(self, arc):
+        # Measure distances in coordinate units,  the grid isn't square
+        kx, ky = self.quantizer.kx, self.quantizer.ky
+        points = [arc[i] for x, y, i in simplify(
+            [(x * kx, y * ky, i) for i, (x, y) in enumerate(arc)],
+            self.tolerance)]
+
+        # Don't collapse closed arcs (whole rings) below a triangle
+        if arc[0] == arc[-1] and len(points) < 4:
+            return arc
+
+        return points
+
+    @staticmethod
+    def _delta(arc):
+        x, y = arc[0]
+        out = [[x, y]]
+        for px, py in arc[1:]:
+            out.append([px - x, py - y])
+            x, y = px, py
+        return out
+
+    def serialize(self):
+        junctions = self._find_junctions()
+
+        geometries = []
+        for feature in self.features:
+            geometry = self._encode_geometry(feature.get('geometry'),
+                                             junctions)
+            geometry['properties'] = feature.get('properties') or {}
+            if feature.get('id') is not None:
+                geometry['id'] = feature['id']
+
+            geometries.append(geometry)
+
+        return {
+            'type': 'Topology',
+            'bbox': list(self.bbox),
+            'transform': self.quantizer.transform,
+            'objects': {
+                OBJECT_NAME: {
+                    'type': 'GeometryCollection',
+                    'geometries': geometries
+                }
+            },
+            'arcs': [self._delta(self._simplify(arc)) for arc in self._arcs]
+        }
+
+
+def topojson(features, zoom=None, quantization=None, tolerance=None):
+    """Encode features as TopoJSON suitable for display at a zoom level.
+
+    If a zoom level is given the features are simplified to the size of
+    a pixel at that zoom,  and unless quantization is given,  quantized
+    to a grid of half that size.
+
+    :param features: GeoJSON like features in geographic coordinates
+    :param zoom: The web map zoom level the features will be displayed at
+    :param quantization: Number of grid positions along each axis
+    :param tolerance: Simplification tolerance,  overrides zoom
+    :returns: A TopoJSON Topology
+    :rtype: dict
+    """
+    features = list(features)
+
+    if zoom is not None and tolerance is None:
+        tolerance = zoom_resolution(zoom)
+
+    if quantization is None:
+        quantization = DEFAULT_QUANTIZATION
+        if tolerance:
+            x0, y0, x1, y1 = bounding_box(f.get('geometry') for f in features)
+            extent = max(x1 - x0, y1 - y0)
+            quantization = int(min(quantization, max(
+                2, math.ceil(2 * extent / tolerance) + 1)))
+
+    return Topology(features, quantization, tolerance).serialize()
@@ -1,7 +1,7 @@
 import os
 
 import ipykernel
-from rasterio.warp import transform
+import six
 
 # Note:  There isn't a better way to do this? Maybe checking kernel against
 # keys/values in kernel_manager class?
@@ -15,5 +15,60 @@ def get_kernel_id(kernel):
     return connection_file.split('-', 1)[1].split('.')[0]
 
 
+def _crs_key(crs):
+    return crs.to_string() if hasattr(crs, 'to_string') else str(crs)
+
+
+class Transformer(object):
+    """Transform coordinate arrays from one CRS to another."""
+
+    def __init__(self, source_srs, target_srs):
+        self.source_srs = get_crs(source_srs)
+        self.target_srs = get_crs(target_srs)
+        # Nothing to reproject,  e.g. WGS84 annotations over WGS84 data
+        self.identity = self.source_srs == self.target_srs or \
+            _crs_key(self.source_srs) == _crs_key(self.target_srs)
+
+    def __call__(self, xs, ys):
+        """Transform all of xs, ys with a single call.
+
+        :returns: The transformed (xs, ys) lists
+        :rtype: tuple
+        """
+        if self.identity:
+            return list(xs), list(ys)
+
+        from rasterio.warp import transform
+
+        return transform(self.source_srs, self.target_srs, list(xs), list(ys))
+
+
+_crs_registry = {}
+_transformer_registry = {}
+
+
+def get_crs(crs):
+    """Return a (cached) CRS object for a CRS or a string like 'EPSG:4326'."""
+    if not isinstance(crs, six.string_types):
+        return crs
+
+    try:
+        return _crs_registry[crs]
+    except KeyError:
+        from rasterio.crs import CRS
+        return _crs_registry.setdefault(crs, CRS.from_string(crs))
+
+
+def get_transformer(source_srs, target_srs):
+    """Return a cached Transformer for a (source, target) CRS pair."""
+    key = (_crs_key(source_srs), _crs_key(target_srs))
+
+    try:
+        return _transformer_registry[key]
+    except KeyError:
+        return _transformer_registry.setdefault(
+            key, Transformer(source_srs, target_srs))
+
+
 def transform_coordinates(source_srs, target_srs, x, y):
-    return tuple(i[0] for i in transform(source_srs, target_srs, x, y))
+    return tuple(i[0] for i in get_transformer(source_srs, target_srs)(x, y))
@@ -1,7 +1,5 @@
-import requests
 from six.moves import range
 
-from geonotebook.wrappers import RasterData
 from .sld import (get_multiband_raster_sld,
                   get_single_band_raster_sld)
 
@@ -12,6 +10,10 @@ class Client(object):
         self.auth = {'auth': (username, password)}
 
     def _proxy(self, method, uri, *args, **kwargs):
+        # Only imported once the vis server is actually used
+        import requests
+
+        method = getattr(requests, method)
         kwargs.update(self.auth)
         if uri.startswith("http"):
             return method(uri, *args, **kwargs)
@@ -19,19 +21,19 @@ class Client(object):
             return method(self.base_url + uri, *args, **kwargs)
 
     def get(self, *args, **kwargs):
-        return self._proxy(requests.get, *args, **kwargs)
+        return self._proxy('get', *args, **kwargs)
 
     def put(self, *args, **kwargs):
-        return self._proxy(requests.put, *args, **kwargs)
+        return self._proxy('put', *args, **kwargs)
 
     def post(self, *args, **kwargs):
-        return self._proxy(requests.post, *args, **kwargs)
+        return self._proxy('post', *args, **kwargs)
 
     def delete(self, *args, **kwargs):
-        return self._proxy(requests.delete, *args, **kwargs)
+        return self._proxy('delete', *args, **kwargs)
 
     def head(self, *args, **kwargs):
-        return self._proxy(requests.head, *args, **kwargs)
+        return self._proxy('head', *args, **kwargs)
 
 
 class Geoserver(object):
@@ -211,6 +213,7 @@ class Geoserver(object):
     # destination Defined as apart of the vis_server config along with any
     # metadata Needed to geospatially reference the data on the remote system
     def ingest(self, data, name=None, **kwargs):
+        from geonotebook.wrappers import RasterData
 
         name = data.name if name is None else name
 
@@ -1,4 +1,3 @@
-from jinja2 import DictLoader, Environment
 
 
 MACRO_TEMPLATE = \
@@ -71,10 +70,22 @@ RASTER_DOCUMENT_TEMPLATE = \
     </NamedLayer>
 </StyledLayerDescriptor>"""
 
-SLDTemplates = Environment(loader=DictLoader({
-    "macros.xml": MACRO_TEMPLATE,
-    "raster_sld.xml": RASTER_DOCUMENT_TEMPLATE
-}))
+# The jinja2 environment,  created the first time a style is rendered
+SLDTemplates = None
+
+
+def _get_templates():
+    global SLDTemplates
+
+    if SLDTemplates is None:
+        from jinja2 import DictLoader, Environment
+
+        SLDTemplates = Environment(loader=DictLoader({
+            "macros.xml": MACRO_TEMPLATE,
+            "raster_sld.xml": RASTER_DOCUMENT_TEMPLATE
+        }))
+
+    return SLDTemplates
 
 
 def get_multiband_raster_sld(
@@ -131,7 +142,7 @@ def get_multiband_raster_sld(
     except TypeError:
         gamma = [gamma] * len(bands)
 
-    template = SLDTemplates.get_template("raster_sld.xml")
+    template = _get_templates().get_template("raster_sld.xml")
 
     template_params = {
         "title": title,
@@ -165,7 +176,7 @@ def get_single_band_raster_sld(
     assert(band > 0)
 
     # Get the raster template
-    template = SLDTemplates.get_template("raster_sld.xml")
+    template = _get_templates().get_template("raster_sld.xml")
 
     template_params = {
         "title": title,
@@ -1,4 +1,3 @@
-from .handler import KtileHandler
 from .ktile import Ktile
 
-__all__ = ("KtileHandler", "Ktile")
+__all__ = ("Ktile",)
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+import threading
+
+
+class TileCache(object):
+    """Memory bounded LRU cache of encoded tile responses.
+
+    Entries are keyed on (kernel_id, layer_name, z, x, y, extension,
+    style_hash) and hold the status code, headers and encoded bytes
+    returned by KTile's getTileResponse. Once the total size of the
+    cached content exceeds max_bytes the least recently used tiles
+    are evicted.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def __contains__(self, key):
+        return key in self._tiles
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._tiles.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+
+            # Re-insert so the tile becomes the most recently used
+            self._tiles[key] = value
+            self.hits += 1
+
+            return value
+
+    def put(self, key, status_code, headers, content):
+        size = len(content)
+
+        # Tiles that could never fit are not worth evicting everything for
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if key in self._tiles:
+                self._remove(key)
+
+            self._tiles[key] = (status_code, dict(headers), content)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._tiles)))
+                self.evictions += 1
+
+        return True
+
+    def _remove(self, key):
+        status_code, headers, content = self._tiles.pop(key)
+        self.current_bytes -= len(content)
+
+    def invalidate(self, kernel_id, layer_name=None):
+        """Remove all tiles for a kernel, or for a single layer of a kernel."""
+        with self._lock:
+            for key in list(self._tiles.keys()):
+                if key[0] == kernel_id and \
+                   (layer_name is None or key[1] == layer_name):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "tiles": len(self._tiles),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes
+        }
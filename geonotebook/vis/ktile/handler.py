@@ -1,32 +1,149 @@
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
+import hashlib
 import json
 
 from ModestMaps.Core import Coordinate
 from notebook.base.handlers import IPythonHandler
-from tornado import concurrent, ioloop
+import TileStache as ts
+# NB:  this uses a 'private' API for parsing the Config layer dictionary
+from TileStache.Config import _parseConfigLayer as parseConfigLayer
 from tornado import gen
 from tornado import web
 
-from .utils import serialize_config, serialize_layer
+from .utils import (PROVIDER_CLASS,
+                    serialize_config,
+                    serialize_layer)
+
+# Per-worker state for the process render backend. Each worker process
+# rebuilds a KTile layer from its provider's serialized state the first
+# time it sees a layer, and then reuses it for subsequent tiles.
+_worker_config = None
+_worker_layers = OrderedDict()
+_WORKER_MAX_LAYERS = 64
+
+
+def _provider_kwargs(state):
+    """Convert a serialized MapnikPythonProvider into constructor kwargs.
+
+    The VRT has already been generated by the notebook server so it is
+    always passed along as a static VRT. Generated VRTs number their
+    bands from 1, static VRTs keep the bands they were ingested with.
+    """
+    if state['is_static']:
+        bands = state['bands']
+    else:
+        bands = list(range(1, len(state['bands']) + 1))
+
+    return {
+        'name': state['name'],
+        'path': state['filepath'],
+        'vrt_path': state['vrt_path'],
+        'bands': bands,
+        'map_srs': state['map_srs'],
+        'layer_srs': state['layer_srs'],
+        'opacity': state['opacity'],
+        'gamma': state['gamma'],
+        'colormap': state['colormap'],
+        'nodata': state['nodata'],
+        'raster_x_size': state['raster_x_size'],
+        'raster_y_size': state['raster_y_size'],
+        'transform': state['transform']
+    }
+
+
+def _provider_class(provider):
+    return "{}:{}".format(type(provider).__module__, type(provider).__name__)
+
+
+def render_tile(key, provider_class, state, coord, extension):
+    """Render a tile inside a render worker process.
+
+    If state is None the tile is only rendered if this worker already has
+    the layer,  otherwise None is returned and the caller must send the
+    provider's state.
+    """
+    global _worker_config
+
+    if _worker_config is None:
+        _worker_config = ts.parseConfig({
+            "cache": {"name": "Test"},
+            "layers": {}
+        })
+
+    try:
+        layer = _worker_layers[key]
+    except KeyError:
+        if state is None:
+            return None
+
+        if provider_class == PROVIDER_CLASS:
+            kwargs = _provider_kwargs(state)
+        else:
+            kwargs = state
+
+        layer = parseConfigLayer({
+            "provider": {
+                "class": provider_class,
+                "kwargs": kwargs
+            }
+        }, _worker_config, '')
+
+        _worker_layers[key] = layer
+        while len(_worker_layers) > _WORKER_MAX_LAYERS:
+            _worker_layers.popitem(last=False)
+
+    status_code, headers, content = layer.getTileResponse(coord, extension)
+
+    return status_code, dict(headers), content
 
 
 class KTileAsyncClient(object):
     __instance = None
 
+    render_backends = ('thread', 'process')
+
     def __new__(cls, *args, **kwargs):
         if cls.__instance is None:
-            cls.__instance = super(
-                KTileAsyncClient, cls).__new__(cls, *args, **kwargs)
+            cls.__instance = super(KTileAsyncClient, cls).__new__(cls)
         return cls.__instance
 
-    def __init__(self):
-        self.executor = ThreadPoolExecutor(max_workers=4)
-        self.io_loop = ioloop.IOLoop.current()
+    def __init__(self, backend='thread', max_workers=4):
+        # KTileAsyncClient is a singleton,  only the first instantiation
+        # configures the executor.
+        if getattr(self, 'executor', None) is not None:
+            return
 
-    @concurrent.run_on_executor
-    def getTileResponse(self, layer, coord, extension):
-        return layer.getTileResponse(coord, extension)
+        if backend not in self.render_backends:
+            raise ValueError(
+                "{} is not a valid render_backend".format(backend))
+
+        self.backend = backend
+
+        if self.backend == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    @gen.coroutine
+    def _render_in_process(self, layer, coord, extension, key):
+        # Only pickle the provider when the worker doesn't have the layer
+        result = yield self.executor.submit(
+            render_tile, key, None, None, coord, extension)
+
+        if result is None:
+            result = yield self.executor.submit(
+                render_tile, key, _provider_class(layer.provider),
+                layer.provider.serialize(), coord, extension)
+
+        raise gen.Return(result)
+
+    def getTileResponse(self, layer, coord, extension, key=None):
+        if self.backend == 'process':
+            return self._render_in_process(layer, coord, extension, key)
+
+        return self.executor.submit(layer.getTileResponse, coord, extension)
 
 
 class KtileHandler(IPythonHandler):
@@ -101,8 +218,15 @@ class KtileLayerHandler(IPythonHandler):
     def post(self, kernel_id, layer_name):
         # Note: needs paramater validation
         try:
-            self.ktile_config_manager.add_layer(
-                kernel_id, layer_name, self.request.json)
+            # An empty layer name registers a batch of layers in one
+            # request, the body is of the form {"layers": {name: layer}}
+            if layer_name == '':
+                for name, layer in self.request.json['layers'].items():
+                    self.ktile_config_manager.add_layer(
+                        kernel_id, name, layer)
+            else:
+                self.ktile_config_manager.add_layer(
+                    kernel_id, layer_name, self.request.json)
 
             self.finish()
 
@@ -145,12 +269,29 @@ class KtileTileHandler(IPythonHandler):
         layer = config.layers[layer_name]
         coord = Coordinate(int(y), int(x), int(z))
 
-        # To run synchronously:
-        # status_code, headers, content = layer.getTileResponse(
-        #     coord, extension)
+        tile_cache = self.ktile_config_manager.tile_cache
+        style_hash = self.ktile_config_manager.style_hash(kernel_id,
+                                                          layer_name)
+        cache_key = (kernel_id, layer_name, int(z), int(x), int(y), extension,
+                     style_hash)
+
+        cached = tile_cache.get(cache_key)
 
-        status_code, headers, content = yield self.client.getTileResponse(
-            layer, coord, extension)
+        if cached is not None:
+            status_code, headers, content = cached
+            headers = dict(headers)
+        else:
+            # To run synchronously:
+            # status_code, headers, content = layer.getTileResponse(
+            #     coord, extension)
+
+            status_code, headers, content = \
+                yield self.client.getTileResponse(
+                    layer, coord, extension,
+                    key=(kernel_id, layer_name, style_hash))
+
+            if status_code == 200:
+                tile_cache.put(cache_key, status_code, headers, content)
 
         if layer.max_cache_age is not None:
             expires = datetime.utcnow() + timedelta(
@@ -159,10 +300,15 @@ class KtileTileHandler(IPythonHandler):
             headers['Cache-Control'] = 'public, max-age=%d' \
                 % layer.max_cache_age
         else:
-            headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+            # Tiles may always be revalidated against their ETag
+            headers['Cache-Control'] = 'no-cache, must-revalidate'
             headers['Pragma'] = 'no-cache'
             headers['Expires'] = '0'
 
+        if status_code == 200:
+            headers['ETag'] = '"{}"'.format(
+                hashlib.sha1(content).hexdigest())
+
         # Force allow cross origin access
         headers["Access-Control-Allow-Origin"] = "*"
 
@@ -170,6 +316,10 @@ class KtileTileHandler(IPythonHandler):
         for k, v in headers.items():
             self.set_header(k, v)
 
+        if status_code == 200 and self.check_etag_header():
+            self.set_status(304)
+            return
+
         self.set_status(status_code)
 
         self.write(content)
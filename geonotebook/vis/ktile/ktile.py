@@ -1,20 +1,20 @@
 from collections import MutableMapping
+from collections import OrderedDict
 
+import json
 import os
-
-from notebook.utils import url_path_join as ujoin
-
-import requests
-
-import TileStache as ts
-# NB:  this uses a 'private' API for parsing the Config layer dictionary
-from TileStache.Config import _parseConfigLayer as parseConfigLayer
+import threading
 
 from geonotebook.utils import get_kernel_id
 
-from .handler import (KtileHandler,
-                      KtileLayerHandler,
-                      KtileTileHandler)
+from .cache import TileCache
+from .utils import (PROVIDER_CLASS,
+                    serialize_provider,
+                    VECTOR_PROVIDER_CLASS)
+
+# NB: The Ktile client is created in every kernel,  TileStache,  the
+# notebook server and the tile handlers are only imported by the parts of
+# this module that run inside the notebook server.
 
 
 # Manage kernel_id => layer configuration section
@@ -22,9 +22,11 @@ from .handler import (KtileHandler,
 # it manages the configuration for all running geonotebook
 # kernels. It lives inside the Tornado Webserver
 class KtileConfigManager(MutableMapping):
-    def __init__(self, default_cache, *args, **kwargs):
+    def __init__(self, default_cache, tile_cache=None, *args, **kwargs):
         self.default_cache = default_cache
+        self.tile_cache = TileCache() if tile_cache is None else tile_cache
         self._configs = {}
+        self._style_hashes = {}
 
     def __getitem__(self, *args, **kwargs):
         return self._configs.__getitem__(*args, **kwargs)
@@ -32,8 +34,12 @@ class KtileConfigManager(MutableMapping):
     def __setitem__(self, _id, value):
         self._configs.__setitem__(_id, value)
 
-    def __delitem__(self, *args, **kwargs):
-        return self._configs.__delitem__(*args, **kwargs)
+    def __delitem__(self, kernel_id):
+        self._configs.__delitem__(kernel_id)
+
+        self.tile_cache.invalidate(kernel_id)
+        for key in [k for k in self._style_hashes if k[0] == kernel_id]:
+            del self._style_hashes[key]
 
     def __iter__(self, *args, **kwargs):
         return self._configs.__iter__(*args, **kwargs)
@@ -42,6 +48,8 @@ class KtileConfigManager(MutableMapping):
         return self._configs.__len__(*args, **kwargs)
 
     def add_config(self, kernel_id, **kwargs):
+        import TileStache as ts
+
         cache = kwargs.get("cache", self.default_cache)
 
         self._configs[kernel_id] = ts.parseConfig({
@@ -50,6 +58,9 @@ class KtileConfigManager(MutableMapping):
         })
 
     def add_layer(self, kernel_id, layer_name, layer_dict, dirpath=''):
+        # NB: this uses a "private" API to parse the layer dictionary
+        from TileStache.Config import _parseConfigLayer as parseConfigLayer
+
         # NB: dirpath is actually not used in _parseConfigLayer So dirpath
         # should have no effect regardless of its value.
 
@@ -64,8 +75,19 @@ class KtileConfigManager(MutableMapping):
         except AttributeError:
             pass
 
+        # Any tiles rendered for a previous incarnation of this layer
+        # are no longer valid.
+        self.tile_cache.invalidate(kernel_id, layer_name)
+        self._style_hashes[(kernel_id, layer_name)] = hash(json.dumps(
+            serialize_provider(
+                self._configs[kernel_id].layers[layer_name].provider),
+            sort_keys=True, default=str))
+
         return True
 
+    def style_hash(self, kernel_id, layer_name):
+        return self._style_hashes.get((kernel_id, layer_name))
+
 
 # Ktile vis_server,  this is not a persistent object
 # It is brought into existence as a client to provide access
@@ -78,10 +100,35 @@ class KtileConfigManager(MutableMapping):
 # different contexts!
 
 class Ktile(object):
-    def __init__(self, config, url=None, default_cache=None):
+    def __init__(self, config, url=None, default_cache=None,
+                 tile_cache_size=256, render_backend='thread',
+                 render_workers=4):
         self.config = config
         self.base_url = url
         self.default_cache_section = default_cache
+        # Size of the in-process rendered tile cache in megabytes
+        self.tile_cache_size = float(tile_cache_size)
+        # Either 'thread' or 'process',  see KTileAsyncClient
+        self.render_backend = render_backend
+        self.render_workers = int(render_workers)
+
+    # Keep-alive HTTP sessions to the notebook server.  requests.Session
+    # is not thread safe,  so each thread that ingests (e.g. the kernel's
+    # ingest workers) gets its own,  keyed by base_url.
+    _local = threading.local()
+
+    @property
+    def session(self):
+        sessions = getattr(Ktile._local, 'sessions', None)
+        if sessions is None:
+            sessions = Ktile._local.sessions = {}
+
+        try:
+            return sessions[self.base_url]
+        except KeyError:
+            import requests
+
+            return sessions.setdefault(self.base_url, requests.Session())
 
     @property
     def default_cache(self):
@@ -89,20 +136,33 @@ class Ktile(object):
 
     def start_kernel(self, kernel):
         kernel_id = get_kernel_id(kernel)
-        requests.post("{}/{}".format(self.base_url, kernel_id))
+        self.session.post("{}/{}".format(self.base_url, kernel_id))
         # Error checking on response!
 
     def shutdown_kernel(self, kernel):
         kernel_id = get_kernel_id(kernel)
-        requests.delete("{}/{}".format(self.base_url, kernel_id))
+        self.session.delete("{}/{}".format(self.base_url, kernel_id))
 
     # This function is caleld inside the tornado web app
     # from jupyter_load_server_extensions
     def initialize_webapp(self, config, webapp):
+        from notebook.utils import url_path_join as ujoin
+
+        from .handler import (KTileAsyncClient,
+                              KtileHandler,
+                              KtileLayerHandler,
+                              KtileTileHandler)
+
         base_url = webapp.settings['base_url']
 
+        # Configure the (singleton) tile rendering client before any
+        # KtileTileHandler gets a chance to instantiate it.
+        KTileAsyncClient(backend=self.render_backend,
+                         max_workers=self.render_workers)
+
         webapp.ktile_config_manager = KtileConfigManager(
-            self.default_cache)
+            self.default_cache,
+            tile_cache=TileCache(self.tile_cache_size * 1024 * 1024))
 
         webapp.add_handlers('.*$', [
             # kernel_name
@@ -116,6 +176,7 @@ class Ktile(object):
              dict(ktile_config_manager=webapp.ktile_config_manager)),
 
             # kernel_name, layer_name, x, y, z, extension
+            # NB: VectorData layers are served from here as .mvt tiles
             (ujoin(base_url,
                    r'/ktile/([^/]*)/([^/]*)/([^/]*)/([^/]*)/([^/\.]*)\.(.*)'),
              KtileTileHandler,
@@ -158,15 +219,7 @@ class Ktile(object):
 
         return options
 
-    def ingest(self, data, name=None, **kwargs):
-
-        # Verify that a kernel_id is present otherwise we can't
-        # post to the server extension to add the layer
-        kernel_id = kwargs.pop('kernel_id', None)
-        if kernel_id is None:
-            raise Exception(
-                "KTile vis server requires kernel_id as kwarg to ingest!")
-
+    def _layer_config(self, data, name=None, **kwargs):
         options = {
             'name': data.name if name is None else name
         }
@@ -200,17 +253,46 @@ class Ktile(object):
             # We don't have a static VRT, set options for a dynamic VRT
             options.update(self._dynamic_vrt_options(data, kwargs))
 
-        # Make the Request
-        base_url = '{}/{}/{}'.format(self.base_url, kernel_id, name)
-
-        r = requests.post(base_url, json={
+        return {
             "provider": {
-                "class": "geonotebook.vis.ktile.provider:MapnikPythonProvider",
+                "class": PROVIDER_CLASS,
                 "kwargs": options
             }
             # NB: Other KTile layer options could go here
             #     See: http://tilestache.org/doc/#layers
-        })
+        }
+
+    def _vector_layer_config(self, data, name=None, **kwargs):
+        return {
+            "provider": {
+                "class": VECTOR_PROVIDER_CLASS,
+                "kwargs": {
+                    'name': data.reader.name if name is None else name,
+                    'path': os.path.abspath(data.reader.path),
+                    'layer_name': data.reader.name
+                }
+            }
+        }
+
+    def ingest(self, data, name=None, **kwargs):
+        from geonotebook.wrappers import VectorData
+
+        # Verify that a kernel_id is present otherwise we can't
+        # post to the server extension to add the layer
+        kernel_id = kwargs.pop('kernel_id', None)
+        if kernel_id is None:
+            raise Exception(
+                "KTile vis server requires kernel_id as kwarg to ingest!")
+
+        # Make the Request
+        base_url = '{}/{}/{}'.format(self.base_url, kernel_id, name)
+
+        if isinstance(data, VectorData):
+            config = self._vector_layer_config(data, name=name, **kwargs)
+        else:
+            config = self._layer_config(data, name=name, **kwargs)
+
+        r = self.session.post(base_url, json=config)
 
         if r.status_code == 200:
             return base_url
@@ -218,3 +300,37 @@ class Ktile(object):
             raise RuntimeError(
                 "KTile.ingest() returned {} error:\n\n{}".format(
                     r.status_code, ''.join(r.json()['error'])))
+
+    def ingest_many(self, items, **kwargs):
+        """Ingest several layers with a single request.
+
+        :param items: A list of (data, name) tuples
+        :returns: The vis_url of each ingested layer
+        :rtype: list
+        """
+        from geonotebook.wrappers import VectorData
+
+        kernel_id = kwargs.pop('kernel_id', None)
+        if kernel_id is None:
+            raise Exception(
+                "KTile vis server requires kernel_id as kwarg to ingest!")
+
+        layers = OrderedDict()
+        for data, name in items:
+            if isinstance(data, VectorData):
+                layers[name] = self._vector_layer_config(
+                    data, name=name, **kwargs)
+            else:
+                layers[name] = self._layer_config(data, name=name, **kwargs)
+
+        # Posting to an empty layer name registers all layers at once
+        r = self.session.post('{}/{}/'.format(self.base_url, kernel_id),
+                              json={"layers": layers})
+
+        if r.status_code == 200:
+            return ['{}/{}/{}'.format(self.base_url, kernel_id, name)
+                    for name in layers]
+        else:
+            raise RuntimeError(
+                "KTile.ingest_many() returned {} error:\n\n{}".format(
+                    r.status_code, ''.join(r.json()['error'])))
@@ -0,0 +1,254 @@
+"""A minimal Mapbox Vector Tile (v2) encoder.
+
+Geometries are GeoJSON like mappings that have already been transformed
+into tile coordinates,  i.e. (0, 0) is the upper left corner of the tile
+and (extent, extent) the lower right one. Coordinates are rounded onto
+the integer tile grid while encoding.
+
+See: https://github.com/mapbox/vector-tile-spec/tree/master/2.1
+"""
+import struct
+
+import six
+
+# Half the circumference of the earth in web mercator (EPSG:3857) meters
+MERCATOR_ORIGIN = 20037508.342789244
+
+DEFAULT_EXTENT = 4096
+
+# Feature.GeomType
+POINT = 1
+LINESTRING = 2
+POLYGON = 3
+
+# Geometry command ids
+MOVE_TO = 1
+LINE_TO = 2
+CLOSE_PATH = 7
+
+# Protobuf wire types
+VARINT = 0
+FIXED64 = 1
+LENGTH_DELIMITED = 2
+
+
+def tile_bounds(z, x, y):
+    """Web mercator (minx, miny, maxx, maxy) of an XYZ tile."""
+    size = 2 * MERCATOR_ORIGIN / (1 << z)
+
+    minx = -MERCATOR_ORIGIN + x * size
+    maxy = MERCATOR_ORIGIN - y * size
+
+    return (minx, maxy - size, minx + size, maxy)
+
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _command(command_id, count):
+    return (command_id & 0x7) | (count << 3)
+
+
+def _tag(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _message(field, payload):
+    return _tag(field, LENGTH_DELIMITED) + _varint(len(payload)) + payload
+
+
+def _packed(field, values):
+    return _message(field, b''.join(_varint(v) for v in values))
+
+
+def _encode_value(value):
+    """Encode a property value as a Layer.Value message body."""
+    if isinstance(value, bool):
+        return _tag(7, VARINT) + _varint(int(value))
+    elif isinstance(value, six.integer_types):
+        if value >= 0:
+            return _tag(5, VARINT) + _varint(value)
+        return _tag(6, VARINT) + _varint(_zigzag(value))
+    elif isinstance(value, float):
+        return _tag(3, FIXED64) + struct.pack('<d', value)
+
+    if not isinstance(value, six.text_type):
+        value = value.decode('utf-8') if isinstance(value, bytes) \
+            else six.text_type(value)
+
+    return _message(1, value.encode('utf-8'))
+
+
+def _quantize(coords):
+    """Round coordinates onto the tile grid dropping repeated vertices."""
+    out = []
+    for coord in coords:
+        point = (int(round(coord[0])), int(round(coord[1])))
+        if not out or out[-1] != point:
+            out.append(point)
+    return out
+
+
+def _ring_area(ring):
+    """Twice the signed area of a ring in tile (y down) coordinates."""
+    return sum(x0 * y1 - x1 * y0
+               for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]))
+
+
+class _GeometryEncoder(object):
+    def __init__(self):
+        self.commands = []
+        self.cursor = (0, 0)
+
+    def _deltas(self, points):
+        for x, y in points:
+            self.commands.append(_zigzag(x - self.cursor[0]))
+            self.commands.append(_zigzag(y - self.cursor[1]))
+            self.cursor = (x, y)
+
+    def points(self, points):
+        self.commands.append(_command(MOVE_TO, len(points)))
+        self._deltas(points)
+
+    def line(self, points):
+        self.commands.append(_command(MOVE_TO, 1))
+        self._deltas(points[:1])
+        self.commands.append(_command(LINE_TO, len(points) - 1))
+        self._deltas(points[1:])
+
+    def ring(self, points):
+        self.line(points)
+        self.commands.append(_command(CLOSE_PATH, 1))
+
+
+def _lines(geometry):
+    if geometry['type'] == 'LineString':
+        return [geometry['coordinates']]
+    return geometry['coordinates']
+
+
+def _polygons(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    return geometry['coordinates']
+
+
+def encode_geometry(geometry):
+    """Encode a geometry mapping into a (geom_type, commands) tuple.
+
+    Returns None if nothing is left of the geometry once its coordinates
+    have been quantized onto the tile grid.
+    """
+    encoder = _GeometryEncoder()
+    geom_type = geometry['type']
+
+    if geom_type in ('Point', 'MultiPoint'):
+        coords = [geometry['coordinates']] if geom_type == 'Point' \
+            else geometry['coordinates']
+        points = _quantize(coords)
+        if points:
+            encoder.points(points)
+        return (POINT, encoder.commands) if encoder.commands else None
+
+    elif geom_type in ('LineString', 'MultiLineString'):
+        for line in _lines(geometry):
+            points = _quantize(line)
+            if len(points) >= 2:
+                encoder.line(points)
+        return (LINESTRING, encoder.commands) if encoder.commands else None
+
+    elif geom_type in ('Polygon', 'MultiPolygon'):
+        for polygon in _polygons(geometry):
+            for i, ring in enumerate(polygon):
+                points = _quantize(ring)
+                # The closing vertex is implied by ClosePath
+                if len(points) > 1 and points[0] == points[-1]:
+                    points.pop()
+
+                area = _ring_area(points) if len(points) >= 3 else 0
+                if area == 0:
+                    # A degenerate exterior drops its holes as well
+                    if i == 0:
+                        break
+                    continue
+
+                # Exterior rings must be clockwise (positive area) in tile
+                # coordinates,  interior rings counter-clockwise.
+                if (area > 0) != (i == 0):
+                    points.reverse()
+
+                encoder.ring(points)
+        return (POLYGON, encoder.commands) if encoder.commands else None
+
+    elif geom_type == 'GeometryCollection':
+        raise ValueError("GeometryCollections cannot be encoded as a "
+                         "single vector tile feature")
+
+    raise ValueError("Unknown geometry type {}".format(geom_type))
+
+
+def encode_layer(name, features, extent=DEFAULT_EXTENT):
+    """Encode a Tile.Layer message body.
+
+    :param features: An iterable of (id, geometry, properties) tuples
+    """
+    keys, values = [], []
+    key_index, value_index = {}, {}
+
+    body = [_tag(15, VARINT) + _varint(2),
+            _message(1, name.encode('utf-8'))]
+
+    for fid, geometry, properties in features:
+        encoded = encode_geometry(geometry)
+        if encoded is None:
+            continue
+        geom_type, commands = encoded
+
+        tags = []
+        for key, value in sorted((properties or {}).items()):
+            if value is None:
+                continue
+
+            if key not in key_index:
+                key_index[key] = len(keys)
+                keys.append(key)
+
+            # Values are deduplicated by type as well, e.g. 1 and True
+            value_key = (type(value), value)
+            if value_key not in value_index:
+                value_index[value_key] = len(values)
+                values.append(_encode_value(value))
+
+            tags.extend((key_index[key], value_index[value_key]))
+
+        feature = b''
+        if fid is not None:
+            feature += _tag(1, VARINT) + _varint(fid)
+        if tags:
+            feature += _packed(2, tags)
+        feature += _tag(3, VARINT) + _varint(geom_type)
+        feature += _packed(4, commands)
+
+        body.append(_message(2, feature))
+
+    body.extend(_message(3, key.encode('utf-8')) for key in keys)
+    body.extend(_message(4, value) for value in values)
+    body.append(_tag(5, VARINT) + _varint(extent))
+
+    return b''.join(body)
+
+
+def encode_tile(layers, extent=DEFAULT_EXTENT):
+    """Encode a vector tile from a list of (layer_name, features) tuples."""
+    return b''.join(_message(3, encode_layer(name, features, extent))
+                    for name, features in layers)
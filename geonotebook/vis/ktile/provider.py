@@ -1,16 +1,12 @@
 import os
 import tempfile
+import threading
 
 import gdal
 import mapnik
+import numpy as np
 import osr
 
-from .vrt import (
-    ComplexSourceType,
-    SourceFilenameType,
-    VRTDataset,
-    VRTRasterBandType)
-
 try:
     from PIL import Image
 except ImportError:
@@ -52,6 +48,9 @@ class MapnikPythonProvider(object):
         self.layer = layer
 
         self.filepath = kwargs.get('path', None)
+        # Allow the layer srs to be passed in (e.g. when rebuilding a
+        # provider in a render worker) so we don't have to reopen the file
+        self._layer_srs = kwargs.get('layer_srs', None)
         self.map_srs = kwargs.get('map_srs', DEFAULT_MAP_SRS)
 
         self.name = kwargs.get('name', None)
@@ -80,15 +79,20 @@ class MapnikPythonProvider(object):
             self.mapnik_band = -1 if len(self._bands) == 3 else self._bands[0]
 
         self.opacity = kwargs.get('opacity', 1)
+        self._gamma_lut = None
         self.gamma = kwargs.get('gamma', 1)
 
         self.colormap = kwargs.get('colormap', {})
 
         self.scale_factor = None
 
+        # Prepared mapnik.Map objects,  see get_map()
+        self._local = threading.local()
+
     def serialize(self):
         return {
             "filepath": self.filepath,
+            "bands": self._bands,
             "map_srs": self.map_srs,
             "vrt_path": self.vrt_path,
             "name": self.name,
@@ -104,6 +108,13 @@ class MapnikPythonProvider(object):
         }
 
     def generate_vrt(self):
+        # The generated bindings are large,  only import them when needed
+        from .vrt import (
+            ComplexSourceType,
+            SourceFilenameType,
+            VRTDataset,
+            VRTRasterBandType)
+
         if self._static_vrt is not None:
             return
 
@@ -145,6 +156,21 @@ class MapnikPythonProvider(object):
 
         return self._vrt_path
 
+    @property
+    def gamma(self):
+        return self._gamma
+
+    @gamma.setter
+    def gamma(self, val):
+        self._gamma = val
+
+        # Precompute the 8 bit gamma lookup table used by renderArea
+        if val is None or float(val) == 1.0:
+            self._gamma_lut = None
+        else:
+            lut = np.power(np.arange(256) / 255., 1.0 / float(val)) * 255
+            self._gamma_lut = np.clip(np.round(lut), 0, 255).astype(np.uint8)
+
     @property
     def vrt_path(self):
         if self._static_vrt is not None:
@@ -213,17 +239,32 @@ class MapnikPythonProvider(object):
 
         return Map
 
-    def renderArea(self, width, height, srs, xmin, ymin, xmax, ymax, zoom):
-        '''
-        '''
+    def get_map(self, width, height, srs):
+        """Return a styled mapnik.Map for this thread.
 
-        # NB: To be thread-safe Map object cannot be stored in the class state.
+        Building the map (style, colorizer stops, GDAL datasource) is the
+        dominant fixed cost of rendering a tile, so maps are prepared once
+        per thread and tile size and reused for every subsequent tile.
+        """
+        # NB: To be thread-safe Map object cannot be shared between threads.
         # see: https://groups.google.com/forum/#!topic/mapnik/USDlVfSk328
+        try:
+            maps = self._local.maps
+        except AttributeError:
+            maps = self._local.maps = {}
 
-        Map = mapnik.Map(width, height, srs)
-        Map.zoom_to_box(Box2d(xmin, ymin, xmax, ymax))
+        try:
+            return maps[(width, height, srs)]
+        except KeyError:
+            Map = self.style_map(mapnik.Map(width, height, srs))
+            maps[(width, height, srs)] = Map
+            return Map
 
-        Map = self.style_map(Map)
+    def renderArea(self, width, height, srs, xmin, ymin, xmax, ymax, zoom):
+        '''
+        '''
+        Map = self.get_map(width, height, srs)
+        Map.zoom_to_box(Box2d(xmin, ymin, xmax, ymax))
 
         img = mapnik.Image(width, height)
         # Don't even call render with scale factor if it's not
@@ -233,20 +274,19 @@ class MapnikPythonProvider(object):
         else:
             mapnik.render(Map, img, self.scale_factor)
 
-        def gamma_correct(im):
-            """Fast gamma correction with PIL's image.point() method."""
-            if self.gamma != 1.0:
-                table = [pow(x / 255., 1.0 / self.gamma) * 255
-                         for x in range(256)]
-                # Expand table to number of bands
-                table = table * len(im.mode)
-                return im.point(table)
-            else:
-                return im
-
-        # b = BytesIO(img.tostring())
-        img = Image.frombytes('RGBA', (width, height), img.tostring())
-
-        img = gamma_correct(img)
-
-        return img
+        if self._gamma_lut is None:
+            buf = img.tostring()
+        else:
+            # View the raw RGBA string as a (height, width, 4) array without
+            # copying it,  and write the gamma corrected color channels
+            # straight into the one output buffer,  leaving alpha be.
+            pixels = np.frombuffer(img.tostring(), dtype=np.uint8).reshape(
+                (height, width, 4))
+            buf = np.empty_like(pixels)
+            np.take(self._gamma_lut, pixels[..., :3], out=buf[..., :3],
+                    mode='clip')
+            buf[..., 3] = pixels[..., 3]
+
+        # Image.frombuffer shares memory with buf rather than copying it
+        return Image.frombuffer('RGBA', (width, height), buf,
+                                'raw', 'RGBA', 0, 1)
@@ -2,7 +2,9 @@ import os
 
 import ipykernel
 
-import requests
+
+PROVIDER_CLASS = "geonotebook.vis.ktile.provider:MapnikPythonProvider"
+VECTOR_PROVIDER_CLASS = "geonotebook.vis.ktile.vector:VectorTileProvider"
 
 
 def serialize_config(kConfig):
@@ -34,10 +36,11 @@ def get_layer_vrt_path(gLayer):
     kernel_id = os.path.basename(
         ipykernel.get_connection_file()).split('-', 1)[1].split('.')[0]
 
-    request_url = "{}/{}/{}".format(gLayer.config.vis_server.base_url,
+    vis_server = gLayer.config.vis_server
+    request_url = "{}/{}/{}".format(vis_server.base_url,
                                     kernel_id, gLayer.name)
 
-    r = requests.get(request_url)
+    r = vis_server.session.get(request_url)
     response = r.json()
 
     return response['provider']['vrt_path']
@@ -0,0 +1,149 @@
+import threading
+
+import fiona
+from shapely.geometry import box, mapping, shape
+from shapely.ops import transform
+
+from geonotebook.spatial import SpatialIndex
+from geonotebook.utils import get_transformer
+
+from . import mvt
+
+# Web mercator is only defined up to ~85.05 degrees of latitude
+MERCATOR_BOUNDS = (-180.0, -85.0511287798066, 180.0, 85.0511287798066)
+
+
+class VectorTile(object):
+    """Encoded vector tile content,  KTile calls save() to write it out."""
+
+    def __init__(self, content):
+        self.content = content
+
+    def save(self, out, format):
+        out.write(self.content)
+
+
+class VectorTileProvider(object):
+    """KTile provider serving a fiona dataset as Mapbox Vector Tiles.
+
+    Features are read once,  projected to web mercator and spatially
+    indexed the first time a tile is requested. Each tile is then built
+    from the features intersecting it,  clipped to the (buffered) tile,
+    simplified to the tile resolution and quantized to the tile extent.
+    """
+
+    def __init__(self, layer, **kwargs):
+        self.layer = layer
+
+        self.name = kwargs.get('name', None)
+        self.path = kwargs.get('path', None)
+        # Name of the layer within the fiona dataset (e.g. a GeoPackage)
+        self.layer_name = kwargs.get('layer_name', None)
+        self.extent = int(kwargs.get('extent', mvt.DEFAULT_EXTENT))
+        # Pixels of the neighbouring tiles to include so that clipped
+        # polygon edges and wide lines don't show up at tile boundaries
+        self.buffer = int(kwargs.get('buffer', 64))
+
+        self._index = None
+        self._lock = threading.Lock()
+
+    def serialize(self):
+        return {
+            "name": self.name,
+            "path": self.path,
+            "layer_name": self.layer_name,
+            "extent": self.extent,
+            "buffer": self.buffer
+        }
+
+    def getTypeByExtension(self, extension):
+        if extension.lower() in ('mvt', 'pbf'):
+            return 'application/vnd.mapbox-vector-tile', 'MVT'
+
+        raise ValueError(
+            "VectorTileProvider cannot render .{} tiles".format(extension))
+
+    def _load(self):
+        geometries, features = [], []
+
+        kwargs = {} if self.layer_name is None else {'layer': self.layer_name}
+        with fiona.open(self.path, **kwargs) as reader:
+            to_wgs84 = get_transformer(reader.crs or 'EPSG:4326', 'EPSG:4326')
+            to_mercator = get_transformer('EPSG:4326', 'EPSG:3857')
+            world = box(*MERCATOR_BOUNDS)
+
+            for i, feature in enumerate(reader):
+                if feature.get('geometry') is None:
+                    continue
+
+                geometry = shape(feature['geometry'])
+                if not to_wgs84.identity:
+                    geometry = transform(to_wgs84, geometry)
+
+                if not world.contains(geometry):
+                    geometry = geometry.intersection(world)
+                    if geometry.is_empty:
+                        continue
+
+                properties = dict(feature.get('properties') or {})
+                properties['_geonotebook_feature_id'] = i
+
+                geometries.append(transform(to_mercator, geometry))
+                features.append((i, properties))
+
+        return SpatialIndex(geometries, range(len(features))), \
+            geometries, features
+
+    @property
+    def index(self):
+        # Tiles are rendered concurrently,  only load the features once
+        with self._lock:
+            if self._index is None:
+                self._index = self._load()
+
+        return self._index
+
+    def features(self, zoom, column, row):
+        """Yield (id, geometry, properties) in tile coordinates."""
+        index, geometries, features = self.index
+
+        minx, miny, maxx, maxy = mvt.tile_bounds(zoom, column, row)
+        scale = self.extent / (maxx - minx)
+
+        # One unit of the tile grid in mercator meters
+        resolution = 1.0 / scale
+        pad = self.buffer * resolution
+        clip = box(minx - pad, miny - pad, maxx + pad, maxy + pad)
+
+        for i in index.intersects(clip):
+            geometry = geometries[i]
+            if not clip.contains(geometry):
+                geometry = geometry.intersection(clip)
+
+            if geometry.geom_type not in ('Point', 'MultiPoint'):
+                geometry = geometry.simplify(resolution,
+                                             preserve_topology=True)
+
+            if geometry.is_empty:
+                continue
+
+            fid, properties = features[i]
+
+            # Flip y so that the tile origin is in the upper left corner
+            def to_tile(xs, ys):
+                return ([(x - minx) * scale for x in xs],
+                        [(maxy - y) * scale for y in ys])
+
+            if geometry.geom_type == 'GeometryCollection':
+                parts = [g for g in geometry.geoms if not g.is_empty]
+            else:
+                parts = [geometry]
+
+            for part in parts:
+                yield fid, mapping(transform(to_tile, part)), properties
+
+    def renderTile(self, width, height, srs, coord):
+        features = self.features(coord.zoom, coord.column, coord.row)
+
+        return VectorTile(mvt.encode_tile(
+            [(self.name or 'features', features)], extent=self.extent))
@@ -131,15 +131,18 @@ class RasterStyleOptions(object):
 class VectorStyleOptions(object):
     def __init__(self, opacity=0.8, projection='EPSG:4326',
                  layer_type='vector', colors=None,
-                 attribution=None, zIndex=None, **kwargs):
+                 attribution=None, zIndex=None, encoding='geojson', **kwargs):
         if projection != 'EPSG:4326':
             raise Exception('Reprojection not yet supported')
+        if encoding not in ('geojson', 'topojson'):
+            raise Exception('Unknown vector encoding {}'.format(encoding))
         self.opacity = opacity
         self.projection = projection
         self.layer_type = layer_type
         self.colors = colors
         self.attribution = attribution
         self.zIndex = zIndex
+        self.encoding = encoding
 
     def serialize(self):
         return {
@@ -148,7 +151,8 @@ class VectorStyleOptions(object):
             'projection': self.projection,
             'attribution': self.attribution,
             'colors': self.colors,
-            'zIndex': self.zIndex
+            'zIndex': self.zIndex,
+            'encoding': self.encoding
         }
 
     def __hash__(self):
@@ -158,5 +162,6 @@ class VectorStyleOptions(object):
             self.projection,
             self.attribution,
             self.colors,
-            self.zIndex
+            self.zIndex,
+            self.encoding
         ))
@@ -1,17 +1,28 @@
 from collections import namedtuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+import hashlib
+import json
 import os
 import re
+import tempfile
+import threading
+import time
 
 import numpy as np
-import pkg_resources as pr
 import rasterio as rio
-from rasterio.crs import CRS
+from rasterio.features import rasterize
+from shapely.geometry import shape
 
-from geonotebook.utils import transform_coordinates
+from geonotebook import entry_points
+from geonotebook.utils import get_transformer, transform_coordinates
 
 BBox = namedtuple('BBox', ['ulx', 'uly', 'lrx', 'lry'])
 
+# Seconds between checks for changes to the files behind pooled datasets
+CHECK_INTERVAL = 1.0
+
 
 class BandStats(object):
     MIN = u'STATISTICS_MINIMUM'
@@ -33,30 +44,277 @@ def validate_index(func):
     return _validate_index
 
 
+class StatisticsAccumulator(object):
+    """Accumulate min/max/mean/stddev of a band one block at a time.
+
+    Per block statistics are merged with Welford/Chan's parallel
+    algorithm so only one block needs to be held in memory at a time.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, block):
+        block = np.ma.asarray(block, dtype=np.float64)
+        n = block.count()
+
+        if n == 0:
+            return
+
+        block_mean = block.mean()
+        block_m2 = ((block - block_mean) ** 2).sum()
+
+        delta = block_mean - self.mean
+        total = self.count + n
+
+        self.mean += delta * n / total
+        self.m2 += block_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+        self.min = block.min() if self.min is None \
+            else min(self.min, block.min())
+        self.max = block.max() if self.max is None \
+            else max(self.max, block.max())
+
+    def result(self):
+        if self.count == 0:
+            return {'min': None, 'max': None, 'mean': None, 'stddev': None}
+
+        return {
+            'min': float(self.min),
+            'max': float(self.max),
+            'mean': float(self.mean),
+            'stddev': float(np.sqrt(self.m2 / self.count))
+        }
+
+
+def band_statistics(blocks):
+    """Compute min/max/mean/stddev of a band in a single pass.
+
+    :param blocks: An iterable of numpy (masked) arrays
+    :returns: dict with 'min', 'max', 'mean' and 'stddev' keys
+    :rtype: dict
+    """
+    acc = StatisticsAccumulator()
+
+    for block in blocks:
+        acc.update(block)
+
+    return acc.result()
+
+
+def get_stats_cache_dir():
+    return os.path.expanduser(os.environ.get(
+        'GEONOTEBOOK_CACHE_DIR', '~/.cache/geonotebook'))
+
+
+class StatisticsSidecar(object):
+    """Persist computed band statistics between kernels.
+
+    Statistics are stored as JSON in the geonotebook cache directory
+    (GEONOTEBOOK_CACHE_DIR,  ~/.cache/geonotebook by default) keyed by
+    the file's absolute path and invalidated when its mtime changes.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+
+        try:
+            self.mtime = os.path.getmtime(self.path)
+        except OSError:
+            # Not a local file,  nothing we can key a sidecar on
+            self.mtime = None
+
+    @property
+    def sidecar_path(self):
+        digest = hashlib.sha1(self.path.encode('utf-8')).hexdigest()
+        return os.path.join(get_stats_cache_dir(), 'stats',
+                            '{}.json'.format(digest))
+
+    def load(self):
+        """Return a dict of band index to statistics,  or {}."""
+        if self.mtime is None:
+            return {}
+
+        try:
+            with open(self.sidecar_path, 'r') as fh:
+                cached = json.load(fh)
+        except (IOError, OSError, ValueError):
+            return {}
+
+        if cached.get('path') != self.path or \
+           cached.get('mtime') != self.mtime:
+            return {}
+
+        return {int(k): v for k, v in cached.get('bands', {}).items()}
+
+    def save(self, band_stats):
+        if self.mtime is None:
+            return
+
+        path = self.sidecar_path
+
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+
+            # Write to a temporary file first so concurrent kernels
+            # never read a partially written sidecar.
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'w') as fh:
+                json.dump({'path': self.path,
+                           'mtime': self.mtime,
+                           'bands': band_stats}, fh)
+            os.rename(tmp, path)
+        except (IOError, OSError):
+            pass
+
+
+class DatasetPool(object):
+    """Process wide pool of open rasterio datasets.
+
+    Handles are keyed by (path, thread) so every thread reads through its
+    own handle and concurrent reads are safe. Handles are only reused by
+    long lived threads,  so concurrent reads should go through
+    read_executor(). At most max_open handles are kept,  the least
+    recently used handle is dropped from the pool when the budget is
+    exceeded,  and handles of threads that have exited are dropped
+    whenever a new handle is opened. Dropped handles are closed by
+    rasterio once the last reference to them goes away,  so a handle that
+    is still in use by its thread is never closed underneath it.
+
+    A pooled handle is reopened when the file's mtime or size changed,
+    which is checked at most once every CHECK_INTERVAL seconds.
+    """
+
+    def __init__(self, max_open=128):
+        self.max_open = max_open
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._handles)
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime, stat.st_size
+        except OSError:
+            # e.g. a GDAL virtual file system path
+            return None
+
+    def get(self, path):
+        key = (path, threading.current_thread().ident)
+        now = time.time()
+
+        with self._lock:
+            entry = self._handles.pop(key, None)
+            if entry is not None:
+                self._handles[key] = entry
+
+        if entry is not None:
+            dataset, signature, checked = entry
+            if now - checked < CHECK_INTERVAL:
+                return dataset
+
+            if self._signature(path) == signature:
+                entry[2] = now
+                return dataset
+
+            # The file changed underneath the handle. Handles are per
+            # thread so nothing else is reading through this one.
+            with self._lock:
+                self._handles.pop(key, None)
+            dataset.close()
+
+        # Stat before opening so a write racing the open is caught by the
+        # next check. Open outside of the lock,  opening can be slow.
+        signature = self._signature(path)
+        dataset = rio.open(path)
+
+        with self._lock:
+            alive = set(t.ident for t in threading.enumerate())
+            for k in [k for k in self._handles if k[1] not in alive]:
+                del self._handles[k]
+
+            self._handles[key] = [dataset, signature, now]
+
+            while len(self._handles) > self.max_open:
+                self._handles.popitem(last=False)
+
+        return dataset
+
+    def clear(self, path=None):
+        """Drop all handles,  or all handles to path."""
+        with self._lock:
+            for key in list(self._handles.keys()):
+                if path is None or key[0] == path:
+                    del self._handles[key]
+
+
+dataset_pool = DatasetPool()
+
+_read_executors = {}
+_read_executors_lock = threading.Lock()
+
+
+def read_executor(max_workers=4):
+    """A process wide thread pool for concurrent reads.
+
+    Pools are created once per max_workers and their threads live as long
+    as the process,  so the dataset_pool handles they open are reused from
+    one call to the next.
+
+    :param max_workers: The number of reader threads
+    :rtype: concurrent.futures.ThreadPoolExecutor
+    """
+    try:
+        return _read_executors[max_workers]
+    except KeyError:
+        pass
+
+    with _read_executors_lock:
+        if max_workers not in _read_executors:
+            _read_executors[max_workers] = ThreadPoolExecutor(
+                max_workers=max_workers)
+
+        return _read_executors[max_workers]
+
+
 def FileIOReader(uri):
     ext = os.path.splitext(uri)[1][1:]
 
-    for ep in pr.iter_entry_points(group='geonotebook.wrappers.raster.file'):
-        if ep.name == ext:
-            return ep.load()(uri)
+    try:
+        reader = entry_points.load(entry_points.RASTER_FILE, ext)
+    except KeyError:
+        raise NotImplementedError(
+            "Could not parse '{}', extension '{}' has no reader.".format(
+                uri, ext))
 
-    raise NotImplementedError(
-        "Could not parse '{}', extension '{}' has no reader.".format(uri, ext))
+    return reader(uri)
 
 
 class RasterIOReader(object):
     _path_parser = re.compile(r'^.*?://(.*)$')
 
+    _stat_tags = {'min': BandStats.MIN,
+                  'max': BandStats.MAX,
+                  'mean': BandStats.MEAN,
+                  'stddev': BandStats.STDDEV}
+
     def __init__(self, uri, band_names=None):
         self.uri = uri
         self.band_names = []
-        self._dataset = None
+        self._band_stats = {}
 
     @property
     def dataset(self):
-        if self._dataset is None:
-            self._dataset = rio.open(self.path)
-        return self._dataset
+        return dataset_pool.get(self.path)
 
     @property
     def path(self):
@@ -67,18 +325,35 @@ class RasterIOReader(object):
             # and that our path does not include scheme portion
             return self.uri
 
-    def __del__(self):
-        self.dataset.close()
-
     def index(self, *args, **kwargs):
-        target_srs = self.crs
         # Annotations are always in WGS84
-        source_srs = CRS.from_string("EPSG:4326")
-
-        args = transform_coordinates(source_srs, target_srs,
+        args = transform_coordinates("EPSG:4326", self.crs,
                                      [args[0]], [args[1]])
         return self.dataset.index(*args, **kwargs)
 
+    def index_many(self, xs, ys, op=np.floor):
+        """Index many WGS84 coordinates with a single reprojection.
+
+        Pixel coordinates of all points are computed at once with the
+        inverse of the dataset's affine transform.
+
+        :returns: list of (row, col) tuples
+        :rtype: list
+        """
+        xs, ys = get_transformer("EPSG:4326", self.crs)(xs, ys)
+
+        try:
+            affine = self.dataset.affine
+        except AttributeError:
+            # rasterio >= 1.0
+            affine = self.dataset.transform
+
+        cols, rows = ~affine * (np.asarray(xs, dtype=np.float64),
+                                np.asarray(ys, dtype=np.float64))
+
+        return list(zip(op(rows).astype(np.int64).tolist(),
+                        op(cols).astype(np.int64).tolist()))
+
     def read(self, *args, **kwargs):
         return self.dataset.read(*args, **kwargs)
 
@@ -110,45 +385,343 @@ class RasterIOReader(object):
         return convert(self.dataset.tags(index)[prop])
 
     def get_band_ix(self, indexes, x, y):
-        # Reproject to native data coordinates
-        target_srs = self.crs
-        # Annotations are always in WGS84
-        source_srs = CRS.from_string("EPSG:4326")
-
-        transformed_x, transformed_y = transform_coordinates(source_srs,
-                                                             target_srs,
+        # Reproject to native data coordinates,  annotations are
+        # always in WGS84
+        transformed_x, transformed_y = transform_coordinates("EPSG:4326",
+                                                             self.crs,
                                                              [x], [y])
         return list(self.dataset.sample([(transformed_x, transformed_y)],
                                         indexes=indexes))[0]
 
+    def sample_pixels(self, indexes, rows, cols):
+        """Sample many pixels,  reading each block window only once.
+
+        Points are grouped by the dataset block they fall in and each
+        group is read with a single (small) read covering its points.
+        Points outside of the dataset are masked, as are nodata values.
+
+        :param indexes: list of band indexes
+        :param rows: pixel rows of the points
+        :param cols: pixel columns of the points
+        :returns: (points, bands) masked array
+        :rtype: numpy.ma.MaskedArray
+        """
+        indexes = list(indexes)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+
+        nodata = [self.get_band_nodata(i) for i in indexes]
+        data = np.zeros((len(rows), len(indexes)),
+                        dtype=self.dataset.dtypes[indexes[0] - 1])
+
+        inside = (rows >= 0) & (rows < self.height) & \
+            (cols >= 0) & (cols < self.width)
+        points = np.nonzero(inside)[0]
+
+        if len(points):
+            block_rows, block_cols = self.dataset.block_shapes[0]
+            blocks_per_row = -(-self.width // block_cols)
+            block_ids = (rows[points] // block_rows) * blocks_per_row + \
+                cols[points] // block_cols
+
+            order = np.argsort(block_ids, kind='mergesort')
+            points, block_ids = points[order], block_ids[order]
+
+            for group in np.split(points,
+                                  np.nonzero(np.diff(block_ids))[0] + 1):
+                r, c = rows[group], cols[group]
+                r0, c0 = r.min(), c.min()
+
+                block = self.dataset.read(
+                    indexes, window=((r0, r.max() + 1), (c0, c.max() + 1)))
+                data[group] = block[:, r - r0, c - c0].T
+
+        mask = np.repeat(~inside[:, np.newaxis], len(indexes), axis=1)
+        for b, nd in enumerate(nodata):
+            if nd is not None:
+                mask[:, b] |= data[:, b] == nd
+
+        return np.ma.MaskedArray(data, mask=mask, fill_value=nodata[0])
+
+    def zonal_stats(self, indexes, geometries, max_workers=4):
+        """Accumulate per geometry statistics reading each block once.
+
+        For every block window the geometries whose bounding box touches
+        the block are rasterized into a label image (label i + 1 for
+        geometries[i]) and count, mean, sum of squared deviations, min and
+        max are reduced per label with bincount style operations. Blocks
+        are processed concurrently and merged with the same parallel
+        algorithm as StatisticsAccumulator. Geometries whose bounding boxes
+        overlap are rasterized into separate label images,  so a pixel
+        covered by several geometries counts towards each of them.
+
+        :param indexes: list of band indexes
+        :param geometries: GeoJSON-like geometries in the dataset's CRS
+        :param max_workers: number of threads reading blocks
+        :returns: dict of 'count', 'min', 'max', 'mean' and 'std' arrays,
+                  each of shape (bands, geometries)
+        :rtype: dict
+        """
+        indexes = list(indexes)
+        n = len(geometries)
+
+        bboxes = np.array([shape(g).bounds for g in geometries]).reshape(
+            (n, 4))
+        nodata = [self.get_band_nodata(i) for i in indexes]
+
+        count = np.zeros((len(indexes), n + 1), dtype=np.int64)
+        mean = np.zeros((len(indexes), n + 1))
+        m2 = np.zeros((len(indexes), n + 1))
+        _min = np.full((len(indexes), n + 1), np.inf)
+        _max = np.full((len(indexes), n + 1), -np.inf)
+
+        def _disjoint_groups(hits):
+            # Greedily group geometries with non-overlapping bounding boxes,
+            # each group can then be rasterized into one label image.
+            groups = []
+            for i in hits:
+                for group in groups:
+                    other = bboxes[group]
+                    if not ((other[:, 0] < bboxes[i, 2]) &
+                            (other[:, 2] > bboxes[i, 0]) &
+                            (other[:, 1] < bboxes[i, 3]) &
+                            (other[:, 3] > bboxes[i, 1])).any():
+                        group.append(i)
+                        break
+                else:
+                    groups.append([i])
+            return groups
+
+        def _block(window):
+            left, bottom, right, top = self.dataset.window_bounds(window)
+            hits = np.nonzero((bboxes[:, 0] <= right) &
+                              (bboxes[:, 2] >= left) &
+                              (bboxes[:, 1] <= top) &
+                              (bboxes[:, 3] >= bottom))[0]
+
+            if not len(hits):
+                return None
+
+            (r0, r1), (c0, c1) = window
+            label_images = [
+                rasterize([(geometries[i], i + 1) for i in group],
+                          out_shape=(r1 - r0, c1 - c0),
+                          transform=self.dataset.window_transform(window),
+                          fill=0, dtype=np.int32)
+                for group in _disjoint_groups(hits)]
+
+            if not any(labels.any() for labels in label_images):
+                return None
+
+            data = self.dataset.read(indexes, window=window)
+
+            reductions = []
+            for band, nd in zip(data, nodata):
+                valid = np.ones(band.shape, dtype=bool)
+                if nd is not None:
+                    valid = ~(np.isnan(band) if np.isnan(nd) else band == nd)
+
+                c = np.zeros(n + 1, dtype=np.int64)
+                m = np.zeros(n + 1)
+                d2 = np.zeros(n + 1)
+                mn = np.full(n + 1, np.inf)
+                mx = np.full(n + 1, -np.inf)
+
+                # Every label is in exactly one label image,  so the per
+                # image reductions just add up.
+                for labels in label_images:
+                    inside = valid & (labels > 0)
+                    lab = labels[inside]
+                    vals = band[inside].astype(np.float64)
+
+                    np.minimum.at(mn, lab, vals)
+                    np.maximum.at(mx, lab, vals)
+
+                    lc = np.bincount(lab, minlength=n + 1)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        lm = np.where(lc > 0, np.bincount(
+                            lab, weights=vals, minlength=n + 1) / lc, 0.0)
+                    # Deviations from each label's own mean,  not raw
+                    # squares,  so the variance doesn't suffer from
+                    # cancellation.
+                    d2 += np.bincount(lab, weights=(vals - lm[lab]) ** 2,
+                                      minlength=n + 1)
+                    c += lc
+                    m += lm
+
+                # Only keep the labels present in this block
+                reductions.append([c[hits + 1], m[hits + 1], d2[hits + 1],
+                                   mn[hits + 1], mx[hits + 1]])
+
+            return hits + 1, reductions
+
+        windows = [window for ji, window in self.dataset.block_windows()]
+        # Submit blocks in chunks so only a bounded number of block
+        # results are ever waiting to be merged.
+        chunk = max_workers * 16
+
+        executor = read_executor(max_workers)
+        for start in range(0, len(windows), chunk):
+            for result in executor.map(_block, windows[start:start + chunk]):
+                if result is None:
+                    continue
+
+                labels, reductions = result
+                for b, (c, m, d2, mn, mx) in enumerate(reductions):
+                    # Chan et al's pairwise merge,  as StatisticsAccumulator
+                    prev = count[b, labels]
+                    merged = prev + c
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        weight = np.where(
+                            merged > 0, np.true_divide(c, merged), 0.0)
+                    delta = m - mean[b, labels]
+
+                    mean[b, labels] += delta * weight
+                    m2[b, labels] += d2 + delta ** 2 * prev * weight
+                    count[b, labels] = merged
+                    _min[b, labels] = np.minimum(_min[b, labels], mn)
+                    _max[b, labels] = np.maximum(_max[b, labels], mx)
+
+        count, mean, m2 = count[:, 1:], mean[:, 1:], m2[:, 1:]
+        _min, _max = _min[:, 1:], _max[:, 1:]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, mean, np.nan)
+            variance = np.where(count > 0, m2 / count, np.nan)
+
+        empty = count == 0
+        _min[empty] = np.nan
+        _max[empty] = np.nan
+
+        return {
+            'count': count,
+            'min': _min,
+            'max': _max,
+            'mean': mean,
+            'std': np.sqrt(np.maximum(variance, 0))
+        }
+
+    def get_bands_stat(self, indexes, stat):
+        """Look up one of min/max/mean/stddev for several bands.
+
+        Statistics stored in a band's tags are used when present. All four
+        statistics of the remaining bands are computed (or loaded) together
+        in a single pass by compute_statistics and cached on the reader,
+        so looking up another statistic later doesn't touch the data.
+
+        :param indexes: list of band indexes
+        :param stat: one of 'min', 'max', 'mean' or 'stddev'
+        :returns: list with the statistic of every band in indexes
+        :rtype: list
+        """
+        indexes = list(indexes)
+        values = {}
+
+        for i in indexes:
+            if i in self._band_stats:
+                values[i] = self._band_stats[i][stat]
+                continue
+
+            try:
+                values[i] = self._get_band_tag(i, self._stat_tags[stat])
+            except KeyError:
+                pass
+
+        missing = [i for i in indexes if i not in values]
+
+        if missing:
+            for i, stats in zip(missing, self.compute_statistics(missing)):
+                values[i] = stats[stat]
+
+        return [values[i] for i in indexes]
+
+    def compute_statistics(self, indexes, bins=None):
+        """Compute min/max/mean/stddev for several bands in one pass.
+
+        Statistics are streamed over the dataset's block windows,  reading
+        all requested bands for a window with a single read. Results are
+        cached on the reader and in a sidecar file so later kernels can
+        reuse them. If bins is given a histogram with that many bins
+        between each band's min and max is included as well, this needs
+        a second pass over the data when the range is not yet known.
+
+        :param indexes: list of band indexes
+        :param bins: optional number of histogram bins
+        :returns: list of statistics dicts,  one per band in indexes
+        :rtype: list
+        """
+        indexes = list(indexes)
+
+        sidecar = StatisticsSidecar(self.path)
+
+        if any(i not in self._band_stats for i in indexes):
+            for i, stats in sidecar.load().items():
+                self._band_stats.setdefault(i, stats)
+
+        missing = [i for i in indexes if i not in self._band_stats]
+
+        if missing:
+            accumulators = [StatisticsAccumulator() for i in missing]
+
+            for window, data in self._iter_blocks(missing):
+                for acc, band in zip(accumulators, data):
+                    acc.update(band)
+
+            for i, acc in zip(missing, accumulators):
+                self._band_stats[i] = acc.result()
+
+        need_histogram = [
+            i for i in indexes if bins is not None and
+            self._band_stats[i]['min'] is not None and
+            len(self._band_stats[i].get('histogram', {}).get(
+                'counts', [])) != bins]
+
+        if need_histogram:
+            counts = [np.zeros(bins, dtype=np.int64) for i in need_histogram]
+            ranges = [(self._band_stats[i]['min'], self._band_stats[i]['max'])
+                      for i in need_histogram]
+
+            for window, data in self._iter_blocks(need_histogram):
+                for c, r, band in zip(counts, ranges, data):
+                    c += np.histogram(band.compressed(), bins=bins,
+                                      range=r)[0]
+
+            for i, c, r in zip(need_histogram, counts, ranges):
+                self._band_stats[i]['histogram'] = {
+                    'counts': c.tolist(),
+                    'edges': np.linspace(r[0], r[1], bins + 1).tolist()
+                }
+
+        if missing or need_histogram:
+            sidecar.save(self._band_stats)
+
+        return [self._band_stats[i] for i in indexes]
+
+    def _iter_blocks(self, indexes):
+        """Yield (window, [masked band data, ...]) for each block window."""
+        nodata = [self.get_band_nodata(i) for i in indexes]
+
+        for ji, window in self.dataset.block_windows():
+            data = self.dataset.read(indexes, window=window)
+            yield window, [np.ma.masked_values(band, nd)
+                           for band, nd in zip(data, nodata)]
+
     # Band level API
     @validate_index
     def get_band_min(self, index, **kwargs):
-        try:
-            return self._get_band_tag(index, BandStats.MIN)
-        except KeyError:
-            return self.get_band_data(index, masked=True).min()
+        return self.get_bands_stat([index], 'min')[0]
 
     @validate_index
     def get_band_max(self, index, **kwargs):
-        try:
-            return self._get_band_tag(index, BandStats.MAX)
-        except KeyError:
-            return self.get_band_data(index, masked=True).max()
+        return self.get_bands_stat([index], 'max')[0]
 
     @validate_index
     def get_band_mean(self, index, **kwargs):
-        try:
-            return self._get_band_tag(index, BandStats.MEAN)
-        except KeyError:
-            return self.get_band_data(index, masked=True).mean()
+        return self.get_bands_stat([index], 'mean')[0]
 
     @validate_index
     def get_band_stddev(self, index, **kwargs):
-        try:
-            return self._get_band_tag(index, BandStats.STDDEV)
-        except KeyError:
-            return self.get_band_data(index, masked=True).std()
+        return self.get_bands_stat([index], 'stddev')[0]
 
     @validate_index
     def get_band_nodata(self, index):
@@ -182,6 +755,60 @@ class RasterIOReader(object):
         else:
             return _get_band_data()
 
+    def get_bands_data(self, indexes, window=None, masked=True, out=None):
+        """Read several bands with a single read call.
+
+        Returns a band-last (rows, cols, bands) array. Bands are read
+        straight into it through a band-first view,  so no copy is made.
+        If out is given it must be a (rows, cols, bands) array of the
+        dataset's dtype and is filled in place. When masked, the mask
+        comes from the dataset's own mask bands.
+
+        :param indexes: list of band indexes
+        :param window: ((ulx, uly), (lrx, lry)) pixel window,  as for
+            get_band_data
+        :param masked: return a masked array
+        :param out: optional preallocated (rows, cols, bands) array
+        :returns: (rows, cols, bands) array
+        :rtype: numpy.ndarray or numpy.ma.MaskedArray
+        """
+        indexes = list(indexes)
+
+        if window is not None:
+            (ulx, uly), (lrx, lry) = window
+            window = ((ulx, lrx), (uly, lry))
+
+        if out is not None:
+            out = out.transpose(2, 0, 1)
+
+        data = self.dataset.read(indexes, window=window, out=out)
+
+        if masked:
+            data = np.ma.MaskedArray(
+                data,
+                mask=self.dataset.read_masks(indexes, window=window) == 0,
+                fill_value=self.get_band_nodata(indexes[0]))
+
+        return data.transpose(1, 2, 0)
+
+    @validate_index
+    def iter_band_data(self, index, masked=True):
+        """Stream a band one native block at a time.
+
+        Yields (window, data) tuples where window is a rasterio style
+        ((row_start, row_stop), (col_start, col_stop)) window. Memory use
+        is bounded by the dataset's block size rather than the band size.
+        """
+        nodata = self.get_band_nodata(index)
+
+        for ji, window in self.dataset.block_windows(index):
+            data = self.dataset.read(index, window=window)
+
+            if masked:
+                yield window, np.ma.masked_values(data, nodata)
+            else:
+                yield window, data
+
 
 class VRTReader(RasterIOReader):
     def __init__(self, uri, band_names=None):
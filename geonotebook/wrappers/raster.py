@@ -1,13 +1,17 @@
 import collections
+import numbers
 import os
 import re
 
 import numpy as np
 
-import pkg_resources as pr
-
+from rasterio.warp import transform_geom
 from shapely.geometry import Polygon
 
+from geonotebook import entry_points
+from geonotebook.utils import get_transformer
+from geonotebook.wrappers.file_reader import read_executor
+
 
 class RasterData(collections.Sequence):
     _default_schema = 'file'
@@ -16,6 +20,8 @@ class RasterData(collections.Sequence):
 
     _concrete_schema = {}
 
+    _zonal_stats = ('count', 'min', 'max', 'mean', 'std')
+
     @classmethod
     def register(cls, name, concrete_class):
         # TODO: some kind of validation on the API provided
@@ -24,9 +30,22 @@ class RasterData(collections.Sequence):
 
     @classmethod
     def discover_concrete_types(cls):
-        for ep in pr.iter_entry_points(
-                group='geonotebook.wrappers.raster_schema'):
-            cls.register(ep.name, ep.load())
+        """Register every reader of the raster_schema entry point.
+
+        This isn't required,  readers provided by entry points are looked
+        up (see entry_points) the first time their scheme is used.
+        """
+        for name, concrete_class in entry_points.load_all(
+                entry_points.RASTER_SCHEMA):
+            cls.register(name, concrete_class)
+
+    @classmethod
+    def concrete_type(cls, scheme):
+        """The reader class for a URI scheme,  e.g. 'file'."""
+        try:
+            return cls._concrete_schema[scheme]
+        except KeyError:
+            return entry_points.load(entry_points.RASTER_SCHEMA, scheme)
 
     @classmethod
     def is_valid(cls, uri):
@@ -37,7 +56,7 @@ class RasterData(collections.Sequence):
         else:
             return True
 
-    def __init__(self, uri, indexes=None):
+    def __init__(self, uri, indexes=None, reader=None):
         try:
 
             scheme = self._schema_parser.match(uri)
@@ -47,7 +66,9 @@ class RasterData(collections.Sequence):
             else:
                 scheme = scheme.group(1)
 
-            self.reader = self._concrete_schema[scheme](uri)
+            # Band subsets of a RasterData share its reader
+            self.reader = self.concrete_type(scheme)(uri) \
+                if reader is None else reader
 
         except KeyError:
             raise NotImplementedError(
@@ -68,6 +89,13 @@ class RasterData(collections.Sequence):
     def index(self, *args, **kwargs):
         return self.reader.index(*args, **kwargs)
 
+    def index_many(self, xs, ys, **kwargs):
+        if hasattr(self.reader, 'index_many'):
+            return self.reader.index_many(xs, ys, **kwargs)
+        else:
+            return [self.reader.index(x, y, **kwargs)
+                    for x, y in zip(xs, ys)]
+
     def subset(self, annotation, **kwargs):
         return annotation.subset(self, **kwargs)
 
@@ -77,12 +105,42 @@ class RasterData(collections.Sequence):
         else:
             return self.reader.get_band_ix(self.band_indexes, x, y)
 
-    def get_data(self, window=None, masked=True, axis=2, **kwargs):
+    def ix_many(self, xs, ys):
+        """Sample many WGS84 points at once.
+
+        All points are reprojected with a single transform and sampled
+        block by block from one open dataset.
+
+        :returns: (points, bands) masked array
+        :rtype: numpy.ma.MaskedArray
+        """
+        if hasattr(self.reader, 'sample_pixels'):
+            rows, cols = zip(*self.index_many(xs, ys)) if len(xs) else ([], [])
+            return self.sample_pixels(rows, cols)
+        else:
+            return np.ma.masked_values(
+                [self.reader.get_band_ix(self.band_indexes, x, y)
+                 for x, y in zip(xs, ys)], self.nodata)
+
+    def sample_pixels(self, rows, cols):
+        return self.reader.sample_pixels(self.band_indexes, rows, cols)
+
+    def get_data(self, window=None, masked=True, axis=2, out=None,
+                 **kwargs):
+        if out is not None:
+            return self._get_data_into(out, window=window, masked=masked,
+                                       axis=axis, **kwargs)
+
         if len(self) == 1:
             return self.reader.get_band_data(self.band_indexes[0],
                                              window=window,
                                              maksed=masked,
                                              **kwargs)
+        elif axis == 2 and hasattr(self.reader, 'get_bands_data'):
+            # Read all bands at once straight into a band-last array
+            return self.reader.get_bands_data(self.band_indexes,
+                                              window=window,
+                                              masked=masked)
         else:
             if masked:
                 # TODO: fix masked array hack here
@@ -100,46 +158,134 @@ class RasterData(collections.Sequence):
                                                            **kwargs)
                                  for i in self.band_indexes], axis=axis)
 
+    def _get_data_into(self, out, window=None, masked=True, axis=2,
+                       **kwargs):
+        """Read into the preallocated array out, as get_data would return.
+
+        Readers with get_bands_data read straight into out,  a single band
+        through a (rows, cols, 1) view of it. Otherwise the data is read as
+        usual and copied into out.
+        """
+        if hasattr(self.reader, 'get_bands_data') and \
+           (len(self) == 1 or axis == 2):
+            data = self.reader.get_bands_data(
+                self.band_indexes, window=window, masked=masked,
+                out=out[..., np.newaxis] if len(self) == 1 else out)
+
+            return data[..., 0] if len(self) == 1 else data
+
+        data = self.get_data(window=window, masked=masked, axis=axis,
+                             **kwargs)
+        out[...] = data
+        return data
+
     def __len__(self):
         return len(self.band_indexes)
 
     def __getitem__(self, keys):
         if isinstance(keys, int):
-            return RasterData(self.uri, indexes=[keys])
+            return RasterData(self.uri, indexes=[keys], reader=self.reader)
         elif all([isinstance(k, int) for k in keys]):
-            return RasterData(self.uri, indexes=keys)
+            return RasterData(self.uri, indexes=keys, reader=self.reader)
         else:
             raise IndexError(
                 "Bands may only be indexed by an int or a list of ints"
             )
 
+    def _band_stat(self, stat):
+        if hasattr(self.reader, 'get_bands_stat'):
+            # Computes the statistics of all selected bands in one pass
+            values = self.reader.get_bands_stat(self.band_indexes, stat)
+        else:
+            getter = getattr(self.reader, 'get_band_{}'.format(stat))
+            values = [getter(i) for i in self.band_indexes]
+
+        return values[0] if len(self) == 1 else values
+
     @property
     def min(self):
-        if len(self) == 1:
-            return self.reader.get_band_min(self.band_indexes[0])
-        else:
-            return [self.reader.get_band_min(i) for i in self.band_indexes]
+        return self._band_stat('min')
 
     @property
     def max(self):
-        if len(self) == 1:
-            return self.reader.get_band_max(self.band_indexes[0])
-        else:
-            return [self.reader.get_band_max(i) for i in self.band_indexes]
+        return self._band_stat('max')
 
     @property
     def mean(self):
-        if len(self) == 1:
-            return self.reader.get_band_mean(self.band_indexes[0])
-        else:
-            return [self.reader.get_band_mean(i) for i in self.band_indexes]
+        return self._band_stat('mean')
 
     @property
     def stddev(self):
+        return self._band_stat('stddev')
+
+    def zonal_stats(self, vector_data, stats=None, max_workers=4):
+        """Summarize the raster under every feature of vector_data.
+
+        Each raster block is read once and all features intersecting it
+        are reduced together (see RasterIOReader.zonal_stats).
+
+        :param vector_data: A VectorData,  or an iterable of GeoJSON-like
+                            features in WGS84
+        :param stats: subset of 'count', 'min', 'max', 'mean', 'std'
+        :param max_workers: number of threads reading blocks
+        :returns: One dict of statistics per feature. Values are lists
+                  with one entry per band for multi-band data.
+        :rtype: list
+        """
+        if not hasattr(self.reader, 'zonal_stats'):
+            raise NotImplementedError(
+                "{} does not support zonal statistics".format(
+                    self.reader.__class__.__name__))
+
+        stats = self._zonal_stats if stats is None else stats
+
+        if hasattr(vector_data, 'reader'):
+            # The features VectorData has already read and cached
+            features = vector_data.features
+            source_crs = getattr(vector_data.reader, 'crs', None)
+        else:
+            features = vector_data
+            source_crs = None
+
+        geometries = [transform_geom(source_crs or "EPSG:4326", self.crs,
+                                     feature['geometry'])
+                      for feature in features]
+
+        result = self.reader.zonal_stats(self.band_indexes, geometries,
+                                         max_workers=max_workers)
+
+        def _value(stat, i):
+            values = result[stat][:, i].tolist()
+            return values[0] if len(self) == 1 else values
+
+        return [{stat: _value(stat, i) for stat in stats}
+                for i in range(len(geometries))]
+
+    def compute_statistics(self, bins=None):
+        """Compute min, max, mean and stddev of every band in one pass.
+
+        Readers that support it compute the statistics for all selected
+        bands at once and cache them (see RasterIOReader.compute_statistics)
+        so subsequent min/max/mean/stddev lookups don't touch the data.
+
+        :param bins: optional number of histogram bins to include
+        :returns: A dict of statistics,  or a list of dicts for multiple bands
+        :rtype: dict or list
+        """
+        if hasattr(self.reader, 'compute_statistics'):
+            stats = self.reader.compute_statistics(self.band_indexes,
+                                                   bins=bins)
+        else:
+            stats = [{'min': self.reader.get_band_min(i),
+                      'max': self.reader.get_band_max(i),
+                      'mean': self.reader.get_band_mean(i),
+                      'stddev': self.reader.get_band_stddev(i)}
+                     for i in self.band_indexes]
+
         if len(self) == 1:
-            return self.reader.get_band_stddev(self.band_indexes[0])
+            return stats[0]
         else:
-            return [self.reader.get_band_stddev(i) for i in self.band_indexes]
+            return stats
 
     @property
     def nodata(self):
@@ -157,6 +303,16 @@ class RasterData(collections.Sequence):
             (ulx, lry),
             (ulx, uly)])
 
+    @property
+    def wgs84_shape(self):
+        """The data's footprint reprojected to WGS84,  computed once."""
+        if getattr(self, '_wgs84_shape', None) is None:
+            xs, ys = zip(*self.shape.exterior.coords)
+            self._wgs84_shape = Polygon(
+                list(zip(*get_transformer(self.crs, "EPSG:4326")(xs, ys))))
+
+        return self._wgs84_shape
+
     @property
     def crs(self):
         return self.reader.crs
@@ -174,9 +330,6 @@ class RasterData(collections.Sequence):
         return os.path.splitext(os.path.basename(self.uri))[0]
 
 
-RasterData.discover_concrete_types()
-
-
 class RasterDataCollection(collections.Sequence):
     def __init__(self, items, verify=True, indexes=None):
 
@@ -212,7 +365,7 @@ class RasterDataCollection(collections.Sequence):
         except (KeyError, TypeError, IndexError):
             key, bands = args, None
 
-        if isinstance(bands, int):
+        if isinstance(bands, numbers.Integral):
             bands = [bands]
 
         if isinstance(key, slice):
@@ -222,7 +375,7 @@ class RasterDataCollection(collections.Sequence):
                 indexes=self.band_indexes if bands is None else bands,
                 verify=False
             )
-        elif isinstance(key, int):
+        elif isinstance(key, numbers.Integral):
             return RasterData(
                 self._items[key],
                 indexes=self.band_indexes if bands is None else bands
@@ -263,6 +416,12 @@ class RasterDataCollection(collections.Sequence):
         else:
             return [rd.stddev for rd in self]
 
+    def compute_statistics(self, bins=None):
+        if len(self) == 1:
+            return self[0].compute_statistics(bins=bins)
+        else:
+            return [rd.compute_statistics(bins=bins) for rd in self]
+
     @property
     def nodata(self):
         # HACK: assume nodata is consistent across
@@ -277,16 +436,76 @@ class RasterDataCollection(collections.Sequence):
                 [rd.ix(*args, **kwargs) for rd in self],
                 self.__getitem__((0, 1)).nodata)
 
+    def ix_many(self, xs, ys, max_workers=4):
+        """Sample many WGS84 points from every time slice.
+
+        Points are indexed once (assuming all slices share a grid, as
+        index() does) and every slice is then sampled from its own open
+        dataset,  concurrently across slices.
+
+        :returns: (points, time, bands) masked array
+        :rtype: numpy.ma.MaskedArray
+        """
+        first = self[0]
+
+        if hasattr(first.reader, 'sample_pixels'):
+            rows, cols = zip(*first.index_many(xs, ys)) \
+                if len(xs) else ([], [])
+
+            def _sample(rd):
+                return rd.sample_pixels(rows, cols)
+        else:
+            def _sample(rd):
+                return rd.ix_many(xs, ys)
+
+        sample = _sample(first)
+        data = np.ma.masked_all(
+            (sample.shape[0], len(self), sample.shape[1]), dtype=sample.dtype)
+        data[:, 0] = sample
+
+        def _read(i):
+            data[:, i] = _sample(self[i])
+
+        if len(self) > 1:
+            list(read_executor(max_workers).map(_read, range(1, len(self))))
+
+        return data
+
     def get_data(self, *args, **kwargs):
+        """Read data for every time slice into a (t, y, x[, b]) array.
+
+        Slices are read concurrently on a thread pool (max_workers) into
+        a single preallocated array. With lazy=True nothing is read up
+        front,  instead a LazyRasterArray is returned that reads slices
+        on demand.
+        """
+        max_workers = kwargs.pop("max_workers", 4)
+
+        if kwargs.pop("lazy", False):
+            return LazyRasterArray(self, args, kwargs)
+
         masked = kwargs.get("masked", True)
         # TODO: fixed masked array hack here
+        kwargs["masked"] = False
+
+        # The first slice determines the shape and dtype of the result,
+        # every other slice is read straight into it.
+        first = self[0].get_data(*args, **kwargs)
+        data = np.empty((len(self),) + first.shape, dtype=first.dtype)
+        data[0] = first
+
+        def _read(i):
+            self[i].get_data(*args, out=data[i], **kwargs)
+
+        if len(self) > 1:
+            # list() so that exceptions from the workers are raised
+            list(read_executor(max_workers).map(_read, range(1, len(self))))
+
         if masked:
-            kwargs["masked"] = False
             return np.ma.masked_values(
-                np.array([rd.get_data(*args, **kwargs) for rd in self]),
-                self.__getitem__((0, 1)).nodata)
+                data, self.__getitem__((0, 1)).nodata, copy=False)
         else:
-            return np.array([rd.get_data(*args, **kwargs) for rd in self])
+            return data
 
     def get_names(self):
         return [rd.name for rd in self]
@@ -295,3 +514,88 @@ class RasterDataCollection(collections.Sequence):
         # TODO: Fix this so it doesn't just assume
         #       index is consistent across timesteps
         return self.__getitem__(0).index(*args, **kwargs)
+
+    def index_many(self, *args, **kwargs):
+        return self.__getitem__(0).index_many(*args, **kwargs)
+
+    @property
+    def wgs84_shape(self):
+        # NOTE: Assumes all datasets in collection have the same footprint
+        if getattr(self, '_wgs84_shape', None) is None:
+            self._wgs84_shape = self[0].wgs84_shape
+
+        return self._wgs84_shape
+
+
+class LazyRasterArray(object):
+    """A lazily evaluated (t, y, x[, b]) array over a RasterDataCollection.
+
+    Each time slice is a chunk that is only read when it is indexed,
+    iterated over or when the whole array is computed. This allows
+    working through collections that do not fit in memory at once.
+    """
+
+    def __init__(self, collection, args=(), kwargs=None):
+        self.collection = collection
+        self._args = args
+        self._kwargs = {} if kwargs is None else kwargs
+        self._sample = None
+
+    def __repr__(self):
+        return "<{}(shape={}, dtype={})>".format(
+            self.__class__.__name__, self.shape, self.dtype)
+
+    def __len__(self):
+        return len(self.collection)
+
+    def _read(self, key):
+        return self.collection[key].get_data(*self._args, **self._kwargs)
+
+    @property
+    def _template(self):
+        # Shape and dtype are taken from the first slice
+        if self._sample is None:
+            self._sample = self._read(0)
+        return self._sample
+
+    @property
+    def shape(self):
+        return (len(self),) + self._template.shape
+
+    @property
+    def dtype(self):
+        return self._template.dtype
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def chunks(self):
+        return ((1,) * len(self),) + tuple((n,) for n in self.shape[1:])
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            key, rest = key[0], key[1:]
+        else:
+            rest = ()
+
+        if isinstance(key, numbers.Integral):
+            data = self._read(key)
+        elif isinstance(key, slice):
+            data = self._read(key)
+            rest = (slice(None),) + rest
+        else:
+            raise IndexError("Time may only be indexed by an int or a slice")
+
+        return data[rest] if rest else data
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._read(i)
+
+    def compute(self):
+        return self.collection.get_data(*self._args, **self._kwargs)
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.compute(), dtype=dtype)
@@ -1,9 +1,16 @@
 import collections
+import os
+import time
 
-import fiona
+from shapely.geometry import shape
 import six
 
 from .. import annotations
+from .. import topology
+from ..spatial import SpatialIndex
+
+# Seconds between checks for changes to the file behind a VectorData
+CHECK_INTERVAL = 1.0
 
 
 class VectorData(collections.Sequence):
@@ -13,38 +20,140 @@ class VectorData(collections.Sequence):
         # added to a layer
         self.layer = None
         if isinstance(path, six.string_types):
+            # Only needed for vector data,  not every user of the wrappers
+            import fiona
             self.reader = fiona.open(path)
         else:
             self.reader = path
 
+    @property
+    def reader(self):
+        return self._reader
+
+    @reader.setter
+    def reader(self, reader):
+        self._reader = reader
+        self._reset_cache()
+
+    def _reset_cache(self):
+        self._features = None
+        self._features_mtime = None
+        self._checked = None
+        self._geojson = None
+        self._topojson = {}
+        self._spatial_index = None
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(self.reader.path)
+        except (AttributeError, OSError, TypeError):
+            # e.g. a virtual file system path or an in memory reader
+            return None
+
+    @property
+    def features(self):
+        """The features of the dataset as a list.
+
+        Features are decoded from the reader the first time they are
+        needed and shared by geojson, points, polygons, the spatial index
+        and item access. They are read again if the reader is replaced or
+        the file is modified,  which is checked at most once every
+        CHECK_INTERVAL seconds. NB: The features should not be modified.
+        """
+        now = time.time()
+        if self._features is not None and \
+           now - self._checked < CHECK_INTERVAL:
+            return self._features
+
+        mtime = self._mtime()
+        if self._features is None or mtime != self._features_mtime:
+            self._reset_cache()
+            self._features = list(self.reader)
+            self._features_mtime = mtime
+
+        self._checked = now
+        return self._features
+
     def __len__(self):
-        return len(self.reader)
+        return len(self.features)
+
+    @property
+    def spatial_index(self):
+        """A SpatialIndex of feature ids,  built on first use."""
+        features = self.features
+
+        if self._spatial_index is None:
+            geometries, ids = [], []
+            for i, feature in enumerate(features):
+                if feature.get('geometry') is not None:
+                    geometries.append(shape(feature['geometry']))
+                    ids.append(i)
+
+            self._spatial_index = SpatialIndex(geometries, ids)
+
+        return self._spatial_index
+
+    def intersecting(self, geometry):
+        """Features intersecting a geometry, bbox or (x, y) point."""
+        return [self[i] for i in self.spatial_index.intersects(geometry)]
+
+    def containing(self, geometry):
+        """Features containing a geometry or (x, y) point."""
+        return [self[i] for i in self.spatial_index.contains(geometry)]
 
     def __getitem__(self, key):
-        # fiona doesn't raise an error when accessing and invalid key
-        if key < 0 or key >= len(self):
+        features = self.features
+        if key < 0 or key >= len(features):
             raise IndexError()
-        return self.reader[key]
+        return features[key]
 
     @property
     def geojson(self):
         """Return an object (geojson) representation."""
-        features = list(self.reader)
-
-        # Here, we add an id property to each feature which will
-        # be used for styling on the client.
-        for i, feature in enumerate(features):
-            properties = feature.setdefault('properties', {})
-            properties['_geonotebook_feature_id'] = i
-        return {
-            'type': 'FeatureCollection',
-            'features': features
-        }
+        features = self.features
+
+        if self._geojson is None:
+            # Here, we add an id property to each feature which will
+            # be used for styling on the client. The cached features are
+            # shallow copied so that their own properties are left alone.
+            geojson_features = []
+            for i, feature in enumerate(features):
+                feature = dict(feature)
+                feature['properties'] = dict(
+                    feature.get('properties') or {},
+                    _geonotebook_feature_id=i)
+                geojson_features.append(feature)
+
+            self._geojson = {
+                'type': 'FeatureCollection',
+                'features': geojson_features
+            }
+
+        return self._geojson
+
+    def topojson(self, zoom=None, quantization=None, tolerance=None):
+        """Return a quantized,  simplified TopoJSON representation.
+
+        Features are simplified to the resolution of the given web map
+        zoom level (or to an explicit tolerance in degrees) and encoded
+        with shared,  delta encoded arcs.  See geonotebook.topology.
+        Encodings are cached per (zoom, quantization, tolerance) along
+        with the features.
+        """
+        features = self.geojson['features']
+        key = (zoom, quantization, tolerance)
+
+        try:
+            return self._topojson[key]
+        except KeyError:
+            return self._topojson.setdefault(key, topology.topojson(
+                features, zoom=zoom, quantization=quantization,
+                tolerance=tolerance))
 
     @property
     def points(self):
         """Return a generator of "Point" annotation objects."""
-        for feature in self.reader:
+        for feature in self.features:
             geometry = feature['geometry']
             if geometry['type'] == 'Point':
                 coords = geometry['coordinates']
@@ -60,7 +169,7 @@ class VectorData(collections.Sequence):
     @property
     def polygons(self):
         """Return a generator of "Polygon" annotation objects."""
-        for feature in self.reader:
+        for feature in self.features:
             geometry = feature['geometry']
             if geometry['type'] == 'Polygon':
                 coords = geometry['coordinates']
@@ -3,6 +3,8 @@ import Split from 'split.js';
 
 import MapObject from 'map_renderer';
 import {
+  decode_buffers,
+  encode_buffers,
   is_response,
   is_request,
   response,
@@ -28,11 +30,14 @@ var Geonotebook = function (Jupyter, events) {
 };
 
 Geonotebook.prototype._unwrap = function (msg) {
-  return msg.content.data;
+  // Replace references to binary buffers with their payloads
+  return decode_buffers(msg.content.data, msg.buffers);
 };
 
+// Typed arrays in msg are sent as binary comm buffers
 Geonotebook.prototype.send_msg = function (msg) {
-  this.comm.send(msg);
+  const encoded = encode_buffers(msg);
+  this.comm.send(encoded.msg, undefined, undefined, encoded.buffers);
 };
 
 Geonotebook.prototype.get_object = function (msg) {
@@ -97,6 +102,46 @@ Geonotebook.prototype.refresh_map_state = function () {
   });
 };
 
+// Call the map method requested by msg and return the response message
+Geonotebook.prototype.handle_request = function (msg) {
+  // Apply the map method from the msg on the parameters
+  var obj = this.get_object(msg);
+
+  if (obj[msg.method] !== undefined) {
+    var result = obj[msg.method].apply(
+      this.map, this.resolve_arg_list(obj[msg.method], msg));
+    // Reply with the result of the call
+    return response(result, null, msg.id);
+  } else {
+    throw constants.MethodNotfound('Method ' + msg.method + ' not found!');
+  }
+};
+
+// Handle a JSON-RPC batch,  responses are resolved and requests are
+// replied to with a single batch of results.
+Geonotebook.prototype.recv_batch = function (batch) {
+  var results = [];
+
+  _.each(batch, (msg) => {
+    if (is_response(msg)) {
+      this._remote.resolve(msg);
+    } else if (is_request(msg)) {
+      try {
+        results.push(this.handle_request(msg));
+      } catch (ex) {
+        results.push(response(null, ex, msg.id));
+      }
+    } else {
+      results.push(
+        response(null, constants.ParseError('Could not parse message'), msg.id));
+    }
+  });
+
+  if (results.length) {
+    this.send_msg(results);
+  }
+};
+
 Geonotebook.prototype.recv_msg = function (message) {
   var msg = this._unwrap(message);
   // TODO: move this into request/response like a
@@ -113,22 +158,14 @@ Geonotebook.prototype.recv_msg = function (message) {
     // We should probably be doing this with an event system
     this.refresh_map_state();
   } else if (this.protocol_negotiation_complete) {
+    if (_.isArray(msg)) {
+      this.recv_batch(msg);
     // Pass response messages on to remote to be resolved
-    if (is_response(msg)) {
+    } else if (is_response(msg)) {
       this._remote.resolve(msg);
     } else if (is_request(msg)) {
       try {
-        // Apply the map method from the msg on the parameters
-        var obj = this.get_object(msg);
-
-        if (obj[msg.method] !== undefined) {
-          var result = obj[msg.method].apply(
-            this.map, this.resolve_arg_list(obj[msg.method], msg));
-          // Reply with the result of the call
-          this.send_msg(response(result, null, msg.id));
-        } else {
-          throw constants.MethodNotfound('Method ' + msg.method + ' not found!');
-        }
+        this.send_msg(this.handle_request(msg));
       } catch (ex) {
         // If we catch an error report it back to the RPC caller
         this.send_msg(response(null, ex, msg.id));
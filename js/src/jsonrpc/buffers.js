@@ -0,0 +1,122 @@
+import _ from 'underscore';
+
+// Large payloads are sent out-of-band as comm message buffers.  In the
+// JSON-RPC message they are replaced with a reference of the form:
+//
+//   {$buffer: <index into the message buffers>,
+//    encoding: 'ndarray' | 'json' | 'raw',
+//    // For 'ndarray' only
+//    dtype: 'float64', shape: [...]}
+//
+// See geonotebook/jsonrpc.py for the kernel side of the protocol.
+
+const typed_arrays = {
+  int8: Int8Array,
+  uint8: Uint8Array,
+  int16: Int16Array,
+  uint16: Uint16Array,
+  int32: Int32Array,
+  uint32: Uint32Array,
+  float32: Float32Array,
+  float64: Float64Array
+};
+
+function dtype_of (array) {
+  return _.findKey(typed_arrays, (TypedArray) => array instanceof TypedArray);
+}
+
+function is_buffer_ref (obj) {
+  return _.isObject(obj) && !_.isArray(obj) && _.has(obj, '$buffer');
+}
+
+function is_plain_object (obj) {
+  return _.isObject(obj) && obj.constructor === Object;
+}
+
+// Split a flat typed array into nested arrays of (cheap) subarray views
+function reshape (array, shape) {
+  if (shape.length <= 1) {
+    return array;
+  }
+  const size = _.reduce(shape.slice(1), (a, b) => a * b, 1);
+  return _.map(_.range(shape[0]), (i) => {
+    return reshape(array.subarray(i * size, (i + 1) * size), shape.slice(1));
+  });
+}
+
+function decode_buffer (ref, buffers) {
+  const view = buffers[ref.$buffer];
+  const encoding = ref.encoding || 'raw';
+
+  if (encoding === 'ndarray') {
+    // Copy the bytes so that the typed array is correctly aligned
+    const bytes = view.buffer.slice(view.byteOffset, view.byteOffset + view.byteLength);
+    return reshape(new typed_arrays[ref.dtype](bytes), ref.shape);
+  } else if (encoding === 'json') {
+    return JSON.parse(new TextDecoder('utf-8').decode(view));
+  }
+  return view;
+}
+
+/**
+ * Replace buffer references in a message with their payloads.
+ *
+ * @param {object|object[]} msg A JSON-RPC message or batch
+ * @param {DataView[]} buffers The buffers of the comm message
+ * @returns {object|object[]} The decoded message
+ */
+function decode_buffers (msg, buffers) {
+  if (_.isEmpty(buffers)) {
+    return msg;
+  }
+
+  const decode = (obj) => {
+    if (is_buffer_ref(obj)) {
+      return decode_buffer(obj, buffers);
+    } else if (_.isArray(obj)) {
+      return _.map(obj, decode);
+    } else if (is_plain_object(obj)) {
+      return _.mapObject(obj, decode);
+    }
+    return obj;
+  };
+
+  return decode(msg);
+}
+
+/**
+ * Move typed arrays and array buffers in a message into binary buffers.
+ *
+ * @param {object|object[]} msg A JSON-RPC message or batch
+ * @returns {object} The encoded message and the list of buffers
+ */
+function encode_buffers (msg) {
+  const buffers = [];
+
+  const encode = (obj) => {
+    if (ArrayBuffer.isView(obj) && dtype_of(obj)) {
+      buffers.push(obj);
+      return {
+        $buffer: buffers.length - 1,
+        encoding: 'ndarray',
+        dtype: dtype_of(obj),
+        shape: [obj.length]
+      };
+    } else if (obj instanceof ArrayBuffer) {
+      buffers.push(obj);
+      return {$buffer: buffers.length - 1, encoding: 'raw'};
+    } else if (_.isArray(obj)) {
+      return _.map(obj, encode);
+    } else if (is_plain_object(obj)) {
+      return _.mapObject(obj, encode);
+    }
+    return obj;
+  };
+
+  return {msg: encode(msg), buffers};
+}
+
+export {
+  decode_buffers,
+  encode_buffers
+};
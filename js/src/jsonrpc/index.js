@@ -1,4 +1,5 @@
 import annotate from './annotate';
+import { decode_buffers, encode_buffers } from './buffers';
 import request from './request';
 import response from './response';
 import Remote from './Remote';
@@ -16,6 +17,8 @@ function is_response (msg) {
 export {
   annotate,
   constants,
+  decode_buffers,
+  encode_buffers,
   request,
   response,
   is_request,
@@ -2,6 +2,7 @@ import _ from 'underscore';
 
 import annotate from '../jsonrpc/annotate';
 import * as constants from '../jsonrpc/constants';
+import topojson_to_geojson from './topojson';
 
 /**
  * Get 4 random hex digits for guid generation.
@@ -70,6 +71,7 @@ const annotation_types = {
  *   * _add_osm_layer(name, url, vis, query)
  *   * _add_wms_layer(name, url, vis, query)
  *   * _add_vector_layer(name, data, vis, query)
+ *   * _add_vector_tile_layer(name, url, vis, query)
  *   * _add_tiled_layer(name, data, vis, query)
  *   * _remove_layer(name, layer)
  *   * _add_annotation(type, geojson)
@@ -88,6 +90,13 @@ class MapObject {
     this.region = null;
     this.layers = {};
     this.msg_types = msg_types;
+
+    // TopoJSON encoded vector layers are refreshed from the kernel with
+    // features simplified for the current zoom level.
+    this.topojson_layers = {};
+    this._refresh_topojson_layers = _.debounce(
+      () => this.refresh_topojson_layers(), 250
+    );
   }
 
   /**
@@ -127,6 +136,7 @@ class MapObject {
   add_layer (layer_name, vis_url, vis_params, query_params) {
     let layer = null;
     const layer_type = vis_params.layer_type;
+    const topojson_layer = this.topojson_layers[layer_name];
 
     this.remove_layer(layer_name);
 
@@ -137,7 +147,17 @@ class MapObject {
     } else if (layer_type === 'osm') {
       layer = this._add_osm_layer(layer_name, vis_url, vis_params, query_params);
     } else if (layer_type === 'vector') {
+      if (vis_params.encoding === 'topojson') {
+        this.topojson_layers[layer_name] = {
+          zoom: topojson_layer ? topojson_layer.zoom : null,
+          vis_params,
+          query_params
+        };
+        vis_url = topojson_to_geojson(vis_url);
+      }
       layer = this._add_vector_layer(layer_name, vis_url, vis_params, query_params);
+    } else if (layer_type === 'vector_tile') {
+      layer = this._add_vector_tile_layer(layer_name, vis_url, vis_params, query_params);
     } else {
       layer = this._add_tiled_layer(layer_name, vis_url, vis_params, query_params);
     }
@@ -244,9 +264,44 @@ class MapObject {
       this._remove_layer(layer_name, this.layers[layer_name]);
       delete this.layers[layer_name];
     }
+    delete this.topojson_layers[layer_name];
     return layer_name;
   }
 
+  /**
+   * Called by the map renderer when the zoom level changes.
+   *
+   * @param {number} zoom The new (integer) zoom level
+   */
+  on_zoom (zoom) {
+    this.zoom = zoom;
+    this._refresh_topojson_layers();
+  }
+
+  /**
+   * Request features simplified for the current zoom level for every
+   * TopoJSON encoded vector layer that was rendered at another zoom.
+   */
+  refresh_topojson_layers () {
+    const zoom = this.zoom;
+
+    _.each(this.topojson_layers, (layer, layer_name) => {
+      if (layer.zoom === zoom) {
+        return;
+      }
+      layer.zoom = zoom;
+
+      this.notebook._remote.get_vector_data(layer_name, zoom).then(
+        (data) => {
+          // The layer may have been removed in the meantime
+          if (this.topojson_layers[layer_name] === layer) {
+            this.update_layer(layer_name, data, layer.vis_params, layer.query_params);
+          }
+        }, this.rpc_error.bind(this)
+      );
+    });
+  }
+
   /**
    * Add an annotation from a serialization.
    *
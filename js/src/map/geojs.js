@@ -16,6 +16,9 @@ class GeoJSMap extends BaseMap {
       node: this.node,
       allowRotation: false
     });
+    this.geojsmap.geoOn(geo_event.zoom, (evt) => {
+      this.on_zoom(Math.round(evt.zoomLevel));
+    });
   }
 
   _resize (size) {
@@ -174,6 +177,13 @@ class GeoJSMap extends BaseMap {
     return layer;
   }
 
+  _add_vector_tile_layer (name, url, vis, query) {
+    // geojs has no vector tile support,  use the 'ol' renderer or add
+    // the layer with tiled=False to send it as GeoJSON instead.
+    console.error('Vector tile layers are not supported by the geojs renderer');
+    return null;
+  }
+
   _remove_layer (name, layer) {
     this.geojsmap.deleteLayer(layer);
   }
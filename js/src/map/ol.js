@@ -7,16 +7,19 @@ import View from 'ol/view';
 import condition from 'ol/events/condition';
 
 import GeoJSON from 'ol/format/geojson';
+import MVT from 'ol/format/mvt';
 
 import interaction from 'ol/interaction';
 import Draw from 'ol/interaction/draw';
 
 import VectorLayer from 'ol/layer/vector';
 import TileLayer from 'ol/layer/tile';
+import VectorTileLayer from 'ol/layer/vectortile';
 
 import VectorSource from 'ol/source/vector';
 import XYZ from 'ol/source/xyz';
 import TileWMS from 'ol/source/tilewms';
+import VectorTileSource from 'ol/source/vectortile';
 
 import Circle from 'ol/style/circle';
 import Fill from 'ol/style/fill';
@@ -35,6 +38,9 @@ class OlMap extends BaseMap {
       }),
       interactions: interaction.defaults({doubleClickZoom: false})
     });
+    this.olmap.on('moveend', () => {
+      this.on_zoom(Math.round(this.olmap.getView().getZoom()));
+    });
     this._annotations = new Collection();
     this._overlay = null;
     this._format = new GeoJSON({
@@ -116,33 +122,54 @@ class OlMap extends BaseMap {
     return layer;
   }
 
-  _add_vector_layer (name, data, vis, query) {
+  _vector_style (vis) {
     var colors = (vis || {}).colors || ['#b0de5c'];
     var stroke = new Stroke({
       color: 'black',
       width: 2
     });
 
+    return (feature) => {
+      var index = feature.getProperties()._geonotebook_feature_id % colors.length;
+      var color = colors[index];
+      var fill = new Fill({
+        color
+      });
+      return new Style({
+        fill,
+        stroke,
+        image: new Circle({
+          fill,
+          stroke,
+          radius: 8
+        })
+      });
+    };
+  }
+
+  _add_vector_layer (name, data, vis, query) {
     var layer = new VectorLayer({
       source: new VectorSource({
         features: this._format.readFeatures(data)
       }),
-      style: (feature) => {
-        var index = feature.getProperties()._geonotebook_feature_id % colors.length;
-        var color = colors[index];
-        var fill = new Fill({
-          color
-        });
-        return new Style({
-          fill,
-          stroke,
-          image: new Circle({
-            fill,
-            stroke,
-            radius: 8
-          })
-        });
-      },
+      style: this._vector_style(vis),
+      opacity: 0.8
+    });
+    this.olmap.addLayer(layer);
+    return layer;
+  }
+
+  _add_vector_tile_layer (name, url, vis, query) {
+    var params = '';
+    if ($.param(query)) {
+      params = '?' + $.param(query);
+    }
+    var layer = new VectorTileLayer({
+      source: new VectorTileSource({
+        format: new MVT(),
+        url: `${url}/{x}/{y}/{z}.mvt${params}`
+      }),
+      style: this._vector_style(vis),
       opacity: 0.8
     });
     this.olmap.addLayer(layer);
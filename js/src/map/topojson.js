@@ -0,0 +1,113 @@
+import _ from 'underscore';
+
+/**
+ * Decode the TopoJSON generated by geonotebook.topology into a GeoJSON
+ * FeatureCollection.  This supports the subset of the specification
+ * that the kernel produces:  a single GeometryCollection object with
+ * (optionally) quantized, delta encoded arcs.
+ */
+
+function decode_arcs (topology) {
+  const transform = topology.transform;
+
+  return _.map(topology.arcs, (arc) => {
+    if (!transform) {
+      return arc;
+    }
+
+    const [kx, ky] = transform.scale;
+    const [tx, ty] = transform.translate;
+    let x = 0;
+    let y = 0;
+
+    return _.map(arc, (position) => {
+      x += position[0];
+      y += position[1];
+      return [x * kx + tx, y * ky + ty];
+    });
+  });
+}
+
+function decode_position (topology, position) {
+  const transform = topology.transform;
+  if (!transform) {
+    return position;
+  }
+  return [
+    position[0] * transform.scale[0] + transform.translate[0],
+    position[1] * transform.scale[1] + transform.translate[1]
+  ];
+}
+
+function decode_line (arcs, indexes) {
+  const coordinates = [];
+
+  _.each(indexes, (index) => {
+    // Negative indexes (~i) refer to arc i reversed
+    let arc = index < 0 ? arcs[~index].slice().reverse() : arcs[index];
+
+    // Consecutive arcs share their end points
+    if (coordinates.length) {
+      arc = arc.slice(1);
+    }
+    _.each(arc, (position) => coordinates.push(position));
+  });
+
+  return coordinates;
+}
+
+function decode_geometry (topology, arcs, geometry) {
+  const type = geometry.type;
+  const line = (indexes) => decode_line(arcs, indexes);
+  const position = (p) => decode_position(topology, p);
+
+  if (type === 'Point') {
+    return {type, coordinates: position(geometry.coordinates)};
+  } else if (type === 'MultiPoint') {
+    return {type, coordinates: _.map(geometry.coordinates, position)};
+  } else if (type === 'LineString') {
+    return {type, coordinates: line(geometry.arcs)};
+  } else if (type === 'MultiLineString' || type === 'Polygon') {
+    return {type, coordinates: _.map(geometry.arcs, line)};
+  } else if (type === 'MultiPolygon') {
+    return {
+      type,
+      coordinates: _.map(geometry.arcs, (polygon) => _.map(polygon, line))
+    };
+  } else if (type === 'GeometryCollection') {
+    return {
+      type,
+      geometries: _.map(geometry.geometries, (g) => decode_geometry(topology, arcs, g))
+    };
+  }
+  return null;
+}
+
+/**
+ * Convert a TopoJSON topology to a GeoJSON FeatureCollection.
+ *
+ * @param {object} topology A TopoJSON Topology
+ * @param {string} name The name of the object to convert
+ * @returns {object} A GeoJSON FeatureCollection
+ */
+function topojson_to_geojson (topology, name = 'features') {
+  const arcs = decode_arcs(topology);
+  const object = topology.objects[name] || {geometries: []};
+
+  return {
+    type: 'FeatureCollection',
+    features: _.map(object.geometries, (geometry) => {
+      const feature = {
+        type: 'Feature',
+        properties: geometry.properties || {},
+        geometry: decode_geometry(topology, arcs, geometry)
+      };
+      if (geometry.id !== undefined) {
+        feature.id = geometry.id;
+      }
+      return feature;
+    })
+  };
+}
+
+export default topojson_to_geojson;
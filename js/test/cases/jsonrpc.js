@@ -114,4 +114,35 @@ describe('jsonrpc', function () {
       expect(message).to.match(/Could not evaluate/);
     });
   });
+
+  describe('buffers', function () {
+    it('round trip typed arrays', function () {
+      var data = new Float32Array([1, 2, 3, 4]);
+      var encoded = jsonrpc.encode_buffers({params: [{value: data}, 'a']});
+
+      expect(encoded.msg).to.eql({params: [{value: {
+        $buffer: 0, encoding: 'ndarray', dtype: 'float32', shape: [4]
+      }}, 'a']});
+      expect(encoded.buffers).to.eql([data]);
+
+      var decoded = jsonrpc.decode_buffers(
+        encoded.msg, [new DataView(data.buffer)]);
+      expect(Array.from(decoded.params[0].value)).to.eql([1, 2, 3, 4]);
+    });
+    it('decode nd arrays', function () {
+      var data = new Float64Array([1, 2, 3, 4, 5, 6]);
+      var decoded = jsonrpc.decode_buffers(
+        {$buffer: 0, encoding: 'ndarray', dtype: 'float64', shape: [3, 2]},
+        [new DataView(data.buffer)]);
+
+      expect(_.map(decoded, (row) => Array.from(row))).to.eql(
+        [[1, 2], [3, 4], [5, 6]]);
+    });
+    it('decode json', function () {
+      var bytes = new TextEncoder('utf-8').encode('{"type":"Feature"}');
+      expect(jsonrpc.decode_buffers(
+        {result: {$buffer: 0, encoding: 'json'}},
+        [new DataView(bytes.buffer)])).to.eql({result: {type: 'Feature'}});
+    });
+  });
 });
@@ -18,6 +18,7 @@ class MockImplementation extends MapObject {
       '_add_osm_layer',
       '_add_wms_layer',
       '_add_vector_layer',
+      '_add_vector_tile_layer',
       '_add_tiled_layer',
       '_remove_layer',
       '_add_annotation',
@@ -166,6 +167,57 @@ describe('base map object', () => {
       sinon.assert.calledWith(map._remove_layer, 'a');
     });
 
+    it('vector topojson', () => {
+      const params = {
+        layer_type: 'vector',
+        encoding: 'topojson'
+      };
+      const topology = {
+        type: 'Topology',
+        transform: {scale: [2, 1], translate: [10, 20]},
+        objects: {
+          features: {
+            type: 'GeometryCollection',
+            geometries: [
+              {type: 'LineString', arcs: [0, ~1], properties: {a: 1}},
+              {type: 'Point', coordinates: [1, 1], properties: {}}
+            ]
+          }
+        },
+        arcs: [[[0, 0], [1, 0]], [[2, 2], [-1, -2]]]
+      };
+
+      map.add_layer('a', topology, params, 'query');
+
+      // check the topology is decoded to geojson
+      sinon.assert.calledOnce(map._add_vector_layer);
+      const features = map._add_vector_layer.getCall(0).args[1].features;
+      expect(features[0].geometry.coordinates).to.eql(
+        [[10, 20], [12, 20], [14, 22]]
+      );
+      expect(features[0].properties).to.eql({a: 1});
+      expect(features[1].geometry.coordinates).to.eql([12, 21]);
+      expect(_.keys(map.topojson_layers)).to.eql(['a']);
+
+      map.remove_layer('a');
+      expect(map.topojson_layers).to.eql({});
+    });
+
+    it('vector_tile', () => {
+      const params = {
+        layer_type: 'vector_tile'
+      };
+      map._add_vector_tile_layer.returns('layer object');
+
+      expect(
+        map.add_layer('a', 'url', params, 'query')
+      ).to.be('a');
+
+      // check delegation to _add_vector_tile_layer
+      sinon.assert.calledOnce(map._add_vector_tile_layer);
+      sinon.assert.calledWith(map._add_vector_tile_layer, 'a', 'url');
+    });
+
     it('default', () => {
       const params = {};
       map._add_tiled_layer.returns('layer object');
@@ -8,7 +8,7 @@ import numpy as np
 import pytest
 from rasterio.crs import CRS
 
-from geonotebook import layers
+from geonotebook import config, layers
 from geonotebook.wrappers import RasterData, RasterDataCollection
 from geonotebook.wrappers.file_reader import validate_index
 
@@ -260,6 +260,12 @@ url = http://0.0.0.0:8080/geoserver
 """
 
 
+@pytest.fixture(autouse=True)
+def clear_config_cache():
+    """Don't share parsed configuration between tests."""
+    config.Config.clear_cache()
+
+
 @pytest.fixture
 def geonotebook_ini(tmpdir):
     p = tmpdir.mkdir('config').join("geonotebook.ini")
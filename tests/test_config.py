@@ -154,3 +154,34 @@ def test_vis_server_invalid(mockconfig):
     c = config.Config()
     with pytest.raises(NotImplementedError):
         c.vis_server
+
+
+def test_config_cached(tmpdir, monkeypatch):
+    monkeypatch.setattr(config, 'CHECK_INTERVAL', 0)
+    path = tmpdir.join('geonotebook.ini')
+    path.write(make_config({'test': {'foo': 'bar'}}))
+
+    parsed = config.Config(path=str(path)).config
+    assert config.Config(path=str(path)).config is parsed
+
+    # Edits are picked up once the file's mtime changes
+    path.write(make_config({'test': {'foo': 'baz'}}))
+    mtime = os.path.getmtime(str(path))
+    os.utime(str(path), (mtime + 10, mtime + 10))
+
+    assert config.Config(path=str(path)).config.get('test', 'foo') == 'baz'
+
+
+def test_vis_server_memoized(mockconfig):
+    mockconfig.files['/etc/geonotebook.ini'] = make_config({
+        'default': {
+            'vis_server': 'geoserver'
+        },
+        'geoserver': {
+            'username': 'admin',
+            'password': 'geoserver',
+            'url': 'http://localhost'
+        }
+    })
+
+    assert config.Config().vis_server is config.Config().vis_server
@@ -0,0 +1,68 @@
+import pytest
+
+from geonotebook import entry_points
+
+
+class EntryPointMock(object):
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return self.value
+
+
+@pytest.fixture
+def scan(mocker):
+    eps = {'test.group': [EntryPointMock('a', 'A'),
+                          EntryPointMock('b', 'B'),
+                          EntryPointMock('a', 'shadowed')]}
+
+    scan = mocker.patch.object(entry_points, '_scan',
+                               side_effect=lambda group: eps.get(group, []))
+    scan.eps = eps
+
+    entry_points.refresh()
+    yield scan
+    entry_points.refresh()
+
+
+def test_entry_points_scanned_once(scan):
+    assert list(entry_points.get('test.group')) == ['a', 'b']
+    assert list(entry_points.get('test.group')) == ['a', 'b']
+
+    assert scan.call_count == 1
+
+
+def test_entry_points_loaded_once(scan):
+    assert entry_points.load('test.group', 'a') == 'A'
+    assert entry_points.load('test.group', 'a') == 'A'
+    assert entry_points.load_all('test.group') == [('a', 'A'), ('b', 'B')]
+
+    assert [ep.loads for ep in scan.eps['test.group']] == [1, 1, 0]
+
+
+def test_entry_points_missing(scan):
+    with pytest.raises(KeyError):
+        entry_points.load('test.group', 'c')
+
+    assert entry_points.get('other.group') == {}
+
+
+def test_entry_points_refresh(scan):
+    entry_points.get('test.group')
+
+    scan.eps['test.group'].append(EntryPointMock('c', 'C'))
+    assert 'c' not in entry_points.get('test.group')
+
+    entry_points.refresh('test.group')
+    assert entry_points.load('test.group', 'c') == 'C'
+    assert scan.call_count == 2
+
+
+def test_entry_points_installed():
+    # geonotebook's own entry points,  from setup.py
+    assert 'tif' in entry_points.get(entry_points.RASTER_FILE)
+    assert 'file' in entry_points.get(entry_points.RASTER_SCHEMA)
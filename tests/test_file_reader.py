@@ -0,0 +1,333 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+import rasterio as rio
+from rasterio.transform import from_origin
+
+from geonotebook.annotations import Rectangle
+from geonotebook.wrappers.file_reader import (band_statistics,
+                                              DatasetPool,
+                                              RasterIOReader,
+                                              read_executor,
+                                              StatisticsSidecar)
+from geonotebook.wrappers.raster import RasterData
+
+
+def test_band_statistics_matches_numpy():
+    data = np.arange(60, dtype=np.float32).reshape(6, 10) ** 1.5
+    blocks = [data[0:2], data[2:3], data[3:6]]
+
+    stats = band_statistics(blocks)
+
+    assert stats['min'] == pytest.approx(data.min())
+    assert stats['max'] == pytest.approx(data.max())
+    assert stats['mean'] == pytest.approx(data.mean())
+    assert stats['stddev'] == pytest.approx(data.std())
+
+
+def test_band_statistics_ignores_masked_values():
+    data = np.ma.masked_values(
+        np.array([[1.0, -9999.0], [3.0, 5.0]]), -9999.0)
+    blocks = [data[0:1], data[1:2]]
+
+    stats = band_statistics(blocks)
+
+    assert stats['min'] == 1.0
+    assert stats['max'] == 5.0
+    assert stats['mean'] == pytest.approx(3.0)
+    assert stats['stddev'] == pytest.approx(data.std())
+
+
+def test_band_statistics_all_masked():
+    data = np.ma.masked_all((2, 2))
+
+    assert band_statistics([data]) == {
+        'min': None, 'max': None, 'mean': None, 'stddev': None}
+
+
+def test_statistics_sidecar_roundtrip(tmpdir, monkeypatch):
+    monkeypatch.setenv('GEONOTEBOOK_CACHE_DIR', str(tmpdir.mkdir('cache')))
+    raster = tmpdir.join('raster.tif')
+    raster.write('not really a tiff')
+
+    stats = {1: {'min': 0.0, 'max': 1.0, 'mean': 0.5, 'stddev': 0.5}}
+
+    StatisticsSidecar(str(raster)).save(stats)
+    assert StatisticsSidecar(str(raster)).load() == stats
+
+    # Touching the file invalidates the sidecar
+    raster.setmtime(raster.mtime() + 10)
+    assert StatisticsSidecar(str(raster)).load() == {}
+
+
+def test_dataset_pool_reuses_handles(mocker):
+    rio_open = mocker.patch('geonotebook.wrappers.file_reader.rio.open',
+                            side_effect=lambda path: object())
+    pool = DatasetPool(max_open=2)
+
+    assert pool.get('a.tif') is pool.get('a.tif')
+    assert rio_open.call_count == 1
+
+
+def test_dataset_pool_evicts_least_recently_used(mocker):
+    mocker.patch('geonotebook.wrappers.file_reader.rio.open',
+                 side_effect=lambda path: object())
+    pool = DatasetPool(max_open=2)
+
+    a = pool.get('a.tif')
+    pool.get('b.tif')
+    pool.get('a.tif')
+    pool.get('c.tif')
+
+    assert len(pool) == 2
+    assert pool.get('a.tif') is a
+
+
+def test_dataset_pool_handles_are_per_thread(mocker):
+    mocker.patch('geonotebook.wrappers.file_reader.rio.open',
+                 side_effect=lambda path: object())
+    pool = DatasetPool()
+    handles = []
+
+    thread = threading.Thread(target=lambda: handles.append(pool.get('a.tif')))
+    thread.start()
+    thread.join()
+
+    assert pool.get('a.tif') is not handles[0]
+
+
+def test_dataset_pool_drops_handles_of_exited_threads(mocker):
+    mocker.patch('geonotebook.wrappers.file_reader.rio.open',
+                 side_effect=lambda path: object())
+    pool = DatasetPool()
+
+    thread = threading.Thread(target=lambda: pool.get('a.tif'))
+    thread.start()
+    thread.join()
+    assert len(pool) == 1
+
+    pool.get('b.tif')
+    assert len(pool) == 1
+
+
+def write_constant(path, value):
+    with rio.open(path, 'w', driver='GTiff', width=4, height=4, count=1,
+                  dtype='uint8') as dataset:
+        dataset.write(np.full((1, 4, 4), value, dtype=np.uint8))
+
+
+def test_dataset_pool_reopens_modified_files(tmpdir, monkeypatch):
+    monkeypatch.setattr('geonotebook.wrappers.file_reader.CHECK_INTERVAL', 0)
+    path = str(tmpdir.join('rewritten.tif'))
+    pool = DatasetPool()
+
+    write_constant(path, 1)
+    first = pool.get(path)
+    assert (first.read(1) == 1).all()
+    assert pool.get(path) is first
+
+    write_constant(path, 2)
+    # Coarse file system timestamps may not see the rewrite
+    os.utime(path, (0, 0))
+
+    assert (pool.get(path).read(1) == 2).all()
+    assert first.closed
+    assert len(pool) == 1
+
+
+def test_dataset_pool_throttles_modification_checks(tmpdir, mocker):
+    path = str(tmpdir.join('rewritten.tif'))
+    pool = DatasetPool()
+
+    write_constant(path, 1)
+    first = pool.get(path)
+
+    write_constant(path, 2)
+    os.utime(path, (0, 0))
+    stat = mocker.spy(os, 'stat')
+
+    # Checked at most once every CHECK_INTERVAL seconds
+    assert pool.get(path) is first
+    assert stat.call_count == 0
+
+
+def test_read_executor_reuses_handles(mocker):
+    rio_open = mocker.patch('geonotebook.wrappers.file_reader.rio.open',
+                            side_effect=lambda path: object())
+    pool = DatasetPool()
+
+    assert read_executor(2) is read_executor(2)
+
+    for _ in range(3):
+        list(read_executor(2).map(pool.get, ['a.tif'] * 4))
+
+    # At most one handle per reader thread,  however many calls are made
+    assert rio_open.call_count <= 2
+
+
+@pytest.fixture
+def multiband_tif(tmpdir):
+    path = str(tmpdir.join('multiband.tif'))
+    data = np.arange(3 * 6 * 9, dtype=np.int16).reshape(3, 6, 9)
+    data[1, 2, 3] = -9999
+
+    with rio.open(path, 'w', driver='GTiff', width=9, height=6, count=3,
+                  dtype='int16', nodata=-9999) as dataset:
+        dataset.write(data)
+
+    return path
+
+
+def test_get_bands_data_matches_get_band_data(multiband_tif):
+    reader = RasterIOReader(multiband_tif)
+    # A non-square window,  ((row0, col0), (row1, col1))
+    window = ((1, 2), (4, 8))
+
+    data = reader.get_bands_data([1, 2, 3], window=window)
+    expected = np.ma.dstack([reader.get_band_data(i, window=window)
+                             for i in [1, 2, 3]])
+
+    assert data.shape == (3, 6, 3)
+    np.testing.assert_array_equal(data, expected)
+    np.testing.assert_array_equal(data.mask, expected.mask)
+    assert data.mask[1, 1, 1]
+
+
+def test_get_bands_data_fills_band_last_out(multiband_tif):
+    reader = RasterIOReader(multiband_tif)
+    window = ((1, 2), (4, 8))
+    out = np.empty((3, 6, 2), dtype=np.int16)
+
+    data = reader.get_bands_data([3, 1], window=window, masked=False,
+                                 out=out)
+
+    assert np.shares_memory(data, out)
+    np.testing.assert_array_equal(
+        out[..., 0], reader.get_band_data(3, window=window, masked=False))
+    np.testing.assert_array_equal(
+        out[..., 1], reader.get_band_data(1, window=window, masked=False))
+
+
+def test_raster_data_reads_into_out(multiband_tif):
+    reader = RasterIOReader(multiband_tif)
+    rd = RasterData(multiband_tif, reader=reader)
+
+    out = np.zeros((6, 9, 3), dtype=np.int16)
+    data = rd.get_data(masked=False, out=out)
+
+    assert np.shares_memory(data, out)
+    np.testing.assert_array_equal(out, reader.read().transpose(1, 2, 0))
+
+    out = np.zeros((6, 9), dtype=np.int16)
+    data = rd[2].get_data(masked=False, out=out)
+
+    assert np.shares_memory(data, out)
+    np.testing.assert_array_equal(out, reader.read(2))
+
+
+def test_band_stats_are_computed_in_one_pass(multiband_tif, tmpdir,
+                                             monkeypatch, mocker):
+    monkeypatch.setenv('GEONOTEBOOK_CACHE_DIR', str(tmpdir))
+    reader = RasterIOReader(multiband_tif)
+    iter_blocks = mocker.spy(reader, '_iter_blocks')
+
+    data = reader.read(masked=True).reshape(3, -1)
+
+    assert reader.get_bands_stat([1, 2, 3], 'min') == \
+        data.min(axis=1).tolist()
+    assert reader.get_bands_stat([1, 2, 3], 'max') == \
+        data.max(axis=1).tolist()
+    assert reader.get_band_mean(2) == pytest.approx(data[1].mean())
+    assert reader.get_band_stddev(3) == pytest.approx(data[2].std())
+
+    assert iter_blocks.call_count == 1
+
+
+@pytest.fixture
+def wgs84_tif(tmpdir):
+    path = str(tmpdir.join('wgs84.tif'))
+
+    with rio.open(path, 'w', driver='GTiff', width=10, height=8, count=1,
+                  dtype='uint8', crs='EPSG:4326',
+                  transform=from_origin(-10, 50, 0.5, 0.25)) as dataset:
+        dataset.write(np.zeros((1, 8, 10), dtype=np.uint8))
+
+    return path
+
+
+def test_index_many_matches_index(wgs84_tif, mocker):
+    reader = RasterIOReader(wgs84_tif)
+    transform = mocker.patch('rasterio.warp.transform')
+
+    rng = np.random.RandomState(0)
+    xs = rng.uniform(-12, -3, 50)
+    ys = rng.uniform(47, 51, 50)
+
+    assert reader.index_many(xs, ys) == \
+        [reader.dataset.index(x, y) for x, y in zip(xs, ys)]
+    # WGS84 data doesn't need any reprojection
+    assert not transform.called
+
+
+def test_zonal_stats_variance_is_stable(tmpdir):
+    path = str(tmpdir.join('offset.tif'))
+    # A large offset with a small spread,  the worst case for
+    # sum of squares based variance.
+    data = 1e9 + np.random.RandomState(0).rand(1, 6, 9)
+
+    with rio.open(path, 'w', driver='GTiff', width=9, height=6, count=1,
+                  dtype='float64', blockxsize=16, blockysize=2, tiled=False,
+                  transform=from_origin(0, 6, 1, 1)) as ds:
+        ds.write(data)
+
+    reader = RasterIOReader(path)
+    box = {'type': 'Polygon',
+           'coordinates': [[[2, 1], [7, 1], [7, 5], [2, 5], [2, 1]]]}
+
+    stats = reader.zonal_stats([1], [box])
+    inside = data[0, 1:5, 2:7]
+
+    assert stats['count'][0, 0] == inside.size
+    assert stats['mean'][0, 0] == pytest.approx(inside.mean())
+    assert stats['std'][0, 0] == pytest.approx(inside.std(), rel=1e-6)
+
+
+def test_zonal_stats_overlapping_features_match_subset(tmpdir):
+    path = str(tmpdir.join('zones.tif'))
+    data = np.random.RandomState(0).rand(1, 10, 12)
+
+    # Two row strips,  so most features span several blocks
+    with rio.open(path, 'w', driver='GTiff', width=12, height=10, count=1,
+                  dtype='float64', crs='EPSG:4326', nodata=-9999,
+                  blockxsize=16, blockysize=2, tiled=False,
+                  transform=from_origin(0, 10, 1, 1)) as ds:
+        ds.write(data)
+
+    rd = RasterData(path, reader=RasterIOReader(path))
+
+    boxes = [(1, 1, 6, 8),
+             # Overlaps the first box
+             (4, 3, 10, 9),
+             # Overlaps the first box,  not the second
+             (0, 0, 3, 4),
+             (8, 0, 12, 2),
+             # Inside the second box
+             (5, 4, 7, 6)]
+    rectangles = [Rectangle([(x0, y0), (x1, y0), (x1, y1), (x0, y1),
+                             (x0, y0)], None)
+                  for x0, y0, x1, y1 in boxes]
+
+    stats = rd.zonal_stats([{'type': 'Feature', 'properties': {},
+                             'geometry': r.__geo_interface__}
+                            for r in rectangles])
+
+    for rectangle, result in zip(rectangles, stats):
+        subset = rectangle.subset(rd)
+
+        assert result['count'] == subset.count()
+        assert result['min'] == subset.min()
+        assert result['max'] == subset.max()
+        assert result['mean'] == pytest.approx(subset.mean())
+        assert result['std'] == pytest.approx(subset.std())
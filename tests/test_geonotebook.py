@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 
 from geonotebook.kernel import Geonotebook
@@ -161,3 +163,70 @@ def test_protocol_optional_params_mixed(mixed):
     assert ops[0]['default'] == 10
     assert ops[1]['key'] == 'bar'
     assert ops[1]['default'] == 20
+
+
+def test_recv_batch(nbclass, mocker):
+    nb = nbclass(None)
+    nb.class_protocol()
+    nb._remote = mocker.Mock()
+    send_msg = mocker.patch.object(nb, '_send_msg')
+
+    response = {'id': 3, 'result': 'ok', 'error': None}
+    nb._recv_msg([
+        {'id': 1, 'method': 'no_args', 'params': [], 'jsonrpc': '2.0'},
+        {'id': 2, 'method': 'bogus', 'params': [], 'jsonrpc': '2.0'},
+        response
+    ])
+
+    nb._remote.resolve.assert_called_once_with(response)
+
+    # Requests are answered with a single batch of results
+    assert send_msg.call_count == 1
+    (results,), _ = send_msg.call_args
+    assert results[0] == {'id': 1, 'result': None, 'error': None}
+    assert results[1]['id'] == 2
+    assert results[1]['error']['code'] == -32601
+
+
+def test_add_layers(nbclass, mocker):
+    nb = nbclass(None)
+    nb._remote = mocker.MagicMock()
+    batch = nb._remote.batch.return_value
+    caller = threading.current_thread()
+    ingested, sent = set(), []
+
+    def create_layer(data, **kwargs):
+        ingested.add(threading.current_thread())
+        return (data, kwargs)
+
+    def send_layer(layer):
+        # Layers are sent from the calling thread,  inside one batch
+        assert threading.current_thread() is caller
+        assert batch.__enter__.call_count == 1
+        assert batch.__exit__.call_count == 0
+        sent.append(layer)
+        return layer
+
+    mocker.patch.object(nb, '_create_layer', side_effect=create_layer)
+    mocker.patch.object(nb, '_send_layer', side_effect=send_layer)
+
+    layers = nb.add_layers(['a', {'data': 'b', 'name': 'B'}], opacity=0.5)
+
+    assert layers == sent == [
+        ('a', {'opacity': 0.5, 'zIndex': 0}),
+        ('b', {'opacity': 0.5, 'zIndex': 1, 'name': 'B'})]
+    assert caller not in ingested
+    assert batch.__exit__.call_count == 1
+
+
+def test_add_layers_raises_ingest_errors(nbclass, mocker):
+    nb = nbclass(None)
+    nb._remote = mocker.MagicMock()
+
+    mocker.patch.object(nb, '_create_layer', side_effect=ValueError('bad'))
+    send_layer = mocker.patch.object(nb, '_send_layer')
+
+    with pytest.raises(ValueError):
+        nb.add_layers(['a'])
+
+    assert send_layer.call_count == 0
@@ -1,3 +1,5 @@
+import numpy as np
+
 from geonotebook import jsonrpc
 
 
@@ -94,3 +96,73 @@ def test_is_request_with_notify():
 
 def test_is_request_with_request():
     assert jsonrpc.is_request(jsonrpc.json_rpc_request('some_method'))
+
+
+def test_encode_buffers_ndarray():
+    data = np.arange(512, dtype=np.float64).reshape(256, 2)
+    msg, buffers = jsonrpc.encode_buffers(jsonrpc.json_rpc_result(
+        jsonrpc.Buffers({'coords': data}), None, 'MSGID'))
+
+    assert msg['result']['coords'] == {
+        '$buffer': 0, 'encoding': 'ndarray',
+        'dtype': 'float64', 'shape': [256, 2]}
+    assert len(buffers) == 1
+
+    decoded = jsonrpc.decode_buffers(msg, [bytes(b) for b in buffers])
+    np.testing.assert_array_equal(decoded['result']['coords'], data)
+
+
+def test_encode_buffers_small_ndarray():
+    msg, buffers = jsonrpc.encode_buffers({'params': [np.arange(3)]})
+
+    assert msg == {'params': [[0, 1, 2]]}
+    assert buffers == []
+
+
+def test_encode_buffers_json():
+    geojson = {'type': 'FeatureCollection', 'features': []}
+    msg, buffers = jsonrpc.encode_buffers(
+        {'params': [{'key': 'vis_url', 'value': jsonrpc.JSONBuffer(geojson)}]})
+
+    assert msg['params'][0]['value'] == {'$buffer': 0, 'encoding': 'json'}
+    assert jsonrpc.decode_buffers(msg, buffers) == {
+        'params': [{'key': 'vis_url', 'value': geojson}]}
+
+
+def test_encode_buffers_params_and_batches():
+    data = np.arange(512, dtype=np.float64)
+    msg, buffers = jsonrpc.encode_buffers([
+        {'params': [data, {'key': 'data', 'value': data}]},
+        {'params': {'data': data}},
+        jsonrpc.json_rpc_result(data, None, 'MSGID')])
+
+    ref = {'$buffer': 0, 'encoding': 'ndarray',
+           'dtype': 'float64', 'shape': [512]}
+
+    assert msg[0]['params'][0] == ref
+    assert msg[0]['params'][1] == {'key': 'data',
+                                   'value': dict(ref, **{'$buffer': 1})}
+    assert msg[1]['params']['data'] == dict(ref, **{'$buffer': 2})
+    assert msg[2]['result'] == dict(ref, **{'$buffer': 3})
+    assert len(buffers) == 4
+
+
+def test_encode_buffers_does_not_walk_unmarked_values(mocker):
+    encode = mocker.spy(jsonrpc, '_encode')
+    geojson = {'type': 'FeatureCollection',
+               'features': [{'type': 'Feature', 'properties': {},
+                             'geometry': {'type': 'Point',
+                                          'coordinates': [0, 0]}}] * 100}
+    result = jsonrpc.json_rpc_result(geojson, None, 'MSGID')
+
+    msg, buffers = jsonrpc.encode_buffers(result)
+
+    assert msg == result
+    assert msg['result'] is geojson
+    assert buffers == []
+    assert encode.call_count == 0
+
+
+def test_decode_buffers_without_buffers():
+    msg = {'params': [{'$buffer': 0}]}
+    assert jsonrpc.decode_buffers(msg, None) is msg
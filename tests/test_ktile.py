@@ -0,0 +1,34 @@
+import threading
+
+from geonotebook.vis.ktile.ktile import Ktile
+from geonotebook.wrappers import VectorData
+
+
+def test_ktile_session_per_thread():
+    ktile = Ktile(None, url='http://localhost/ktile')
+    assert ktile.session is ktile.session
+
+    sessions = []
+    t = threading.Thread(target=lambda: sessions.append(ktile.session))
+    t.start()
+    t.join()
+
+    assert sessions[0] is not ktile.session
+
+
+def test_ktile_ingest_many_vector_data(mocker):
+    ktile = Ktile(None, url='http://localhost/ktile')
+    mocker.patch.object(ktile, '_layer_config', return_value='raster')
+    mocker.patch.object(ktile, '_vector_layer_config', return_value='vector')
+    post = mocker.patch.object(Ktile, 'session').post
+    post.return_value.status_code = 200
+
+    vector = VectorData.__new__(VectorData)
+    urls = ktile.ingest_many([(object(), 'r'), (vector, 'v')],
+                             kernel_id='kernel')
+
+    assert urls == ['http://localhost/ktile/kernel/r',
+                    'http://localhost/ktile/kernel/v']
+    (url,), kwargs = post.call_args
+    assert url == 'http://localhost/ktile/kernel/'
+    assert kwargs['json'] == {'layers': {'r': 'raster', 'v': 'vector'}}
@@ -0,0 +1,62 @@
+from geonotebook.vis.ktile.cache import TileCache
+
+
+def key(layer_name='layer', z=0, x=0, y=0, kernel_id='kernel'):
+    return (kernel_id, layer_name, z, x, y, 'png', 0)
+
+
+def test_tile_cache_miss_and_hit():
+    cache = TileCache(max_bytes=100)
+    assert cache.get(key()) is None
+
+    cache.put(key(), 200, {'Content-Type': 'image/png'}, b'tile')
+    assert cache.get(key()) == (200, {'Content-Type': 'image/png'}, b'tile')
+
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['bytes'] == 4
+
+
+def test_tile_cache_evicts_least_recently_used():
+    cache = TileCache(max_bytes=10)
+    cache.put(key(x=0), 200, {}, b'aaaa')
+    cache.put(key(x=1), 200, {}, b'bbbb')
+
+    # Touch x=0 so x=1 becomes the least recently used tile
+    cache.get(key(x=0))
+    cache.put(key(x=2), 200, {}, b'cccc')
+
+    assert key(x=0) in cache
+    assert key(x=1) not in cache
+    assert key(x=2) in cache
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] == 8
+
+
+def test_tile_cache_rejects_oversized_tiles():
+    cache = TileCache(max_bytes=2)
+    assert cache.put(key(), 200, {}, b'too big') is False
+    assert len(cache) == 0
+
+
+def test_tile_cache_invalidate_layer():
+    cache = TileCache()
+    cache.put(key(layer_name='a'), 200, {}, b'a')
+    cache.put(key(layer_name='b'), 200, {}, b'b')
+
+    cache.invalidate('kernel', 'a')
+
+    assert key(layer_name='a') not in cache
+    assert key(layer_name='b') in cache
+
+
+def test_tile_cache_invalidate_kernel():
+    cache = TileCache()
+    cache.put(key(kernel_id='one'), 200, {}, b'a')
+    cache.put(key(kernel_id='two'), 200, {}, b'b')
+
+    cache.invalidate('one')
+
+    assert key(kernel_id='one') not in cache
+    assert key(kernel_id='two') in cache
+    assert cache.stats()['bytes'] == 1
@@ -0,0 +1,75 @@
+import hashlib
+
+from tornado import testing
+from tornado import web
+
+from geonotebook.vis.ktile.cache import TileCache
+from geonotebook.vis.ktile.handler import KtileTileHandler
+
+
+CONTENT = b'tile'
+ETAG = '"{}"'.format(hashlib.sha1(CONTENT).hexdigest())
+
+
+class Layer(object):
+    max_cache_age = None
+
+
+class Config(object):
+    def __init__(self):
+        self.layers = {'layer': Layer()}
+
+
+class ConfigManager(dict):
+    """Serves a single pre-rendered tile out of the tile cache."""
+
+    def __init__(self):
+        super(ConfigManager, self).__init__(kernel=Config())
+        self.tile_cache = TileCache()
+        self.tile_cache.put(('kernel', 'layer', 0, 0, 0, 'png', 0),
+                            200, {'Content-Type': 'image/png'}, CONTENT)
+
+    def style_hash(self, kernel_id, layer_name):
+        return 0
+
+
+class TestKtileTileHandler(testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.manager = ConfigManager()
+        return web.Application([
+            (r'/ktile/([^/]*)/([^/]*)/([^/]*)/([^/]*)/([^/\.]*)\.(.*)',
+             KtileTileHandler, dict(ktile_config_manager=self.manager))])
+
+    def fetch_tile(self, **kwargs):
+        return self.fetch('/ktile/kernel/layer/0/0/0.png', **kwargs)
+
+    def test_etag(self):
+        response = self.fetch_tile()
+
+        assert response.code == 200
+        assert response.body == CONTENT
+        assert response.headers['ETag'] == ETAG
+        assert response.headers['Cache-Control'] == \
+            'no-cache, must-revalidate'
+
+    def test_max_cache_age(self):
+        self.manager['kernel'].layers['layer'].max_cache_age = 300
+        response = self.fetch_tile()
+
+        assert response.code == 200
+        assert response.headers['ETag'] == ETAG
+        assert response.headers['Cache-Control'] == 'public, max-age=300'
+
+    def test_conditional_request(self):
+        response = self.fetch_tile(headers={'If-None-Match': ETAG})
+
+        assert response.code == 304
+        assert response.body == b''
+        assert response.headers['ETag'] == ETAG
+
+    def test_stale_etag(self):
+        response = self.fetch_tile(headers={'If-None-Match': '"stale"'})
+
+        assert response.code == 200
+        assert response.body == CONTENT
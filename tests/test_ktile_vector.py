@@ -0,0 +1,76 @@
+import io
+import json
+
+import pytest
+from shapely.geometry import shape
+
+from geonotebook.vis.ktile import mvt
+from geonotebook.vis.ktile.vector import VectorTileProvider
+
+
+class Coordinate(object):
+    def __init__(self, zoom, column, row):
+        self.zoom, self.column, self.row = zoom, column, row
+
+
+def feature(geometry, **properties):
+    return {'type': 'Feature', 'geometry': geometry,
+            'properties': properties}
+
+
+@pytest.fixture
+def provider(tmpdir):
+    # A zig zag too fine to show up at low zoom levels
+    zigzag = [(20 + i * 0.1, 30 + (i % 2) * 0.001) for i in range(400)]
+
+    path = tmpdir.join('features.geojson')
+    path.write(json.dumps({'type': 'FeatureCollection', 'features': [
+        feature({'type': 'Polygon',
+                 'coordinates': [[(-10, -10), (10, -10), (10, 10),
+                                  (-10, 10), (-10, -10)]]}, name='square'),
+        feature({'type': 'Point', 'coordinates': (-100, -50)}, name='point'),
+        feature({'type': 'LineString', 'coordinates': zigzag}, name='line')
+    ]}))
+
+    return VectorTileProvider(None, name='features', path=str(path))
+
+
+def test_vector_tile_features_are_clipped_and_simplified(provider):
+    # The north east quarter of the world
+    features = {fid: (shape(geometry), properties)
+                for fid, geometry, properties in provider.features(1, 1, 0)}
+
+    # The point is in the south west quarter
+    assert sorted(features) == [0, 2]
+
+    for fid, (geometry, properties) in features.items():
+        assert properties['_geonotebook_feature_id'] == fid
+
+        minx, miny, maxx, maxy = geometry.bounds
+        assert minx >= -provider.buffer and miny >= -provider.buffer
+        assert maxx <= provider.extent + provider.buffer
+        assert maxy <= provider.extent + provider.buffer
+
+    # The square is clipped to the buffered tile on its west and south
+    square, properties = features[0]
+    assert properties['name'] == 'square'
+    assert square.bounds[0] == pytest.approx(-provider.buffer)
+    assert square.bounds[3] == pytest.approx(
+        provider.extent + provider.buffer)
+
+    line, properties = features[2]
+    assert len(line.coords) < 10
+
+
+def test_vector_tile_render(provider):
+    out = io.BytesIO()
+    provider.renderTile(256, 256, None, Coordinate(1, 1, 0)).save(out, 'MVT')
+    content = out.getvalue()
+
+    assert content == mvt.encode_tile(
+        [('features', provider.features(1, 1, 0))])
+    assert b'square' in content
+    assert b'point' not in content
+
+    assert provider.getTypeByExtension('mvt') == \
+        ('application/vnd.mapbox-vector-tile', 'MVT')
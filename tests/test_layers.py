@@ -1,4 +1,5 @@
 import sys
+import threading
 
 import pytest
 
@@ -49,6 +50,17 @@ def test_annotation_layer_add_poly_annotation(poly_coords):
     assert len(al.polygons[0].exterior.coords) == 7
 
 
+def test_annotation_layer_spatial_queries(point_coords, poly_coords):
+    al = layers.AnnotationLayer('al', None, None)
+    al.add_annotation('point', point_coords, {})
+    al.add_annotation('polygon', poly_coords, {})
+
+    assert al.intersecting(tuple(point_coords)) == [al.points[0]]
+    assert al.containing((-74.3, 43.0)) == [al.polygons[0]]
+    assert al.intersecting((-76, 42, -73, 44)) == \
+        [al.points[0], al.polygons[0]]
+
+
 def test_annotation_layer_add_bad_annotation(poly_coords):
     al = layers.AnnotationLayer('al', None, None)
     with pytest.raises(RuntimeError):
@@ -106,6 +118,22 @@ def test_simple_layer_override_vis_url(visserver):
     assert visserver.ingest.call_count == 0
 
 
+# VectorLayer
+def test_tiled_vector_layer(mocker, visserver):
+    data = mocker.Mock()
+    # The features are served as vector tiles,  never sent inline
+    type(data).geojson = mocker.PropertyMock(side_effect=AssertionError)
+    visserver.ingest.return_value = 'http://bogus_url.com/kernel/vl'
+
+    vl = layers.VectorLayer('vl', None, None, data, tiled=True,
+                            kernel_id='kernel')
+
+    assert vl.vis_url == 'http://bogus_url.com/kernel/vl'
+    assert vl.serialize()['vis_options']['layer_type'] == 'vector_tile'
+    visserver.ingest.assert_called_once_with(data, name='vl',
+                                             kernel_id='kernel')
+
+
 def test_timeseries_layer(visserver, rasterdata_list):
     tsl = layers.TimeSeriesLayer('tsl', None, rasterdata_list)
 
@@ -245,6 +273,39 @@ def test_timeseries_layer_idx(mocker, visserver, rasterdata_list):
         {'vis': 'options'}, {'query': 'params'})
 
 
+def test_timeseries_layer_prefetch(visserver, rasterdata_list):
+    visserver.ingest.return_value = "http://bogus_url.com/test_data1"
+    ingesting = threading.Event()
+
+    def ingest_many(*args, **kwargs):
+        ingesting.wait()
+        return ["http://bogus_url.com/test_data2"]
+
+    visserver.ingest_many.side_effect = ingest_many
+
+    tsl = layers.TimeSeriesLayer('tsl', None, rasterdata_list, prefetch=1)
+    # Callbacks run in the order they were added,  so this one runs
+    # after the layer has released the finished prefetch.
+    released = threading.Event()
+    tsl._pending[1].add_done_callback(lambda f: released.set())
+
+    # Wait for the background ingest of the next slice to finish
+    ingesting.set()
+    released.wait()
+
+    # Finished prefetches are forgotten
+    assert tsl._pending == {}
+
+    assert tsl._vis_urls == ["http://bogus_url.com/test_data1",
+                             "http://bogus_url.com/test_data2",
+                             None]
+    assert visserver.ingest.call_count == 1
+    assert visserver.ingest_many.call_count == 1
+
+    (items,), _ = visserver.ingest_many.call_args
+    assert [name for data, name in items] == [tsl._slice_name(1)]
+
+
 def test_timeseries_out_of_range(visserver, rasterdata_list):
     tsl = layers.TimeSeriesLayer('tsl', None, rasterdata_list)
 
@@ -0,0 +1,129 @@
+"""Kernel start up imports.
+
+Every notebook kernel imports geonotebook.kernel and the vis_server
+clients before the first cell runs.  The data and HTTP libraries they
+use are only imported once data is first used,  these tests check that
+this stays the case by importing the kernel in a fresh interpreter,  and
+use ``python -X importtime`` to check that the import stays within a
+time budget (GEONOTEBOOK_IMPORT_TIME_BUDGET seconds).
+
+Run this file directly to print the slowest imports,  e.g:
+
+python tests/test_lazy_imports.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# What a kernel imports before the first cell runs
+KERNEL_IMPORTS = 'import geonotebook.kernel; import geonotebook.vis'
+
+# Lists the modules loaded by KERNEL_IMPORTS
+LIST_KERNEL_IMPORTS = KERNEL_IMPORTS + """
+import json, sys
+json.dump([m for m, mod in sys.modules.items() if mod is not None],
+          sys.stdout)
+"""
+
+# Cumulative import time budget in seconds,  this includes ipykernel.
+IMPORT_TIME_BUDGET = float(
+    os.environ.get('GEONOTEBOOK_IMPORT_TIME_BUDGET', 1.0))
+
+# Modules that must only be imported once data or annotations are used
+DEFERRED_MODULES = (
+    'fiona',
+    'gdal',
+    'jinja2',
+    'mapnik',
+    'numpy',
+    'rasterio',
+    'requests',
+    'shapely',
+    'TileStache',
+    'geonotebook.annotations',
+    'geonotebook.vis.ktile.handler',
+    'geonotebook.vis.ktile.vrt.gdalvrtbindings',
+    'geonotebook.wrappers'
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+requires_importtime = pytest.mark.skipif(
+    sys.version_info < (3, 7), reason="-X importtime requires python 3.7")
+
+
+def imported_modules(statement=LIST_KERNEL_IMPORTS):
+    """Run statement in a fresh interpreter and list the loaded modules."""
+    output = subprocess.check_output(
+        [sys.executable, '-c', statement], cwd=ROOT)
+
+    return set(json.loads(output.decode('utf-8')))
+
+
+def import_times(statement=KERNEL_IMPORTS):
+    """Run statement in a fresh interpreter and time its imports.
+
+    :returns: (module, self seconds, cumulative seconds, depth) for every
+        module imported,  in the order their imports finished
+    :rtype: list
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.STDOUT, cwd=ROOT)
+
+    times = []
+    for line in output.decode('utf-8').splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        own, cumulative, name = line[len('import time:'):].split('|')
+        try:
+            own, cumulative = int(own), int(cumulative)
+        except ValueError:
+            # The header line
+            continue
+
+        # Nested imports are indented by two spaces per level
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+
+        times.append((name.strip(), own / 1e6, cumulative / 1e6, depth))
+
+    return times
+
+
+def total_time(times):
+    return sum(cumulative for _, _, cumulative, depth in times if depth == 0)
+
+
+def test_kernel_import_defers_data_libraries():
+    imported = imported_modules()
+
+    assert [m for m in DEFERRED_MODULES if m in imported or any(
+        name.startswith(m + '.') for name in imported)] == []
+
+
+@requires_importtime
+def test_kernel_import_time_budget():
+    # Take the best of a few runs,  the first may include disk reads
+    total = min(total_time(import_times()) for _ in range(3))
+
+    assert total < IMPORT_TIME_BUDGET, \
+        "Importing the kernel took {:.3f}s (budget {:.3f}s)".format(
+            total, IMPORT_TIME_BUDGET)
+
+
+if __name__ == '__main__':
+    times = import_times()
+
+    print("{:>10} {:>10}  {}".format('self [s]', 'cumul [s]', 'module'))
+    for name, own, cumulative, depth in sorted(
+            times, key=lambda t: t[2], reverse=True)[:30]:
+        print("{:10.4f} {:10.4f}  {}{}".format(
+            own, cumulative, '  ' * depth, name))
+
+    print("\nTotal: {:.3f}s (budget {:.3f}s)".format(
+        total_time(times), IMPORT_TIME_BUDGET))
@@ -0,0 +1,74 @@
+import pytest
+
+from geonotebook.vis.ktile import mvt
+
+
+def test_tile_bounds():
+    origin = mvt.MERCATOR_ORIGIN
+    assert mvt.tile_bounds(0, 0, 0) == (-origin, -origin, origin, origin)
+    assert mvt.tile_bounds(1, 1, 0) == (0.0, 0.0, origin, origin)
+    assert mvt.tile_bounds(1, 0, 1) == (-origin, -origin, 0.0, 0.0)
+
+
+def test_varint_and_zigzag():
+    assert mvt._varint(1) == b'\x01'
+    assert mvt._varint(300) == b'\xac\x02'
+    assert [mvt._zigzag(v) for v in (0, -1, 1, -2, 2)] == [0, 1, 2, 3, 4]
+
+
+def test_encode_point():
+    assert mvt.encode_geometry(
+        {'type': 'Point', 'coordinates': (25.2, 17.4)}) == \
+        (mvt.POINT, [9, 50, 34])
+
+
+def test_encode_linestring_drops_repeated_vertices():
+    assert mvt.encode_geometry(
+        {'type': 'LineString',
+         'coordinates': [(2, 2), (2.1, 2.2), (2, 10), (10, 10)]}) == \
+        (mvt.LINESTRING, [9, 4, 4, 18, 0, 16, 16, 0])
+
+
+def test_encode_polygon_winding():
+    # Counter-clockwise in tile coordinates,  must be reversed
+    ccw = [(3, 6), (3, 12), (8, 12), (3, 6)]
+    cw = [(3, 6), (8, 12), (20, 34), (3, 6)]
+
+    assert mvt.encode_geometry(
+        {'type': 'Polygon', 'coordinates': [cw]}) == \
+        (mvt.POLYGON, [9, 6, 12, 18, 10, 12, 24, 44, 15])
+
+    geom_type, commands = mvt.encode_geometry(
+        {'type': 'Polygon', 'coordinates': [ccw]})
+    # MoveTo(8, 12), LineTo(3, 12), (3, 6), ClosePath
+    assert commands == [9, 16, 24, 18, 9, 0, 0, 11, 15]
+
+
+def test_encode_degenerate_polygon():
+    assert mvt.encode_geometry(
+        {'type': 'Polygon',
+         'coordinates': [[(0, 0), (0.1, 0.1), (0.2, 0), (0, 0)]]}) is None
+
+
+def test_encode_geometry_collection():
+    with pytest.raises(ValueError):
+        mvt.encode_geometry({'type': 'GeometryCollection', 'geometries': []})
+
+
+def test_encode_tile():
+    features = [
+        (0, {'type': 'Point', 'coordinates': (1, 1)},
+         {'name': u'a', '_geonotebook_feature_id': 0}),
+        (1, {'type': 'Point', 'coordinates': (2, 2)},
+         {'name': u'a', '_geonotebook_feature_id': 1, 'empty': None})
+    ]
+
+    tile = mvt.encode_tile([('features', features)])
+
+    # Tile.layers (field 3, length delimited)
+    assert tile[:1] == b'\x1a'
+    assert b'features' in tile
+    # Keys and values are shared between features
+    assert tile.count(b'_geonotebook_feature_id') == 1
+    assert tile.count(b'\x0a\x01a') == 1
+    assert b'empty' not in tile
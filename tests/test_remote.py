@@ -1,24 +1,34 @@
+import os
+import time
+
 import pytest
 
-from geonotebook.kernel import Remote
+from geonotebook import jsonrpc
+from geonotebook.kernel import GeonotebookKernel, Remote
+
+# The geonotebook.ini installed with the package
+DEFAULT_INI = os.path.join(os.path.dirname(__file__), os.pardir,
+                           'config', 'geonotebook.ini')
 
 
 @pytest.fixture
-def remote(mocker):
-
-    protocols = [{'procedure': 'no_args',
-                  'required': [],
-                  'optional': []},
-                 {'procedure': 'required_only',
-                  'required': [{"key": "a"}, {"key": "b"}],
-                  'optional': []},
-                 {'procedure': 'optional_only',
-                  'required': [],
-                  'optional': [{"key": "x"}, {"key": "y"}, {"key": "z"}]},
-                 {'procedure': 'required_and_optional',
-                  'required': [{"key": "a"}, {"key": "b"}],
-                  'optional': [{"key": "x"}, {"key": "y"}, {"key": "z"}]}]
+def protocols():
+    return [{'procedure': 'no_args',
+             'required': [],
+             'optional': []},
+            {'procedure': 'required_only',
+             'required': [{"key": "a"}, {"key": "b"}],
+             'optional': []},
+            {'procedure': 'optional_only',
+             'required': [],
+             'optional': [{"key": "x"}, {"key": "y"}, {"key": "z"}]},
+            {'procedure': 'required_and_optional',
+             'required': [{"key": "a"}, {"key": "b"}],
+             'optional': [{"key": "x"}, {"key": "y"}, {"key": "z"}]}]
+
 
+@pytest.fixture
+def remote(mocker, protocols):
     r = Remote(None, protocols)
 
     # Mock out the UUID.uuid4 function to return a consistent ID for testing
@@ -176,3 +186,210 @@ def test_remote_promise_resolve_with_bad_message(r, mocker):
     # warn = mockeremote.patch.object(remote.log, 'warn')
     remote.resolve({'id': 'BAD-ID'})
     # assert warn.called_once == 1
+
+
+def test_remote_batch(remote, mocker):
+    mocker.patch('geonotebook.jsonrpc.uuid.uuid4',
+                 side_effect=['ID-1', 'ID-2'])
+    results = {}
+
+    with remote.batch():
+        remote.no_args().then(lambda val: results.setdefault('a', val))
+        remote.required_only('foo', 'bar').then(
+            lambda val: results.setdefault('b', val))
+
+        assert remote._send_msg.call_count == 0
+
+    assert remote._send_msg.call_count == 1
+    (batch,), _ = remote._send_msg.call_args
+    assert [msg['method'] for msg in batch] == ['no_args', 'required_only']
+    assert [msg['id'] for msg in batch] == ['ID-1', 'ID-2']
+
+    # Each call keeps its own promise
+    remote.resolve({'id': 'ID-2', 'result': 'B', 'error': None})
+    remote.resolve({'id': 'ID-1', 'result': 'A', 'error': None})
+    assert results == {'a': 'A', 'b': 'B'}
+
+
+def test_remote_nested_batch(remote):
+    with remote.batch():
+        remote.no_args()
+        with remote.batch():
+            remote.no_args()
+        assert remote._send_msg.call_count == 0
+
+    assert remote._send_msg.call_count == 1
+    (batch,), _ = remote._send_msg.call_args
+    assert len(batch) == 2
+
+
+def test_remote_batch_flushed_on_error(remote):
+    with pytest.raises(RuntimeError):
+        with remote.batch():
+            remote.no_args()
+            raise RuntimeError()
+
+    assert remote._send_msg.call_count == 1
+
+    # Calls outside of the context are sent immediately again
+    remote.no_args()
+    assert remote._send_msg.call_count == 2
+    remote._send_msg.assert_called_with({'jsonrpc': '2.0', 'params': [],
+                                         'method': 'no_args', 'id': 'TEST-ID'})
+
+
+def test_remote_promise_removed_when_resolved(remote):
+    remote.no_args()
+    assert 'TEST-ID' in remote._promises
+
+    remote.resolve({'id': 'TEST-ID', 'result': 'SUCCESS', 'error': None})
+    assert remote._promises == {}
+    assert remote.stats()['pending'] == 0
+
+
+def test_remote_call_timeout(remote):
+    results = {}
+
+    remote.no_args(_timeout=5).then(
+        None, lambda err: results.setdefault('error', err))
+
+    assert remote.expire() == 0
+    assert remote.expire(now=remote._calls['TEST-ID'].deadline) == 1
+
+    assert isinstance(results['error'], jsonrpc.RequestTimeout)
+    assert remote._promises == {}
+
+    # A late reply is ignored
+    remote.resolve({'id': 'TEST-ID', 'result': 'SUCCESS', 'error': None})
+    assert remote.stats()['procedures']['no_args']['timeouts'] == 1
+
+
+def test_remote_max_pending(remote, mocker):
+    mocker.patch('geonotebook.jsonrpc.uuid.uuid4',
+                 side_effect=['ID-1', 'ID-2', 'ID-3'])
+    remote.max_pending = 2
+
+    remote.no_args()
+    remote.no_args()
+    remote.no_args()
+
+    assert remote._send_msg.call_count == 2
+    assert remote.stats()['queued'] == 1
+
+    # A reply makes room for the queued call
+    remote.resolve({'id': 'ID-1', 'result': None, 'error': None})
+
+    assert remote._send_msg.call_count == 3
+    (msg,), _ = remote._send_msg.call_args
+    assert msg['id'] == 'ID-3'
+    assert remote.stats()['queued'] == 0
+
+
+def test_remote_times_out_by_default(remote):
+    start = time.time()
+    remote.no_args()
+    deadline = remote._calls['TEST-ID'].deadline
+
+    assert start + remote.default_timeout <= deadline <= \
+        time.time() + remote.default_timeout
+    assert remote.expire(now=float('inf')) == 1
+
+
+def test_remote_wait_forever(remote):
+    remote.no_args(_timeout=None)
+
+    assert remote._calls['TEST-ID'].deadline is None
+    assert remote.expire(now=float('inf')) == 0
+
+
+def test_comm_open_remote_expires_calls(mocker, monkeypatch, protocols):
+    monkeypatch.setenv('GEONOTEBOOK_INI', DEFAULT_INI)
+    mocker.patch('geonotebook.kernel.PeriodicCallback')
+
+    kernel = GeonotebookKernel.__new__(GeonotebookKernel)
+    kernel._expire_callback = None
+    kernel.initializing = False
+    kernel.geonotebook = mocker.Mock()
+    kernel.handle_comm_open(mocker.Mock(), {'content': {'data': protocols}})
+
+    remote = kernel.geonotebook._remote
+    results = {}
+    remote.no_args().then(None, lambda err: results.setdefault('error', err))
+
+    assert remote.expire(now=time.time() + 59) == 0
+    assert remote.expire(now=time.time() + 61) == 1
+    assert isinstance(results['error'], jsonrpc.RequestTimeout)
+
+
+def test_remote_max_queued(remote, mocker):
+    mocker.patch('geonotebook.jsonrpc.uuid.uuid4',
+                 side_effect=['ID-1', 'ID-2', 'ID-3', 'ID-4'])
+    remote.max_pending = 1
+    remote.max_queued = 1
+    errors = []
+
+    remote.no_args()
+    remote.no_args()
+    remote.no_args().then(None, errors.append)
+
+    assert isinstance(errors[0], jsonrpc.TooManyRequests)
+    assert 'ID-3' not in remote._promises
+    assert remote.stats()['queued'] == 1
+    assert remote.stats()['procedures']['no_args']['rejected'] == 1
+
+    # Once the queue drains calls are accepted again
+    remote.resolve({'id': 'ID-1', 'result': None, 'error': None})
+    remote.no_args()
+    assert remote.stats()['queued'] == 1
+
+
+def test_remote_batch_sent_when_flushed(remote, mocker):
+    clock = {'now': 0}
+    mocker.patch('geonotebook.kernel.time.time',
+                 side_effect=lambda: clock['now'])
+
+    with remote.batch():
+        remote.no_args()
+        clock['now'] = 5
+
+    assert remote._calls['TEST-ID'].sent == 5
+
+
+def test_remote_batch_leaves_out_expired_calls(remote, mocker):
+    mocker.patch('geonotebook.jsonrpc.uuid.uuid4',
+                 side_effect=['ID-1', 'ID-2'])
+
+    with remote.batch():
+        remote.no_args(_timeout=1)
+        remote.no_args()
+        remote.expire(now=remote._calls['ID-1'].deadline)
+
+    (batch,), _ = remote._send_msg.call_args
+    assert [msg['id'] for msg in batch] == ['ID-2']
+
+
+def test_remote_stats(remote, mocker):
+    mocker.patch('geonotebook.jsonrpc.uuid.uuid4',
+                 side_effect=['ID-1', 'ID-2', 'ID-3'])
+    clock = {'now': 0}
+    mocker.patch('geonotebook.kernel.time.time',
+                 side_effect=lambda: clock['now'])
+
+    remote.no_args()
+    remote.no_args()
+    remote.required_only('foo', 'bar')
+
+    clock['now'] = 1
+    remote.resolve({'id': 'ID-1', 'result': None, 'error': None})
+    clock['now'] = 3
+    remote.resolve({'id': 'ID-2', 'result': None, 'error': 'ERROR'})
+
+    stats = remote.stats()
+    assert stats['pending'] == 1
+    assert stats['procedures']['no_args'] == {
+        'calls': 2, 'errors': 1, 'timeouts': 0, 'rejected': 0, 'pending': 0,
+        'p50': 1, 'p90': 3, 'p99': 3}
+    assert stats['procedures']['required_only'] == {
+        'calls': 1, 'errors': 0, 'timeouts': 0, 'rejected': 0, 'pending': 1,
+        'p50': None, 'p90': None, 'p99': None}
+
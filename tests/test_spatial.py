@@ -0,0 +1,82 @@
+import pytest
+from shapely.geometry import box, Point, Polygon
+
+from geonotebook import spatial
+from geonotebook.spatial import SpatialIndex
+
+
+class BoundsTree(object):
+    """A minimal stand in for STRtree,  so the tree path is always tested."""
+    built = 0
+
+    def __init__(self, geometries):
+        BoundsTree.built += 1
+        self.geometries = list(geometries)
+
+    def query(self, geometry):
+        query = box(*geometry.bounds)
+        return [g for g in self.geometries
+                if box(*g.bounds).intersects(query)]
+
+
+@pytest.fixture(autouse=True, params=['bounds_tree', 'strtree', 'numpy'])
+def tree(request, monkeypatch):
+    """Run every test against each way candidates are found."""
+    if request.param == 'bounds_tree':
+        BoundsTree.built = 0
+        monkeypatch.setattr(spatial, 'STRtree', BoundsTree)
+    elif request.param == 'strtree':
+        if spatial.STRtree is None:
+            pytest.skip("STRtree requires shapely >= 1.6")
+    else:
+        monkeypatch.setattr(spatial, 'STRtree', None)
+
+    return request.param
+
+
+def squares():
+    return [Polygon([(i, 0), (i + 1, 0), (i + 1, 1), (i, 1), (i, 0)])
+            for i in range(0, 10, 2)]
+
+
+def test_spatial_index_intersects_bbox():
+    index = SpatialIndex(squares(), items=list('abcde'))
+    assert index.intersects((1.5, 0.5, 4.5, 0.6)) == ['b', 'c']
+
+
+def test_spatial_index_contains_point():
+    index = SpatialIndex(squares(), items=list('abcde'))
+    assert index.contains((4.5, 0.5)) == ['c']
+    assert index.contains((5.5, 0.5)) == []
+
+
+def test_spatial_index_incremental_add():
+    index = SpatialIndex()
+    assert index.intersects(Point(0.5, 0.5)) == []
+
+    index.add(squares()[0], 'a')
+    assert index.intersects(Point(0.5, 0.5)) == ['a']
+
+    index.add(Polygon([(0, 0), (1, 0), (1, 1), (0, 0)]), 'b')
+    assert index.intersects(Point(0.75, 0.25)) == ['a', 'b']
+
+    index.clear()
+    assert len(index) == 0
+    assert index.intersects(Point(0.5, 0.5)) == []
+
+
+def test_spatial_index_rebuilds_tree_rarely(tree):
+    index = SpatialIndex()
+    index.rebuild_threshold = 4
+
+    for i in range(100):
+        index.add(box(i, 0, i + 1, 1), i)
+        # Query after every add,  new geometries are found before
+        # the tree is rebuilt
+        assert index.intersects((i + 0.5, 0.5)) == [i]
+
+    assert index.intersects((10.5, 0.5, 12.5, 0.6)) == [10, 11, 12]
+
+    if tree == 'bounds_tree':
+        # Rebuilt when the pending tail outgrows a quarter of the tree
+        assert 0 < BoundsTree.built < 20
@@ -0,0 +1,105 @@
+from geonotebook import topology
+
+
+def square(x, y, size=1):
+    return [(x, y), (x + size, y), (x + size, y + size),
+            (x, y + size), (x, y)]
+
+
+def feature(geometry_type, coordinates, **properties):
+    return {'type': 'Feature',
+            'geometry': {'type': geometry_type, 'coordinates': coordinates},
+            'properties': properties}
+
+
+def decode_arc(topo, index):
+    kx, ky = topo['transform']['scale']
+    tx, ty = topo['transform']['translate']
+
+    arc = topo['arcs'][~index if index < 0 else index]
+    x = y = 0
+    positions = []
+    for dx, dy in arc:
+        x, y = x + dx, y + dy
+        positions.append((x * kx + tx, y * ky + ty))
+
+    return positions[::-1] if index < 0 else positions
+
+
+def test_zoom_resolution():
+    assert topology.zoom_resolution(0) == 360.0 / 256
+    assert topology.zoom_resolution(2) == topology.zoom_resolution(0) / 4
+
+
+def test_simplify_keeps_end_points():
+    points = [(0, 0), (1, 0.1), (2, 0), (3, 5), (4, 0)]
+
+    assert topology.simplify(points, 0) == points
+    assert topology.simplify(points, 0.5) == [(0, 0), (2, 0), (3, 5), (4, 0)]
+    assert topology.simplify(points, 10) == [(0, 0), (4, 0)]
+
+
+def test_quantizer():
+    quantizer = topology.Quantizer((0, 0, 10, 20), 11)
+
+    assert quantizer.transform == {'scale': [1.0, 2.0], 'translate': [0, 0]}
+    assert quantizer([(0, 0), (0.2, 0.2), (10, 20)]) == [(0, 0), (10, 10)]
+
+
+def test_topojson_shares_arcs():
+    topo = topology.topojson([
+        feature('Polygon', [square(0, 0)], name='a'),
+        feature('Polygon', [square(1, 0)], name='b')
+    ], quantization=3)
+
+    assert topo['type'] == 'Topology'
+    assert topo['bbox'] == [0, 0, 2, 1]
+
+    a, b = topo['objects']['features']['geometries']
+    assert a['properties'] == {'name': 'a'}
+
+    # The common border is stored once and referenced in reverse by b
+    shared = set(i for ring in a['arcs'] for i in ring) & \
+        set(~i for ring in b['arcs'] for i in ring)
+    assert len(shared) == 1
+    assert len(topo['arcs']) == 3
+
+    assert decode_arc(topo, shared.pop()) == [(1.0, 0.0), (1.0, 1.0)]
+
+
+def test_topojson_ring_round_trip():
+    topo = topology.topojson([feature('Polygon', [square(0, 0, 4)])],
+                             quantization=5)
+
+    ring, = topo['objects']['features']['geometries'][0]['arcs']
+    positions = [p for i in ring for p in decode_arc(topo, i)]
+
+    assert positions[0] == positions[-1]
+    assert set(positions) == set(square(0, 0, 4))
+
+
+def test_topojson_zoom_simplifies():
+    line = [(x / 100.0, (x % 2) / 1000.0) for x in range(101)]
+    features = [feature('LineString', line), feature('Point', (1, 1))]
+
+    detailed = topology.topojson(features)
+    coarse = topology.topojson(features, zoom=2)
+
+    assert len(detailed['arcs'][0]) == 101
+    assert len(coarse['arcs'][0]) == 2
+    assert coarse['transform']['scale'][0] > detailed['transform']['scale'][0]
+
+
+def test_topojson_points_and_null_geometries():
+    topo = topology.topojson([
+        feature('Point', (1, 1)),
+        {'type': 'Feature', 'geometry': None, 'properties': {}},
+        feature('MultiPoint', [(0, 0), (2, 2)])
+    ], quantization=3)
+
+    point, null, multipoint = topo['objects']['features']['geometries']
+
+    assert point['coordinates'] == [1, 1]
+    assert null['type'] is None
+    assert multipoint['coordinates'] == [[0, 0], [2, 2]]
+    assert topo['arcs'] == []
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from geonotebook import topology
+from geonotebook.wrappers import vector
+from geonotebook.wrappers import VectorData
+
+
+class ReaderMock(list):
+    """A list of features standing in for a fiona Collection."""
+
+    def __init__(self, features, path=None):
+        super(ReaderMock, self).__init__(features)
+        self.path = path
+        self.iterations = 0
+
+    def __iter__(self):
+        self.iterations += 1
+        return super(ReaderMock, self).__iter__()
+
+
+def point(x, y, **properties):
+    return {'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': (x, y)},
+            'properties': properties}
+
+
+@pytest.fixture
+def reader(tmpdir):
+    path = tmpdir.join('points.geojson')
+    path.write('')
+    return ReaderMock([point(0, 0, name='a'), point(1, 1, name='b')],
+                      path=str(path))
+
+
+def test_vector_data_decodes_once(reader):
+    vd = VectorData(reader)
+
+    assert len(vd) == 2
+    assert vd[1]['properties'] == {'name': 'b'}
+    assert len(list(vd.points)) == 2
+    assert vd.geojson is vd.geojson
+    assert vd.intersecting((-1, -1, 0.5, 0.5)) == [vd[0]]
+
+    assert reader.iterations == 1
+
+
+def test_vector_data_geojson_feature_ids(reader):
+    vd = VectorData(reader)
+
+    assert [f['properties']['_geonotebook_feature_id']
+            for f in vd.geojson['features']] == [0, 1]
+
+    # The shared features are not annotated
+    assert vd[0]['properties'] == {'name': 'a'}
+
+
+def test_vector_data_invalidated_on_mtime(reader, monkeypatch):
+    monkeypatch.setattr(vector, 'CHECK_INTERVAL', 0)
+    vd = VectorData(reader)
+    vd.geojson
+
+    mtime = os.path.getmtime(reader.path)
+    os.utime(reader.path, (mtime + 10, mtime + 10))
+    reader.append(point(2, 2, name='c'))
+
+    assert len(vd.geojson['features']) == 3
+    assert reader.iterations == 2
+
+
+def test_vector_data_mtime_checks_throttled(reader, monkeypatch, mocker):
+    monkeypatch.setattr(vector, 'CHECK_INTERVAL', 3600)
+    getmtime = mocker.spy(vector.os.path, 'getmtime')
+    vd = VectorData(reader)
+
+    for i in range(len(vd)):
+        vd[i]
+    assert getmtime.call_count == 1
+
+    mtime = os.path.getmtime(reader.path)
+    os.utime(reader.path, (mtime + 10, mtime + 10))
+    reader.append(point(2, 2, name='c'))
+
+    # Not noticed until the next check
+    assert len(vd) == 2
+    monkeypatch.setattr(vector, 'CHECK_INTERVAL', 0)
+    assert len(vd) == 3
+
+
+def test_vector_data_invalidated_on_reader_change(reader):
+    vd = VectorData(reader)
+    assert len(vd) == 2
+
+    vd.reader = ReaderMock([point(5, 5)])
+
+    assert len(vd) == 1
+    assert vd.intersecting((5, 5)) == [vd[0]]
+
+
+def test_vector_data_topojson_cached(reader, mocker):
+    encode = mocker.spy(topology, 'topojson')
+    vd = VectorData(reader)
+
+    assert vd.topojson(zoom=3) is vd.topojson(zoom=3)
+    assert vd.topojson(zoom=4) is not vd.topojson(zoom=3)
+    assert encode.call_count == 2
+
+    # Cleared along with the features
+    vd.reader = ReaderMock([point(5, 5)])
+    assert len(vd.topojson(zoom=3)['objects'][topology.OBJECT_NAME]
+               ['geometries']) == 1
+    assert encode.call_count == 3
@@ -68,6 +68,18 @@ def test_stddev(coords, missing, single):
     assert single.stddev == 9.5335664307167285
 
 
+def test_compute_statistics(coords, single):
+    stats = coords.compute_statistics()
+    assert [s['min'] for s in stats] == coords.min
+    assert [s['max'] for s in stats] == coords.max
+    assert [s['mean'] for s in stats] == coords.mean
+    assert [s['stddev'] for s in stats] == coords.stddev
+
+    assert single.compute_statistics() == {
+        'min': single.min, 'max': single.max,
+        'mean': single.mean, 'stddev': single.stddev}
+
+
 def test_get_data_returns_masked_array(coords):
     assert isinstance(coords.get_data(), np.ma.core.MaskedArray)
 
@@ -93,6 +105,12 @@ def test_ix(coords, single):
     assert single.ix(0, 0) == 1.
 
 
+def test_ix_many(coords, single):
+    assert (coords.ix_many([0, 0], [0, 0]) ==
+            [[1.0, 2.0, 3.0, 4.0, 5.0], [1.0, 2.0, 3.0, 4.0, 5.0]]).all()
+    assert single.ix_many([0], [0]).shape == (1, 1)
+
+
 def test_get_data_shape(rect):
     assert rect.get_data().shape == (5, 3, 2)
     assert rect.get_data(axis=0).shape == (2, 5, 3)
@@ -289,6 +307,15 @@ def test_rdc_ix(rdc_rect, rdc_one, rdc_single):
     assert (rdc_single.ix(0, 0) == [100., 200., 300.]).all()
 
 
+def test_rdc_ix_many(rdc_rect, rdc_single):
+    data = rdc_rect.ix_many([0, 0], [0, 0])
+    assert data.shape == (2, 3, 2)
+    assert (data[0] == [[100., 2.], [200., 2.], [300., 2.]]).all()
+
+    assert (rdc_single.ix_many([0], [0])[0, :, 0] ==
+            [100., 200., 300.]).all()
+
+
 def test_rdc_get_data(rdc_rect):
     assert isinstance(rdc_rect.get_data(), np.ma.masked_array)
     assert (rdc_rect.get_data() ==
@@ -318,7 +345,34 @@ def test_rdc_get_data_masked_false(rdc_rect, rdc_single):
         rdc_single.get_data(masked=False), np.ma.masked_array)
 
 
+def test_rdc_get_data_lazy(rdc_rect):
+    expected = np.array(wrappers_data.rdc_get_data)
+    lazy = rdc_rect.get_data(lazy=True)
+
+    assert len(lazy) == 3
+    assert lazy.shape == expected.shape
+    assert (lazy[1] == expected[1]).all()
+    assert (lazy[np.int64(1)] == expected[1]).all()
+    assert (lazy[0:2, 1] == expected[0:2, 1]).all()
+    assert (lazy.compute() == expected).all()
+
+
 def test_rdc_index(rdc_rect, mocker):
     idx = mocker.spy(RasterData, 'index')
     assert rdc_rect.index(0, 0) == (0, 0)
     assert idx.call_count == 1
+
+
+def test_wgs84_shape_is_memoized(coords):
+    shape = coords.wgs84_shape
+    assert shape.equals(coords.shape)
+    assert coords.wgs84_shape is shape
+
+
+def test_index_many(coords):
+    assert coords.index_many([0, 1], [2, 3]) == [(0, 2), (1, 3)]
+
+
+def test_zonal_stats_unsupported_reader(coords):
+    with pytest.raises(NotImplementedError):
+        coords.zonal_stats([])